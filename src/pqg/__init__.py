@@ -1,4 +1,7 @@
-from .arguments import QueryFilter
+from .arguments import QueryFilter, SampleDataFormat
+from .batch_query_builder import BatchQueryBuilder
+from .cache import SampleDataCache
+from .column_statistics import StatisticsCatalog
 from .entity import (
   Entity,
   Property,
@@ -8,21 +11,30 @@ from .entity import (
   PropertyInt,
   PropertyString,
 )
+from .executor import Executor
 from .generator import GenerateOptions, Generator
 from .group_by_aggregation import GroupByAggregation
+from .limits import MemoryLimit, QueryLimits, Timeout
 from .merge import Merge
 from .projection import Projection
 from .query import Query
 from .query_pool import QueryPool
 from .query_structure import QueryStructure
+from .result_cache import ResultCache
+from .result_summary import ResultSummary
+from .sample_data import SampleDataOptions
 from .schema import Schema
 from .selection import Selection
+from .stratification import QueryShape, Stratification
 
 __all__ = [
+  'BatchQueryBuilder',
   'Entity',
+  'Executor',
   'GenerateOptions',
   'Generator',
   'GroupByAggregation',
+  'MemoryLimit',
   'Merge',
   'Projection',
   'Property',
@@ -33,8 +45,18 @@ __all__ = [
   'PropertyString',
   'Query',
   'QueryFilter',
+  'QueryLimits',
   'QueryPool',
+  'QueryShape',
   'QueryStructure',
+  'ResultCache',
+  'ResultSummary',
+  'SampleDataCache',
+  'SampleDataFormat',
+  'SampleDataOptions',
   'Schema',
   'Selection',
+  'StatisticsCatalog',
+  'Stratification',
+  'Timeout',
 ]
@@ -1,9 +1,15 @@
+import os
+import sys
 import time
 from contextlib import contextmanager
 
 from .arguments import Arguments
+from .cache import SampleDataCache
 from .generator import GenerateOptions, Generator
+from .limits import QueryLimits
+from .query_pool import write_queries
 from .query_structure import QueryStructure
+from .sample_data import SampleDataOptions
 from .schema import Schema
 
 
@@ -12,7 +18,20 @@ def main() -> None:
 
   schema, query_structure = Schema.from_file(arguments.schema), QueryStructure.from_args(arguments)
 
-  generator = Generator(schema, query_structure, with_status=True)
+  if arguments.clear_sample_data_cache:
+    SampleDataCache(arguments.sample_data_cache).invalidate()
+
+  generator = Generator(
+    schema,
+    query_structure,
+    with_status=True,
+    sample_data_options=SampleDataOptions.from_args(arguments),
+    result_cache_size=arguments.result_cache_size * 1024 * 1024,
+    query_limits=QueryLimits.from_args(arguments),
+  )
+
+  # Streamed queries own stdout unless they go to a file
+  log = sys.stderr if arguments.stream and not arguments.output_file else sys.stdout
 
   @contextmanager
   def timer(description: str):
@@ -20,7 +39,7 @@ def main() -> None:
     start = time.time()
     yield
     elapsed_time = time.time() - start
-    print(f'Time taken for {description}: {elapsed_time:.2f} seconds')
+    print(f'Time taken for {description}: {elapsed_time:.2f} seconds', file=log)
 
   will_execute = arguments.verbose or arguments.filter is not None
 
@@ -30,7 +49,26 @@ def main() -> None:
     else f'generating {arguments.num_queries} queries'
   )
 
-  with timer(message):
+  if arguments.stream:
+    with generator, timer(message):
+      queries = generator.iter_queries(GenerateOptions.from_args(arguments))
+
+      if arguments.output_file:
+        if os.path.dirname(arguments.output_file):
+          os.makedirs(os.path.dirname(arguments.output_file), exist_ok=True)
+
+        with open(arguments.output_file, 'w+') as f:
+          count = write_queries(queries, f)
+      else:
+        count = write_queries(queries, sys.stdout)
+        print()
+
+    if arguments.output_file:
+      print(f'\n{count} queries written to {arguments.output_file}')
+
+    return
+
+  with generator, timer(message):
     query_pool = generator.generate(GenerateOptions.from_args(arguments))
 
     if arguments.filter is not None:
@@ -44,12 +82,12 @@ def main() -> None:
         print(f'Query {i}\n')
         print(str(query) + '\n')
 
-        if result is not None:
-          print('Results:\n')
-          print(result)
-        elif error is not None:
+        if error is not None:
           print('Error:\n')
           print(error)
+        elif result is not None:
+          print('Results:\n')
+          print(result)
 
         print()
 
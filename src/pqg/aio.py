@@ -0,0 +1,98 @@
+import asyncio
+import inspect
+import threading
+import time
+import typing as t
+
+T = t.TypeVar('T')
+
+ProgressCallback = t.Callable[[int, int], t.Optional[t.Awaitable[None]]]
+
+DEFAULT_STEP_DURATION = 0.05
+
+
+async def aiterate(
+  iterator: t.Iterator[T],
+  total: int,
+  progress: t.Optional[ProgressCallback] = None,
+  timeout: t.Optional[float] = None,
+  step_duration: float = DEFAULT_STEP_DURATION,
+) -> t.AsyncIterator[T]:
+  """
+  Drain a blocking iterator without blocking the event loop.
+
+  Items are taken from the iterator in steps run by the event loop's default
+  executor, each step collecting items for about `step_duration` seconds, so
+  a thread is only occupied while a step runs and any number of iterations can
+  be multiplexed on the threads of that executor. Work the iterator hands to
+  worker processes, such as `Executor.map`, keeps running between steps up to
+  the iterator's own limit on work in flight.
+
+  When the iteration is cancelled, times out or is closed early, the running
+  step stops after its current item and the iterator is closed, which stops
+  submitting new work.
+
+  Args:
+    iterator: Iterator to drain
+    total: Number of items expected, passed on to `progress`
+    progress: Function called with the number of items received so far and
+      `total` after every step. If it returns an awaitable, it is awaited.
+    timeout: Seconds after which the iteration raises `TimeoutError`, or None
+    step_duration: Targeted run time of a step in seconds
+
+  Returns:
+    Asynchronous iterator over the items
+  """
+  loop = asyncio.get_running_loop()
+
+  deadline = None if timeout is None else loop.time() + timeout
+
+  stepper, done = _Stepper(iterator, step_duration), 0
+
+  try:
+    while True:
+      async with asyncio.timeout_at(deadline):
+        items = await loop.run_in_executor(None, stepper.step)
+
+      if not items:
+        return
+
+      done += len(items)
+
+      if progress is not None and inspect.isawaitable(awaitable := progress(done, total)):
+        await awaitable
+
+      for item in items:
+        yield item
+  finally:
+    stepper.stop.set()
+    loop.run_in_executor(None, stepper.close)
+
+
+class _Stepper(t.Generic[T]):
+  """Take items from an iterator in timed steps, one step at a time."""
+
+  def __init__(self, iterator: t.Iterator[T], step_duration: float):
+    self.iterator, self.step_duration = iterator, step_duration
+    self.lock, self.stop = threading.Lock(), threading.Event()
+
+  def step(self) -> t.List[T]:
+    """Take items until `step_duration` elapsed, the iterator ends or `stop` is set."""
+    with self.lock:
+      items, start = [], time.perf_counter()
+
+      while not self.stop.is_set() and time.perf_counter() - start < self.step_duration:
+        try:
+          items.append(next(self.iterator))
+        except StopIteration:
+          break
+
+      return items
+
+  def close(self) -> None:
+    """Close the iterator once the running step, if any, has finished."""
+    with self.lock:
+      close = getattr(self.iterator, 'close', None)
+
+      if close is not None:
+        close()
@@ -75,27 +75,57 @@ class QueryFilter(str, Enum):
   WITHOUT_ERROR = 'without-error'
 
 
+class SampleDataFormat(str, Enum):
+  """Enum for on-disk sample data formats"""
+
+  PARQUET = 'parquet'
+  FEATHER = 'feather'
+
+
 @dataclass
 class Arguments:
   """
   A wrapper class providing concrete types for parsed command-line arguments.
   """
 
+  batch_size: t.Optional[int]
+  candidates_per_attempt: int
+  clear_sample_data_cache: bool
   disable_multi_processing: bool
   ensure_non_empty: bool
   filter: QueryFilter
   groupby_aggregation_probability: float
+  max_attempts: int
   max_groupby_columns: int
   max_merges: int
   max_projection_columns: int
   max_selection_conditions: int
+  max_selectivity: t.Optional[float]
+  max_total_attempts: t.Optional[int]
+  min_selectivity: t.Optional[float]
   multi_line: bool
   num_queries: int
   output_file: t.Optional[str]
   projection_probability: float
+  query_memory_limit: t.Optional[int]
+  query_timeout: t.Optional[float]
+  result_cache_size: int
+  sample_data_cache: t.Optional[str]
+  sample_data_cache_size: int
+  sample_data_chunk_size: int
+  sample_data_dir: t.Optional[str]
+  sample_data_format: SampleDataFormat
+  scale_factor: float
   schema: str
+  seed: t.Optional[int]
   selection_probability: float
   sort: bool
+  stratified: bool
+  stream: bool
+  summarize_results: bool
+  typed_sample_data: bool
+  unique: bool
+  vectorized: bool
   verbose: bool
 
   @staticmethod
@@ -105,10 +135,31 @@ class Arguments:
       formatter_class=HelpFormatter,
     )
 
+    parser.add_argument(
+      '--batch-size',
+      type=int,
+      required=False,
+      help='Number of queries per task sent to worker processes, adapted to their cost by default',
+    )
+
+    parser.add_argument(
+      '--candidates-per-attempt',
+      type=int,
+      required=False,
+      default=1,
+      help='Number of candidate queries built and executed per attempt with --ensure-non-empty',
+    )
+
+    parser.add_argument(
+      '--clear-sample-data-cache',
+      action='store_true',
+      help='Remove all sample data cached in --sample-data-cache before generating it',
+    )
+
     parser.add_argument(
       '--disable-multi-processing',
       action='store_true',
-      help='Generate and execute queries in a consecutive fashion',
+      help='Generate sample data and queries, and execute queries, in a consecutive fashion',
     )
 
     parser.add_argument(
@@ -134,6 +185,14 @@ class Arguments:
       help='Probability of including groupby aggregation operations',
     )
 
+    parser.add_argument(
+      '--max-attempts',
+      type=int,
+      required=False,
+      default=100,
+      help='Attempts per query with --ensure-non-empty or --unique before the query is dropped',
+    )
+
     parser.add_argument(
       '--max-groupby-columns',
       type=int,
@@ -166,6 +225,27 @@ class Arguments:
       help='Maximum number of conditions in selection operations',
     )
 
+    parser.add_argument(
+      '--max-selectivity',
+      type=float,
+      required=False,
+      help='Largest fraction of rows a selection condition should select, based on sample data',
+    )
+
+    parser.add_argument(
+      '--max-total-attempts',
+      type=int,
+      required=False,
+      help='Attempts of a whole run with --ensure-non-empty before generation stops',
+    )
+
+    parser.add_argument(
+      '--min-selectivity',
+      type=float,
+      required=False,
+      help='Smallest fraction of rows a selection condition should select, based on sample data',
+    )
+
     parser.add_argument(
       '--multi-line',
       action='store_true',
@@ -194,6 +274,77 @@ class Arguments:
       help='Probability of including projection operations',
     )
 
+    parser.add_argument(
+      '--query-memory-limit',
+      type=int,
+      required=False,
+      default=None,
+      help='Maximum memory a query may allocate in a worker process in megabytes, Linux only',
+    )
+
+    parser.add_argument(
+      '--query-timeout',
+      type=float,
+      required=False,
+      default=None,
+      help='Maximum time a query may run in a worker process in seconds',
+    )
+
+    parser.add_argument(
+      '--result-cache-size',
+      type=int,
+      required=False,
+      default=256,
+      help='Maximum size of the intermediate result cache per process in megabytes, 0 disables it',
+    )
+
+    parser.add_argument(
+      '--sample-data-cache',
+      type=str,
+      required=False,
+      help='Directory to cache generated sample data in across runs, requires a seed',
+    )
+
+    parser.add_argument(
+      '--sample-data-cache-size',
+      type=int,
+      required=False,
+      default=1024,
+      help='Maximum size of the sample data cache in megabytes',
+    )
+
+    parser.add_argument(
+      '--sample-data-chunk-size',
+      type=int,
+      required=False,
+      default=1_000_000,
+      help='Maximum number of sample rows generated at once when writing sample data to disk',
+    )
+
+    parser.add_argument(
+      '--sample-data-dir',
+      type=str,
+      required=False,
+      help='Directory to write generated sample data to, one file per entity',
+    )
+
+    parser.add_argument(
+      '--sample-data-format',
+      type=SampleDataFormat,
+      choices=list(SampleDataFormat),
+      required=False,
+      default=SampleDataFormat.PARQUET.value,
+      help='File format of sample data written to the sample data directory',
+    )
+
+    parser.add_argument(
+      '--scale-factor',
+      type=float,
+      required=False,
+      default=1.0,
+      help='Multiplier applied to the number of sample rows of every entity',
+    )
+
     parser.add_argument(
       '--schema',
       type=str,
@@ -201,6 +352,13 @@ class Arguments:
       help='Path to the relational schema JSON file',
     )
 
+    parser.add_argument(
+      '--seed',
+      type=int,
+      required=False,
+      help='Seed making generated sample data and queries reproducible',
+    )
+
     parser.add_argument(
       '--selection-probability',
       type=float,
@@ -215,10 +373,54 @@ class Arguments:
       help='Whether or not to sort the queries by complexity',
     )
 
+    parser.add_argument(
+      '--stratified',
+      action='store_true',
+      help='Fix the number of queries of every operation mix up front to match the target',
+    )
+
+    parser.add_argument(
+      '--stream',
+      action='store_true',
+      help='Write each query to the output file, or to stdout, as soon as it is generated',
+    )
+
+    parser.add_argument(
+      '--summarize-results',
+      action='store_true',
+      help='Keep the shape, dtypes and hash of each query result instead of the result',
+    )
+
+    parser.add_argument(
+      '--typed-sample-data',
+      action='store_true',
+      help='Use compact dtypes such as categoricals and Arrow strings for sample data',
+    )
+
+    parser.add_argument(
+      '--unique',
+      action='store_true',
+      help='Keep generating until the requested number of distinct queries exist',
+    )
+
+    parser.add_argument(
+      '--vectorized',
+      action='store_true',
+      help='Build queries in batches with NumPy, faster but not reproducing the default queries',
+    )
+
     parser.add_argument(
       '--verbose',
       action='store_true',
       help='Print extra generation information and statistics',
     )
 
-    return Arguments(**vars(parser.parse_args()))
+    arguments = Arguments(**vars(parser.parse_args()))
+
+    if arguments.stream and (arguments.filter is not None or arguments.sort or arguments.verbose):
+      parser.error('--stream cannot be combined with --filter, --sort or --verbose')
+
+    if arguments.clear_sample_data_cache and arguments.sample_data_cache is None:
+      parser.error('--clear-sample-data-cache requires --sample-data-cache')
+
+    return arguments
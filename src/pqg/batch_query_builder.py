@@ -0,0 +1,497 @@
+import typing as t
+
+import numpy as np
+
+from .entity import PropertyDate, PropertyEnum, PropertyFloat, PropertyInt, PropertyString
+from .group_by_aggregation import GroupByAggregation
+from .merge import Merge
+from .operation import Operation
+from .plan import EntityPlan
+from .projection import Projection
+from .query import Query
+from .query_builder import (
+  AGGREGATIONS,
+  COMPARISONS,
+  CONNECTIVES,
+  ENUM_OPERATORS,
+  STRING_OPERATORS,
+  Condition,
+)
+from .query_structure import QueryStructure
+from .schema import Schema
+from .selection import Selection
+
+DEFAULT_BATCH_SIZE = 10_000
+
+INT, FLOAT, STRING, ENUM, DATE = range(5)
+
+OPERATORS = (COMPARISONS, COMPARISONS, STRING_OPERATORS, ENUM_OPERATORS, COMPARISONS)
+
+
+class _Batch(t.NamedTuple):
+  """Queries built together, with the state of each that the query merging it needs."""
+
+  queries: t.List[Query]
+  columns: t.List[int]
+  merge_entities: t.List[int]
+  merge_counts: t.List[int]
+
+
+def _quote(value: str) -> str:
+  return f"'{value}'" if "'" not in value else f'"{value}"'
+
+
+def _samples(rng: np.random.Generator, lengths: np.ndarray) -> np.ndarray:
+  """
+  Draw a random permutation of `range(length)` for every length at once.
+
+  Returns:
+    Matrix whose row `i` starts with a random permutation of `range(lengths[i])`
+  """
+  width = int(lengths.max(initial=0))
+  keys = rng.random((len(lengths), width))
+  keys[np.arange(width) >= lengths[:, None]] = np.inf
+  return np.argsort(keys, axis=1)
+
+
+class BatchQueryBuilder:
+  """
+  A builder generating random queries in batches, with NumPy drawing the decisions.
+
+  Rather than building one query at a time with a scalar random call per
+  decision, `build_many` draws every decision of a batch as a NumPy array:
+  which operations are present, how many conditions, projected and grouping
+  columns each query has, and the columns, operators and constants of all
+  conditions. The queries are then assembled from these arrays. Merges are
+  drawn one round at a time, and their right-hand sides are built as a batch of
+  their own.
+
+  The generated queries follow the same distribution as those of
+  `QueryBuilder`, but are drawn from a NumPy generator, so a seeded batch
+  builder does not reproduce the queries of a seeded `QueryBuilder`.
+
+  Selection constants are drawn from the ranges declared in the schema, so query
+  structures with a selectivity range are not supported.
+
+  Attributes:
+    schema: The database schema containing entity definitions
+    query_structure: Configuration parameters for query generation
+    multi_line: Whether to format queries across multiple lines
+    typed_sample_data: Whether queries run against sample data with compact dtypes
+    rng: NumPy random generator all decisions are drawn from
+
+  Example:
+    builder = BatchQueryBuilder(schema, query_structure, False, rng=np.random.default_rng(42))
+    queries = builder.build_many(100_000)
+  """
+
+  def __init__(
+    self,
+    schema: Schema,
+    query_structure: QueryStructure,
+    multi_line: bool,
+    typed_sample_data: bool = False,
+    rng: t.Optional[np.random.Generator] = None,
+  ):
+    if query_structure.selectivity is not None:
+      raise ValueError('Batched query building does not support selectivity ranges')
+
+    self.schema, self.query_structure = schema, query_structure
+    self.multi_line, self.typed_sample_data = multi_line, typed_sample_data
+    self.rng: np.random.Generator = rng or np.random.default_rng()
+
+    plan = self.plan = schema.plan
+
+    # Columns of all entities in plan order, each entity's columns in name order.
+    self._offsets = np.zeros(len(plan.entities), dtype=np.intp)
+    self._num_columns = np.zeros(len(plan.entities), dtype=np.intp)
+    self._local_index: t.List[t.Dict[str, int]] = []
+
+    kinds, low, high, num_choices = [], [], [], []
+
+    self._names: t.List[str] = []
+    self._quoted_names: t.List[str] = []
+    self._bits: t.List[int] = []
+    self._operators: t.List[t.Tuple[str, ...]] = []
+    self._choices: t.List[t.Tuple[str, ...]] = []
+
+    for entity_plan in plan.entities:
+      names = plan.names(entity_plan.columns)
+
+      self._offsets[entity_plan.index] = len(self._names)
+      self._num_columns[entity_plan.index] = len(names)
+      self._local_index.append({name: i for i, name in enumerate(names)})
+
+      for name in names:
+        kind, minimum, maximum, choices = self._compile(entity_plan.properties[name])
+        kinds.append(kind)
+        low.append(minimum)
+        high.append(maximum)
+        num_choices.append(len(choices))
+        self._names.append(name)
+        self._quoted_names.append(f"'{name}'")
+        self._bits.append(plan.column_bits[name])
+        self._operators.append(OPERATORS[kind])
+        self._choices.append(choices)
+
+    self._kinds = np.array(kinds, dtype=np.intp)
+    self._num_operators = np.array([len(operators) for operators in self._operators], dtype=np.intp)
+    self._low = np.array(low, dtype=np.float64)
+    self._high = np.array(high, dtype=np.float64)
+
+    # Integer bounds are kept exact, float64 rounds integers beyond 2**53.
+    bounds = np.iinfo(np.int64)
+    self._int_low = np.array([min(max(int(v), bounds.min), bounds.max) for v in low], np.int64)
+    self._int_high = np.array([min(max(int(v), bounds.min), bounds.max) for v in high], np.int64)
+    self._num_choices = np.array(num_choices, dtype=np.intp)
+
+  def _compile(self, property: t.Any) -> t.Tuple[int, float, float, t.Tuple[str, ...]]:
+    """Return the kind, numeric range and rendered constants of a property."""
+    match property:
+      case PropertyInt(minimum, maximum):
+        return INT, minimum, maximum, ()
+      case PropertyFloat(minimum, maximum):
+        return FLOAT, minimum, maximum, ()
+      case PropertyString(starting_character):
+        return STRING, 0, 0, tuple(_quote(value) for value in starting_character)
+      case PropertyEnum(values):
+        return ENUM, 0, 0, tuple(_quote(value) for value in values)
+      case PropertyDate(minimum, maximum):
+        dates = (f"'{minimum.isoformat()}'", f"'{maximum.isoformat()}'")
+        if self.typed_sample_data:
+          dates = tuple(f'pd.Timestamp({value})' for value in dates)
+        return DATE, 0, 0, dates
+      case _:
+        raise ValueError(f'Unsupported property: {property}')
+
+  def build_many(self, n: int) -> t.List[Query]:
+    """
+    Build a batch of queries.
+
+    Args:
+      n: Number of queries to build
+
+    Returns:
+      List[Query]: The queries
+    """
+    return self._build(
+      self.rng.integers(0, len(self.plan.entities), n),
+      np.full(n, -1, dtype=np.intp),
+      np.full(n, self.query_structure.max_merges, dtype=np.intp),
+      group_by=True,
+    ).queries
+
+  def _build(
+    self,
+    entities: np.ndarray,
+    required: np.ndarray,
+    max_merges: np.ndarray,
+    group_by: bool,
+  ) -> _Batch:
+    """
+    Build a batch of queries on given entities.
+
+    Args:
+      entities: Plan index of the entity of every query
+      required: Local index of a column every query must keep, or -1
+      max_merges: Maximum number of merges of every query
+      group_by: Whether queries may end with a group by aggregation
+
+    Returns:
+      The queries, the masks of their columns and of their merged entities and
+      their `Query.merge_count`
+    """
+    rng, structure, plan = self.rng, self.query_structure, self.plan
+
+    n = len(entities)
+
+    num_columns = self._num_columns[entities]
+
+    operations: t.List[t.List[Operation]] = [[] for _ in range(n)]
+
+    has_selection = (
+      (num_columns > 0)
+      & (structure.max_selection_conditions > 0)
+      & (rng.random(n) < structure.selection_probability)
+    )
+
+    has_projection = (
+      (num_columns > 0)
+      & (structure.max_projection_columns > 0)
+      & (rng.random(n) < structure.projection_probability)
+    )
+
+    selected = np.flatnonzero(has_selection)
+
+    for row, selection in zip(selected.tolist(), self._selections(entities[selected])):
+      operations[row].append(selection)
+
+    entity_plans = [plan.entities[index] for index in entities.tolist()]
+
+    columns = [entity_plan.columns for entity_plan in entity_plans]
+
+    projected = np.flatnonzero(has_projection)
+
+    for row, mask in zip(
+      projected.tolist(), self._projections(entities[projected], required[projected])
+    ):
+      columns[row] = mask
+      operations[row].append(Projection(list(plan.names(mask))))
+
+    merge_entities = [1 << entity_plan.index for entity_plan in entity_plans]
+
+    merge_counts = self._merges(entity_plans, max_merges, columns, merge_entities, operations)
+
+    if group_by and structure.max_groupby_columns > 0:
+      grouped = [
+        row
+        for row, u in enumerate(rng.random(n).tolist())
+        if columns[row] and u < structure.groupby_aggregation_probability
+      ]
+
+      for row, group_by_aggregation in zip(
+        grouped, self._group_by_aggregations([columns[row] for row in grouped])
+      ):
+        operations[row].append(group_by_aggregation)
+
+    queries = [
+      Query(entity_plan.entity.name, ops, self.multi_line, set(plan.names(mask)))
+      for entity_plan, ops, mask in zip(entity_plans, operations, columns)
+    ]
+
+    return _Batch(queries, columns, merge_entities, merge_counts)
+
+  def _selections(self, entities: np.ndarray) -> t.List[Selection]:
+    """Draw a selection on all columns of each entity."""
+    rng, n = self.rng, len(entities)
+
+    num_columns = self._num_columns[entities]
+
+    counts = 1 + (
+      rng.random(n) * np.minimum(self.query_structure.max_selection_conditions, num_columns)
+    ).astype(np.intp)
+
+    owners = np.repeat(np.arange(n), counts)
+
+    total = len(owners)
+
+    columns = self._offsets[entities][owners] + (rng.random(total) * num_columns[owners]).astype(
+      np.intp
+    )
+
+    kinds = self._kinds[columns]
+
+    operators = (rng.random(total) * self._num_operators[columns]).astype(np.intp)
+
+    u = rng.random(total)
+
+    numeric = self._low[columns] + u * (self._high[columns] - self._low[columns])
+
+    choices = (u * self._num_choices[columns]).astype(np.intp)
+
+    connectives = rng.integers(0, len(CONNECTIVES), total)
+
+    is_last = np.zeros(total, dtype=bool)
+    is_last[np.cumsum(counts) - 1] = True
+
+    isin = np.flatnonzero(kinds == ENUM)
+    isin = isin[operators[isin] == ENUM_OPERATORS.index('.isin')]
+
+    memberships = dict(zip(isin.tolist(), self._memberships(columns[isin], choices[isin] + 1)))
+
+    values: t.List[t.Any] = numeric.tolist()
+
+    integers = np.flatnonzero(kinds == INT)
+
+    integer_values = rng.integers(
+      self._int_low[columns[integers]], self._int_high[columns[integers]], endpoint=True
+    )
+
+    for i, value in zip(integers.tolist(), integer_values.tolist()):
+      values[i] = value
+
+    constants = np.flatnonzero(kinds >= STRING)
+
+    for i, column, choice in zip(
+      constants.tolist(), columns[constants].tolist(), choices[constants].tolist()
+    ):
+      values[i] = memberships[i] if i in memberships else self._choices[column][choice]
+
+    quoted_names, all_operators = self._quoted_names, self._operators
+
+    conditions: t.List[Condition] = [
+      (
+        quoted_names[column],
+        all_operators[column][operator],
+        value,
+        None if last else CONNECTIVES[connective],
+      )
+      for column, operator, value, connective, last in zip(
+        columns.tolist(), operators.tolist(), values, connectives.tolist(), is_last.tolist()
+      )
+    ]
+
+    bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+
+    return [Selection(conditions[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+  def _memberships(self, columns: np.ndarray, counts: np.ndarray) -> t.List[str]:
+    """Draw the values of `.isin` conditions, `counts` distinct values of each enum column."""
+    orders = _samples(self.rng, self._num_choices[columns])
+
+    return [
+      f"[{', '.join(self._choices[column][i] for i in order[:count])}]"
+      for column, order, count in zip(columns.tolist(), orders.tolist(), counts.tolist())
+    ]
+
+  def _projections(self, entities: np.ndarray, required: np.ndarray) -> t.List[int]:
+    """
+    Draw the projected columns of each entity, apart from its required column, which
+    counts against the projection limit.
+
+    Returns:
+      The mask of the projected and required columns of each entity, all of its
+      columns if the required column is the only one
+    """
+    num_columns = self._num_columns[entities]
+
+    available = num_columns - (required >= 0)
+
+    # The required column counts against the limit, leaving no drawn column at a limit of one.
+    room = self.query_structure.max_projection_columns - (required >= 0)
+
+    counts = np.where(
+      room > 0,
+      1
+      + (
+        self.rng.random(len(entities)) * np.minimum(np.maximum(room, 1), np.maximum(available, 1))
+      ).astype(np.intp),
+      0,
+    )
+
+    # Drawing from the columns after the required one shifts them past it.
+    orders = _samples(self.rng, available)
+    orders += (required[:, None] >= 0) & (orders >= required[:, None])
+
+    masks, bits = [], self._bits
+
+    for entity, offset, local, order, count, num_available in zip(
+      entities.tolist(),
+      self._offsets[entities].tolist(),
+      required.tolist(),
+      orders.tolist(),
+      counts.tolist(),
+      available.tolist(),
+    ):
+      if num_available == 0:
+        masks.append(self.plan.entities[entity].columns)
+        continue
+
+      mask = 0 if local < 0 else bits[offset + local]
+
+      for i in order[:count]:
+        mask |= bits[offset + i]
+
+      masks.append(mask)
+
+    return masks
+
+  def _merges(
+    self,
+    entity_plans: t.List[EntityPlan],
+    max_merges: np.ndarray,
+    columns: t.List[int],
+    merge_entities: t.List[int],
+    operations: t.List[t.List[Operation]],
+  ) -> t.List[int]:
+    """
+    Draw the merges of a batch of queries, updating their columns, merged entities and
+    operations in place.
+
+    Merges are drawn in rounds. Every round adds at most one merge to each query
+    still merging, and the right-hand sides of all merges of a round are built
+    as one batch.
+
+    Returns:
+      The `Query.merge_count` of every query
+    """
+    rng = self.rng
+
+    num_merges = (rng.random(len(entity_plans)) * (max_merges + 1)).astype(np.intp).tolist()
+
+    budgets = max_merges.tolist()
+
+    merge_counts = [0] * len(entity_plans)
+
+    active = [row for row, count in enumerate(num_merges) if count > 0]
+
+    for merge_round in range(max(num_merges, default=0)):
+      active = [row for row in active if num_merges[row] > merge_round]
+
+      picks = []
+
+      for row, u in zip(active, rng.random(len(active)).tolist()):
+        joins = [
+          join
+          for join in entity_plans[row].joins
+          if join[0] & columns[row] and not join[4] & merge_entities[row]
+        ]
+
+        # A query without a valid join or budget left stops merging, as in `QueryBuilder`.
+        if joins and budgets[row] - num_merges[row] >= 0:
+          picks.append((row, joins[int(u * len(joins))]))
+
+      active = [row for row, _ in picks]
+
+      if not picks:
+        break
+
+      right_entities = [self.plan.entity_plans[join[3]].index for _, join in picks]
+
+      right = self._build(
+        np.array(right_entities, dtype=np.intp),
+        np.array(
+          [self._local_index[entity][join[2]] for entity, (_, join) in zip(right_entities, picks)],
+          dtype=np.intp,
+        ),
+        np.array([budgets[row] - num_merges[row] for row, _ in picks], dtype=np.intp),
+        group_by=False,
+      )
+
+      for (row, join), right_query, right_columns, right_merged, right_count in zip(
+        picks, right.queries, right.columns, right.merge_entities, right.merge_counts
+      ):
+        columns[row] |= right_columns
+        merge_entities[row] |= right_merged
+        merge_counts[row] += 1 + right_count
+        budgets[row] -= right_count
+        operations[row].append(Merge(right_query, f"'{join[1]}'", f"'{join[2]}'"))
+
+    return merge_counts
+
+  def _group_by_aggregations(self, masks: t.List[int]) -> t.List[GroupByAggregation]:
+    """Draw a group by aggregation over the given columns of each query."""
+    rng, n = self.rng, len(masks)
+
+    names = [self.plan.names(mask) for mask in masks]
+
+    lengths = np.array([len(columns) for columns in names], dtype=np.intp)
+
+    counts = 1 + (
+      rng.random(n) * np.minimum(self.query_structure.max_groupby_columns, lengths)
+    ).astype(np.intp)
+
+    orders = _samples(rng, lengths)
+
+    functions = rng.integers(0, len(AGGREGATIONS), n)
+
+    return [
+      GroupByAggregation(
+        [columns[i] for i in order[:count]],
+        AGGREGATIONS[function],
+        observed=self.typed_sample_data,
+      )
+      for columns, order, count, function in zip(
+        names, orders.tolist(), counts.tolist(), functions.tolist()
+      )
+    ]
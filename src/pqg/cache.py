@@ -0,0 +1,192 @@
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import typing as t
+
+import pandas as pd
+
+from .entity import Entity
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_SIZE = 1 << 30
+
+
+class SampleDataCache:
+  """
+  A content-addressed, size-bounded on-disk cache of generated sample data.
+
+  Each entry holds the sample data of a single entity as an uncompressed Feather
+  (Arrow IPC) file, named after the entity and a hash of everything that
+  determines its contents: the entity definition, the number of rows, the seed
+  and the entries of the entities it references. Reading an uncompressed Arrow
+  file is much cheaper than generating its data again.
+
+  When the total size of the cache exceeds `max_size` bytes, the least recently
+  used entries are evicted.
+
+  Attributes:
+    directory: Directory holding the cached files
+    max_size: Maximum total size of the cache in bytes, or None for no limit
+
+  Example:
+    cache = SampleDataCache('.pqg-cache', max_size=512 * 1024 * 1024)
+    key = cache.key(entity, num_rows=1000, seed=42)
+    if (df := cache.get(key)) is None:
+      df = entity.generate_dataframe(1000)
+      cache.put(key, df)
+  """
+
+  SUFFIX = '.feather'
+
+  def __init__(self, directory: str, max_size: t.Optional[int] = DEFAULT_CACHE_SIZE):
+    try:
+      import pyarrow  # noqa: F401
+    except ImportError as e:
+      raise ImportError(
+        'Caching sample data requires pyarrow, install it with `pip install pyarrow`'
+      ) from e
+
+    self.directory, self.max_size = directory, max_size
+
+    os.makedirs(directory, exist_ok=True)
+
+  @staticmethod
+  def key(entity: Entity, num_rows: int, seed: int, **parameters: t.Any) -> str:
+    """
+    Compute the cache key of an entity's sample data.
+
+    Args:
+      entity: The entity the sample data is generated for
+      num_rows: The number of generated rows
+      seed: The seed the sample data is generated with
+      parameters: Any other values that influence the generated data
+
+    Returns:
+      str: A key of the form `<entity name>-<content hash>`
+    """
+    definition = json.dumps(
+      {
+        'version': CACHE_VERSION,
+        'entity': dataclasses.asdict(entity),
+        'num_rows': num_rows,
+        'seed': seed,
+        'parameters': parameters,
+      },
+      default=str,
+      sort_keys=True,
+    )
+
+    return f'{entity.name}-{hashlib.sha256(definition.encode()).hexdigest()[:32]}'
+
+  def path(self, key: str) -> str:
+    """Return the path of the file holding the entry with the given key."""
+    return os.path.join(self.directory, key + self.SUFFIX)
+
+  def get(self, key: str) -> t.Optional[pd.DataFrame]:
+    """
+    Load a cached entry.
+
+    Args:
+      key: The key of the entry
+
+    Returns:
+      The cached DataFrame, or None if no entry exists for the key
+    """
+    from pyarrow import feather
+
+    path = self.path(key)
+
+    try:
+      table = feather.read_table(path)
+      os.utime(path)
+    except FileNotFoundError:
+      return None
+
+    return table.to_pandas()
+
+  def put(self, key: str, df: pd.DataFrame) -> None:
+    """
+    Store an entry, evicting least recently used entries if the cache is full.
+
+    The file is written to a temporary location first and atomically moved into
+    place, so concurrent readers never observe a partially written entry.
+
+    Args:
+      key: The key of the entry
+      df: The DataFrame to store
+    """
+    from pyarrow import feather
+
+    fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+    os.close(fd)
+
+    try:
+      feather.write_feather(df, temporary_path, compression='uncompressed')
+      os.replace(temporary_path, self.path(key))
+    except BaseException:
+      os.remove(temporary_path)
+      raise
+
+    self.evict()
+
+  def entries(self) -> t.List[t.Tuple[str, int, float]]:
+    """
+    List the entries of the cache.
+
+    Returns:
+      List of (key, size in bytes, last access time) tuples
+    """
+    entries = []
+
+    for name in os.listdir(self.directory):
+      if not name.endswith(self.SUFFIX):
+        continue
+
+      try:
+        stat = os.stat(os.path.join(self.directory, name))
+      except FileNotFoundError:
+        continue
+
+      entries.append((name[: -len(self.SUFFIX)], stat.st_size, stat.st_mtime))
+
+    return entries
+
+  def size(self) -> int:
+    """Return the total size of all cached entries in bytes."""
+    return sum(size for _, size, _ in self.entries())
+
+  def evict(self) -> None:
+    """Remove least recently used entries until the cache fits within `max_size`."""
+    if self.max_size is None:
+      return
+
+    entries = sorted(self.entries(), key=lambda entry: entry[2])
+
+    total = sum(size for _, size, _ in entries)
+
+    for key, size, _ in entries:
+      if total <= self.max_size:
+        break
+
+      self._remove(key)
+
+      total -= size
+
+  def invalidate(self, entity_name: t.Optional[str] = None) -> None:
+    """
+    Remove cached entries.
+
+    Args:
+      entity_name: If set, only remove entries of this entity, otherwise remove all entries
+    """
+    for key, _, _ in self.entries():
+      if entity_name is None or key.rsplit('-', 1)[0] == entity_name:
+        self._remove(key)
+
+  def _remove(self, key: str) -> None:
+    try:
+      os.remove(self.path(key))
+    except FileNotFoundError:
+      pass
@@ -0,0 +1,211 @@
+import random
+import typing as t
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_NUM_QUANTILES = 100
+DEFAULT_NUM_MOST_COMMON = 20
+DEFAULT_MAX_SAMPLE_ROWS = 100_000
+
+
+@dataclass
+class ColumnStatistics:
+  """
+  Summary of the values of a single sample data column.
+
+  Attributes:
+    quantiles: Column values at evenly spaced ranks, from the minimum to the maximum
+    most_common: Most common values with the fraction of rows holding them, most
+      common first
+    distinct_count: Number of distinct values
+  """
+
+  quantiles: t.List[t.Any]
+  most_common: t.List[t.Tuple[t.Any, float]]
+  distinct_count: int
+
+  @staticmethod
+  def from_series(
+    series: pd.Series,
+    num_quantiles: int = DEFAULT_NUM_QUANTILES,
+    num_most_common: int = DEFAULT_NUM_MOST_COMMON,
+  ) -> t.Optional['ColumnStatistics']:
+    """
+    Compute the statistics of a column.
+
+    Args:
+      series: The column
+      num_quantiles: Number of intervals between the recorded quantiles
+      num_most_common: Number of most common values to record
+
+    Returns:
+      The statistics, or None if the column holds no values
+    """
+    series = series.dropna()
+
+    if series.empty:
+      return None
+
+    values = series.sort_values(ignore_index=True)
+
+    positions = np.linspace(0, len(values) - 1, num_quantiles + 1).round().astype(np.intp)
+
+    frequencies = series.value_counts(normalize=True, sort=True)
+
+    frequencies = frequencies[frequencies > 0]
+
+    return ColumnStatistics(
+      quantiles=values.iloc[positions].tolist(),
+      most_common=list(frequencies.head(num_most_common).items()),
+      distinct_count=len(frequencies),
+    )
+
+  def quantile(self, fraction: float) -> t.Any:
+    """
+    Return a value that about `fraction` of the rows lie below.
+
+    Args:
+      fraction: Fraction of rows between 0 and 1
+
+    Returns:
+      The column value closest to the requested quantile
+    """
+    position = min(max(fraction, 0.0), 1.0) * (len(self.quantiles) - 1)
+    return self.quantiles[round(position)]
+
+  def value_with_frequency(
+    self, rng: random.Random, minimum: float, maximum: float
+  ) -> t.Optional[t.Any]:
+    """
+    Pick one of the most common values held by a fraction of rows within a range.
+
+    Args:
+      rng: Random generator to choose among candidate values with
+      minimum: Smallest accepted fraction of rows holding the value
+      maximum: Largest accepted fraction of rows holding the value
+
+    Returns:
+      A value within the range, or None if no recorded value qualifies
+    """
+    candidates = [value for value, frequency in self.most_common if minimum <= frequency <= maximum]
+    return rng.choice(candidates) if candidates else None
+
+  def values_with_frequency(
+    self, rng: random.Random, minimum: float, maximum: float
+  ) -> t.Optional[t.List[t.Any]]:
+    """
+    Pick a set of most common values jointly held by a fraction of rows within a range.
+
+    Values are added in random order while the fraction stays below `maximum`,
+    until it reaches `minimum`. If that fails, the search is repeated starting
+    from each of the other values.
+
+    Args:
+      rng: Random generator to order candidate values with
+      minimum: Smallest accepted fraction of rows holding one of the values
+      maximum: Largest accepted fraction of rows holding one of the values
+
+    Returns:
+      The values, or None if no set of recorded values qualifies
+    """
+    candidates = list(self.most_common)
+
+    rng.shuffle(candidates)
+
+    for start in range(len(candidates)):
+      selected, total = [], 0.0
+
+      for value, frequency in candidates[start:] + candidates[:start]:
+        if total + frequency > maximum:
+          continue
+
+        selected.append(value)
+        total += frequency
+
+        if total >= minimum:
+          return selected
+
+    return None
+
+
+class StatisticsCatalog:
+  """
+  Per-column statistics of a schema's sample data.
+
+  The catalog records quantiles, most common values and distinct counts of
+  every column, which lets the query builder choose selection constants that
+  select a controlled fraction of rows instead of drawing them uniformly from
+  the range declared in the schema.
+
+  Columns with more than `max_sample_rows` rows are summarized from a random
+  sample of that many rows, which bounds the cost of building the catalog for
+  large sample data.
+
+  Example:
+    catalog = StatisticsCatalog.from_sample_data(sample_data)
+    median = catalog['customer']['age'].quantile(0.5)
+  """
+
+  def __init__(self, columns: t.Dict[str, t.Dict[str, ColumnStatistics]]):
+    self._columns = columns
+
+  def __getitem__(self, entity_name: str) -> t.Dict[str, ColumnStatistics]:
+    return self._columns[entity_name]
+
+  def __contains__(self, entity_name: str) -> bool:
+    return entity_name in self._columns
+
+  def get(self, entity_name: str, column: str) -> t.Optional[ColumnStatistics]:
+    """Return the statistics of a column, or None if they are unknown."""
+    return self._columns.get(entity_name, {}).get(column)
+
+  @staticmethod
+  def from_sample_data(
+    sample_data: t.Dict[str, pd.DataFrame],
+    num_quantiles: int = DEFAULT_NUM_QUANTILES,
+    num_most_common: int = DEFAULT_NUM_MOST_COMMON,
+    max_sample_rows: t.Optional[int] = DEFAULT_MAX_SAMPLE_ROWS,
+  ) -> 'StatisticsCatalog':
+    """
+    Build the catalog of a schema's sample data.
+
+    Args:
+      sample_data: Dictionary mapping entity names to sample DataFrames
+      num_quantiles: Number of intervals between the recorded quantiles
+      num_most_common: Number of most common values to record per column
+      max_sample_rows: Maximum number of rows summarized per entity, or None
+
+    Returns:
+      StatisticsCatalog: The catalog
+    """
+    columns: t.Dict[str, t.Dict[str, ColumnStatistics]] = {}
+
+    for name, df in sample_data.items():
+      if max_sample_rows is not None and len(df) > max_sample_rows:
+        df = df.sample(max_sample_rows, random_state=0)
+
+      columns[name] = {
+        column: statistics
+        for column in df.columns
+        if (statistics := ColumnStatistics.from_series(df[column], num_quantiles, num_most_common))
+        is not None
+      }
+
+    return StatisticsCatalog(columns)
+
+
+def target_selectivity(rng: random.Random, selectivity: t.Tuple[float, float]) -> float:
+  """
+  Draw the fraction of rows a single predicate should select.
+
+  Args:
+    rng: Random generator to draw with
+    selectivity: Smallest and largest accepted fraction
+
+  Returns:
+    float: A fraction within the range
+  """
+  minimum, maximum = selectivity
+  return rng.uniform(max(minimum, 0.0), min(maximum, 1.0))
@@ -1,11 +1,13 @@
-import random
+import importlib.util
 import string
 import sys
 import typing as t
 from dataclasses import dataclass
 from datetime import date
 
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import ExtensionArray
 
 
 @dataclass
@@ -117,6 +119,12 @@ class PropertyDate:
 
 Property = t.Union[PropertyInt, PropertyFloat, PropertyEnum, PropertyString, PropertyDate]
 
+DEFAULT_NUM_ROWS = 1000
+
+ArrayLike = t.Union[np.ndarray, ExtensionArray]
+
+_ASCII_LETTERS = np.array([ord(c) for c in string.ascii_letters], dtype='<u4')
+
 
 @dataclass(frozen=True)
 class Entity:
@@ -132,12 +140,14 @@ class Entity:
     primary_key (str | t.List[str] | None): The primary key(s) of the entity.
     properties (t.Dict[str, Property]): A dictionary of property names to their definitions.
     foreign_keys (t.Dict[str, t.List[str]]): A dictionary of foreign key relationships.
+    num_rows (int): The number of sample rows generated at a scale factor of 1.
   """
 
   name: str
   primary_key: str | t.List[str] | None
   properties: t.Dict[str, Property]
   foreign_keys: t.Dict[str, t.List[str]]
+  num_rows: int = DEFAULT_NUM_ROWS
 
   def __hash__(self) -> int:
     """
@@ -216,6 +226,7 @@ class Entity:
       primary_key=config.get('primary_key', None),
       properties=properties,
       foreign_keys=config.get('foreign_keys', {}),
+      num_rows=config.get('num_rows', DEFAULT_NUM_ROWS),
     )
 
   @property
@@ -223,6 +234,48 @@ class Entity:
     """Check if the entity has a single, unique primary key."""
     return isinstance(self.primary_key, str)
 
+  @property
+  def max_rows(self) -> t.Optional[int]:
+    """
+    The maximum number of rows that can be generated for this entity.
+
+    Returns:
+      The size of the value range of a unique integer primary key, or None
+      if the number of rows is unconstrained.
+    """
+    if not self.has_unique_primary_key:
+      return None
+
+    assert isinstance(self.primary_key, str)
+
+    primary_key_property = self.properties.get(self.primary_key)
+
+    if not isinstance(primary_key_property, PropertyInt):
+      return None
+
+    return primary_key_property.max - primary_key_property.min + 1
+
+  def row_count(self, scale_factor: float = 1.0) -> int:
+    """
+    Get the number of sample rows to generate for this entity at a scale factor.
+
+    Similar to TPC-H, the configured `num_rows` is the size of the entity at a
+    scale factor of 1 and grows linearly with it. The result is limited by
+    `max_rows` when the entity has a unique integer primary key.
+
+    Args:
+      scale_factor (float): Multiplier applied to the configured number of rows.
+
+    Returns:
+      int: The number of rows to generate.
+    """
+    num_rows = max(1, round(self.num_rows * scale_factor))
+
+    if self.max_rows is not None:
+      num_rows = min(num_rows, self.max_rows)
+
+    return num_rows
+
   @property
   def data_ranges(self) -> t.Dict[str, t.Tuple[int, int] | t.List[str]]:
     """
@@ -246,12 +299,31 @@ class Entity:
 
     return ranges
 
-  def generate_dataframe(self, num_rows=1000) -> pd.DataFrame:
+  def generate_dataframe(
+    self,
+    num_rows: int = DEFAULT_NUM_ROWS,
+    rng: t.Optional[np.random.Generator] = None,
+    references: t.Optional[t.Mapping[str, pd.DataFrame]] = None,
+    typed: bool = False,
+  ) -> pd.DataFrame:
     """
     Generate a Pandas dataframe using this entity's information.
 
+    Each column is generated as a single NumPy array and the dataframe is
+    assembled once, so the cost of generation grows with the number of
+    columns rather than the number of cells.
+
     Args:
       num_rows (int): The number of rows to generate. Default is 1000.
+      rng (np.random.Generator | None): Random generator to draw values from.
+        A freshly seeded generator is used if none is provided.
+      references (Mapping[str, pd.DataFrame] | None): Sample data of the entities
+        referenced by this entity's foreign keys, keyed by entity name. Foreign key
+        columns are drawn from the referenced key columns, so that merges along
+        foreign keys match rows.
+      typed (bool): If True, use compact dtypes: `category` for enums, the narrowest
+        integer dtype fitting each integer range, `datetime64` for dates and Arrow
+        backed strings. Otherwise enums, strings and ISO formatted dates are objects.
 
     Returns:
       pd.DataFrame:
@@ -259,52 +331,288 @@ class Entity:
 
     Note:
       If the entity has a unique primary key of type int, the number of rows may be limited
-      to the range of possible values for that key.
+      to the range of possible values for that key. Values of such a key are unique and
+      evenly spread over its range.
     """
-    rows = []
-
-    if self.has_unique_primary_key:
-      assert isinstance(self.primary_key, str)
-
-      primary_key_property = self.properties[self.primary_key]
-
-      if isinstance(primary_key_property, PropertyInt):
-        constraint = primary_key_property.max - primary_key_property.min + 1
-        num_rows = min(constraint, num_rows)
-
-    for i in range(num_rows):
-      row = {}
-
-      for name, property in self.properties.items():
-        match property:
-          case PropertyInt(minimum, maximum):
-            if (
-              self.has_unique_primary_key
-              and name == self.primary_key
-              and num_rows == (maximum - minimum + 1)
-            ):
-              row[name] = i + minimum
-            else:
-              if maximum - minimum > 1e6:
-                row[name] = random.randint(-1000000, 1000000)
-              else:
-                row[name] = random.randint(minimum, maximum)
-          case PropertyFloat(minimum, maximum):
-            if maximum - minimum > 1e6:
-              row[name] = round(random.uniform(-1000000, 1000000), 2)
-            else:
-              row[name] = round(random.uniform(minimum, maximum), 2)
-          case PropertyString(starting_character):
-            starting_char = random.choice(starting_character)
-            random_string = ''.join(random.choices(string.ascii_letters, k=9))
-            row[name] = starting_char + random_string
-          case PropertyEnum(values):
-            row[name] = random.choice(values)
-          case PropertyDate(minimum, maximum):
-            row[name] = pd.to_datetime(
-              random.choice(pd.date_range(pd.to_datetime(minimum), pd.to_datetime(maximum)))
-            ).strftime('%Y-%m-%d')
-
-      rows.append(row)
-
-    return pd.DataFrame(rows)
+    return pd.DataFrame(self.generate_columns(num_rows, rng, references, typed))
+
+  def generate_columns(
+    self,
+    num_rows: int = DEFAULT_NUM_ROWS,
+    rng: t.Optional[np.random.Generator] = None,
+    references: t.Optional[t.Mapping[str, pd.DataFrame]] = None,
+    typed: bool = False,
+  ) -> t.Dict[str, ArrayLike]:
+    """
+    Generate this entity's sample data as a dictionary of NumPy arrays.
+
+    This is the columnar representation `generate_dataframe` is built from.
+    Untyped string columns are fixed-width unicode arrays, which are much cheaper
+    to pickle than object arrays when sending sample data between processes.
+
+    Args:
+      num_rows (int): The number of rows to generate. Default is 1000.
+      rng (np.random.Generator | None): Random generator to draw values from.
+      references (Mapping[str, pd.DataFrame] | None): Sample data of referenced entities.
+      typed (bool): If True, use compact dtypes (see `generate_dataframe`).
+
+    Returns:
+      Dictionary mapping property names to arrays of generated values, or an
+      empty dictionary if no rows are generated.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+
+    if self.max_rows is not None:
+      num_rows = min(self.max_rows, num_rows)
+
+    if num_rows <= 0:
+      return {}
+
+    return self._generate_columns(0, num_rows, num_rows, rng, references, typed)
+
+  def generate_dataframes(
+    self,
+    num_rows: int,
+    chunk_size: int,
+    rng: t.Optional[np.random.Generator] = None,
+    references: t.Optional[t.Mapping[str, pd.DataFrame]] = None,
+    typed: bool = False,
+  ) -> t.Iterator[pd.DataFrame]:
+    """
+    Generate this entity's sample data as a sequence of fixed-size dataframes.
+
+    This allows writing very large entities to disk without ever holding all
+    of their rows in memory at once. Sequential primary keys continue across
+    chunks, so concatenating the chunks yields a valid table.
+
+    Args:
+      num_rows (int): The total number of rows to generate.
+      chunk_size (int): The maximum number of rows in each dataframe.
+      rng (np.random.Generator | None): Random generator to draw values from.
+      references (Mapping[str, pd.DataFrame] | None): Sample data of referenced entities.
+      typed (bool): If True, use compact dtypes (see `generate_dataframe`).
+
+    Yields:
+      pd.DataFrame: Consecutive chunks of at most `chunk_size` rows.
+
+    Raises:
+      ValueError: If `chunk_size` is not positive.
+    """
+    if chunk_size <= 0:
+      raise ValueError('Chunk size must be positive')
+
+    rng = rng if rng is not None else np.random.default_rng()
+
+    if self.max_rows is not None:
+      num_rows = min(self.max_rows, num_rows)
+
+    for offset in range(0, num_rows, chunk_size):
+      yield pd.DataFrame(
+        self._generate_columns(
+          offset, min(chunk_size, num_rows - offset), num_rows, rng, references, typed
+        ),
+        index=pd.RangeIndex(offset, min(offset + chunk_size, num_rows)),
+      )
+
+  def _generate_columns(
+    self,
+    offset: int,
+    num_rows: int,
+    total_rows: int,
+    rng: np.random.Generator,
+    references: t.Optional[t.Mapping[str, pd.DataFrame]] = None,
+    typed: bool = False,
+  ) -> t.Dict[str, ArrayLike]:
+    """Generate the columns of `num_rows` rows starting at row `offset`."""
+    foreign_key_columns = self._sample_foreign_keys(num_rows, rng, references or {}, typed)
+
+    return {
+      name: foreign_key_columns[name]
+      if name in foreign_key_columns
+      else self._generate_column(name, property, offset, num_rows, total_rows, rng, typed)
+      for name, property in self.properties.items()
+    }
+
+  def _sample_foreign_keys(
+    self,
+    num_rows: int,
+    rng: np.random.Generator,
+    references: t.Mapping[str, pd.DataFrame],
+    typed: bool = False,
+  ) -> t.Dict[str, ArrayLike]:
+    """
+    Draw the values of foreign key columns from the referenced entities' sample data.
+
+    Foreign keys that reference different columns of the same entity (such as
+    the two halves of a composite key) are drawn from the same referenced rows,
+    so that together they form existing keys. Foreign keys whose referenced
+    data is unavailable are left out and generated from their property instead.
+
+    Args:
+      num_rows (int): The number of values to draw for each column.
+      rng (np.random.Generator): Random generator to draw rows with.
+      references (Mapping[str, pd.DataFrame]): Sample data of referenced entities.
+      typed (bool): If True, widen integer keys to also fit the foreign key's own range.
+
+    Returns:
+      Dictionary mapping foreign key column names to arrays of referenced values.
+    """
+    columns: t.Dict[str, ArrayLike] = {}
+
+    drawn: t.Dict[str, t.Tuple[np.ndarray, t.Set[str]]] = {}
+
+    for local_column, (foreign_column, foreign_table) in self.foreign_keys.items():
+      referenced = references.get(foreign_table)
+
+      if (
+        local_column not in self.properties
+        or referenced is None
+        or foreign_column not in referenced
+        or referenced.empty
+      ):
+        continue
+
+      rows, used_columns = drawn.get(foreign_table, (None, set()))
+
+      if rows is None or foreign_column in used_columns:
+        rows, used_columns = rng.integers(0, len(referenced), size=num_rows), set()
+
+      used_columns.add(foreign_column)
+      drawn[foreign_table] = (rows, used_columns)
+
+      column = referenced[foreign_column]
+
+      values = (
+        column.to_numpy()[rows] if isinstance(column.dtype, np.dtype) else column.array.take(rows)
+      )
+
+      property = self.properties[local_column]
+
+      if typed and isinstance(property, PropertyInt) and values.dtype.kind == 'i':
+        # Selection constants are drawn from the foreign key's own range, which
+        # may not fit the dtype of the referenced column.
+        values = values.astype(
+          np.result_type(values.dtype, _narrowest_int_dtype(property.min, property.max))
+        )
+
+      columns[local_column] = values
+
+    return columns
+
+  def _generate_column(
+    self,
+    name: str,
+    property: Property,
+    offset: int,
+    num_rows: int,
+    total_rows: int,
+    rng: np.random.Generator,
+    typed: bool = False,
+  ) -> ArrayLike:
+    """
+    Generate the values of a single column as an array.
+
+    Args:
+      name (str): The name of the property being generated.
+      property (Property): The definition of the property.
+      offset (int): The index of the first generated row within the table.
+      num_rows (int): The number of values to generate.
+      total_rows (int): The total number of rows in the table.
+      rng (np.random.Generator): Random generator to draw values from.
+      typed (bool): If True, use compact dtypes (see `generate_dataframe`).
+
+    Returns:
+      ArrayLike: An array of `num_rows` values conforming to the property.
+    """
+    match property:
+      case PropertyInt(minimum, maximum):
+        values = self._generate_int_column(name, property, offset, num_rows, total_rows, rng)
+        return values.astype(_narrowest_int_dtype(minimum, maximum)) if typed else values
+      case PropertyFloat(minimum, maximum):
+        if maximum - minimum > 1e6:
+          return np.round(rng.uniform(-1000000, 1000000, size=num_rows), 2)
+
+        return np.round(rng.uniform(minimum, maximum, size=num_rows), 2)
+      case PropertyString(starting_character):
+        prefixes = np.asarray(starting_character, dtype=str)[
+          rng.integers(0, len(starting_character), size=num_rows)
+        ]
+
+        # Draw the 9 trailing letters of every value as unicode code points and
+        # reinterpret each row of code points as a single fixed-width string.
+        suffixes = (
+          _ASCII_LETTERS[rng.integers(0, len(_ASCII_LETTERS), size=(num_rows, 9))]
+          .view('<U9')
+          .ravel()
+        )
+
+        strings = np.char.add(prefixes, suffixes)
+
+        return pd.array(strings, dtype=_string_dtype()) if typed else strings
+      case PropertyEnum(values):
+        codes = rng.integers(0, len(values), size=num_rows)
+
+        if typed:
+          return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(values))
+
+        return np.asarray(values, dtype=object)[codes]
+      case PropertyDate(minimum, maximum):
+        start = np.datetime64(minimum, 'D')
+
+        days = rng.integers(0, (maximum - minimum).days + 1, size=num_rows)
+
+        if typed:
+          return start + days
+
+        # Render every date of the range once and index into it, so all cells
+        # holding the same date share a single string object.
+        labels = np.datetime_as_string(
+          np.arange(start, np.datetime64(maximum, 'D') + 1), unit='D'
+        ).astype(object)
+
+        return labels[days]
+
+    raise ValueError(f'Unknown property type: {type(property).__name__}')
+
+  def _generate_int_column(
+    self,
+    name: str,
+    property: PropertyInt,
+    offset: int,
+    num_rows: int,
+    total_rows: int,
+    rng: np.random.Generator,
+  ) -> np.ndarray:
+    """Generate the values of an integer column as an int64 array."""
+    minimum, maximum = property.min, property.max
+
+    if self.has_unique_primary_key and name == self.primary_key:
+      # Spread unique keys evenly over the range, which stays consistent
+      # across chunks without keeping track of the keys handed out so far.
+      if maximum - minimum > 1e6 and total_rows <= 2000001:
+        minimum, maximum = -1000000, 1000000
+
+      step = max(1, (maximum - minimum + 1) // total_rows)
+
+      return minimum + np.arange(offset, offset + num_rows, dtype=np.int64) * step
+
+    if maximum - minimum > 1e6:
+      return rng.integers(-1000000, 1000000, size=num_rows, endpoint=True)
+
+    return rng.integers(minimum, maximum, size=num_rows, endpoint=True)
+
+
+def _narrowest_int_dtype(minimum: int, maximum: int) -> np.dtype:
+  """Return the narrowest signed integer dtype holding every value in [minimum, maximum]."""
+  for dtype in (np.int8, np.int16, np.int32):
+    info = np.iinfo(dtype)
+
+    if info.min <= minimum and maximum <= info.max:
+      return np.dtype(dtype)
+
+  return np.dtype(np.int64)
+
+
+def _string_dtype() -> pd.StringDtype:
+  """Return the Arrow backed string dtype, or the Python backed one if pyarrow is missing."""
+  return pd.StringDtype('pyarrow' if importlib.util.find_spec('pyarrow') else 'python')
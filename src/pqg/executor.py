@@ -0,0 +1,247 @@
+import inspect
+import multiprocessing as mp
+import os
+import threading
+import typing as t
+from functools import partial
+from multiprocessing import pool as mp_pool
+from multiprocessing.pool import Pool
+
+import pandas as pd
+
+from . import limits
+from .limits import QueryLimits
+from .parallel import imap_batched
+from .result_cache import DEFAULT_RESULT_CACHE_SIZE, ResultCache
+from .schema import Schema
+
+T = t.TypeVar('T')
+R = t.TypeVar('R')
+
+SampleData = t.Dict[str, pd.DataFrame]
+
+_worker_schema: t.Optional[Schema] = None
+_worker_sample_data: SampleData = {}
+_worker_result_cache: t.Optional[ResultCache] = None
+_worker_query_limits: t.Optional[QueryLimits] = None
+_worker_state: t.Any = None
+_worker_calls = 0
+
+
+class Executor:
+  """
+  A long-lived pool of worker processes holding sample data and its schema.
+
+  The worker processes are started on first use and receive the schema and
+  sample data once, when they start. They are then reused for every task until
+  the executor is closed, so generating queries, executing them and executing
+  them again to filter or compute statistics neither start new processes nor
+  send the sample data again.
+
+  Functions run by the executor are called with the schema and sample data held
+  by the worker, followed by the item to process. They are pickled with every
+  batch of items, so they should be defined at module level. Every worker also
+  holds a `ResultCache` of intermediate results computed from its sample data,
+  which these functions can use through `worker_result_cache`, and the
+  `QueryLimits` its queries are held to, see `worker_query_limits`. Any other
+  state these functions need from every worker, such as statistics of the
+  sample data, can be given to the executor and read with `worker_state`, so it
+  is not pickled with every batch either. A worker that ran a query exceeding
+  its limits exits once it has returned its results, and the pool replaces it
+  with a fresh process.
+
+  Attributes:
+    sample_data: Sample data the workers hold
+    schema: Schema the workers hold, if any
+    processes: Number of worker processes
+    result_cache_size: Maximum size of the result cache of every worker in bytes
+    query_limits: Limits enforced on every query the workers execute, if any
+    state: Any other state the workers hold, such as the statistics of the
+      sample data
+
+  Example:
+    with Executor(sample_data, schema) as executor:
+      results = list(executor.map(execute_query, queries))
+  """
+
+  def __init__(
+    self,
+    sample_data: SampleData,
+    schema: t.Optional[Schema] = None,
+    processes: t.Optional[int] = None,
+    result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+    query_limits: t.Optional[QueryLimits] = None,
+    state: t.Any = None,
+  ) -> None:
+    self.sample_data, self.schema = sample_data, schema
+    self.processes = processes or os.cpu_count() or 1
+    self.result_cache_size = result_cache_size
+    self.query_limits = query_limits
+    self.state = state
+    self._pool: t.Optional[Pool] = None
+    self._lock = threading.Lock()
+
+  def __enter__(self) -> 'Executor':
+    return self
+
+  def __exit__(self, *_: t.Any) -> None:
+    self.close()
+
+  def __del__(self) -> None:
+    self.close()
+
+  @property
+  def pool(self) -> Pool:
+    """The worker pool, started on first access from any thread."""
+    with self._lock:
+      if self._pool is None:
+        recycles = bool(self.query_limits) and _supports_recycling()
+
+        self._pool = (_RecyclingPool if recycles else Pool)(
+          self.processes,
+          initializer=_initialize_worker,
+          initargs=(
+            self.sample_data,
+            self.schema,
+            self.result_cache_size,
+            self.query_limits,
+            self.state,
+          ),
+          maxtasksperchild=1 if self.query_limits and not recycles else None,
+          context=mp.get_context('fork'),
+        )
+
+      return self._pool
+
+  def map(
+    self,
+    function: t.Callable[[t.Optional[Schema], SampleData, T], R],
+    items: t.Sequence[T],
+    batch_size: t.Optional[int] = None,
+  ) -> t.Iterator[R]:
+    """
+    Apply a function to items in the worker processes.
+
+    Args:
+      function: Function called with the schema, the sample data and an item
+      items: Items to apply the function to
+      batch_size: Items sent to a worker per task, or None to adapt it to their cost
+
+    Returns:
+      Iterator over the results in item order
+    """
+    return (
+      result
+      for _, result in imap_batched(
+        self.pool, partial(_call, function), items, self.processes, batch_size
+      )
+    )
+
+  def close(self) -> None:
+    """Stop the worker processes. The executor starts new ones if it is used again."""
+    pool, self._pool = getattr(self, '_pool', None), None
+
+    if pool is not None:
+      pool.terminate()
+      pool.join()
+
+
+def worker_result_cache() -> t.Optional[ResultCache]:
+  """Return the result cache of the current worker process, or None outside of workers."""
+  return _worker_result_cache
+
+
+def worker_query_limits() -> t.Optional[QueryLimits]:
+  """Return the query limits of the current worker process, or None outside of workers."""
+  return _worker_query_limits
+
+
+def worker_state() -> t.Any:
+  """Return the state of the executor of the current worker process, or None outside of workers."""
+  return _worker_state
+
+
+# Parameters of the undocumented `multiprocessing.pool.worker`, identical in CPython 3.8 to 3.13
+POOL_WORKER_PARAMETERS = (
+  'inqueue',
+  'outqueue',
+  'initializer',
+  'initargs',
+  'maxtasks',
+  'wrap_exception',
+)
+
+
+def _supports_recycling() -> bool:
+  """
+  Return True if `multiprocessing.pool.worker` has the parameters `_run_worker` passes.
+
+  Otherwise, executors with query limits replace their workers after every
+  task with the public `maxtasksperchild=1`, which is correct but empties the
+  result cache of the workers for every batch.
+  """
+  return tuple(inspect.signature(mp_pool.worker).parameters) == POOL_WORKER_PARAMETERS
+
+
+class _RecyclingPool(Pool):
+  """
+  A process pool whose workers exit after a task that exceeded query limits.
+
+  `Pool.Process` and `multiprocessing.pool.worker` are undocumented, see
+  `POOL_WORKER_PARAMETERS`. Workers are only replaced when needed because
+  replacing them after every task, with `maxtasksperchild=1`, makes execution
+  several times slower.
+  """
+
+  @staticmethod
+  def Process(ctx: t.Any, *args: t.Any, **kwds: t.Any) -> t.Any:
+    return ctx.Process(*args, **{**kwds, 'target': _run_worker})
+
+
+def _run_worker(
+  inqueue: t.Any,
+  outqueue: t.Any,
+  initializer: t.Optional[t.Callable[..., None]] = None,
+  initargs: t.Tuple[t.Any, ...] = (),
+  maxtasks: t.Optional[int] = None,
+  wrap_exception: bool = False,
+) -> None:
+  """
+  Run the tasks of a worker process one at a time with `multiprocessing.pool.worker`.
+
+  The worker exits on the pool's sentinel, or after returning the results of a
+  task that exceeded query limits. It takes no task it does not finish, so the
+  pool replaces it without losing any.
+  """
+  if initializer is not None:
+    initializer(*initargs)
+
+  while not limits.violated():
+    calls = _worker_calls
+    mp_pool.worker(inqueue, outqueue, maxtasks=1, wrap_exception=wrap_exception)
+
+    if _worker_calls == calls:
+      return
+
+
+def _initialize_worker(
+  sample_data: SampleData,
+  schema: t.Optional[Schema],
+  result_cache_size: int,
+  query_limits: t.Optional[QueryLimits],
+  state: t.Any,
+) -> None:
+  """Install the sample data, schema, query limits, state and an empty result cache in a worker."""
+  global _worker_sample_data, _worker_schema, _worker_result_cache, _worker_query_limits
+  global _worker_state
+  _worker_sample_data, _worker_schema = sample_data, schema
+  _worker_result_cache = ResultCache(result_cache_size)
+  _worker_query_limits = query_limits
+  _worker_state = state
+
+
+def _call(function: t.Callable[[t.Optional[Schema], SampleData, T], R], item: T) -> R:
+  """Call a function with the state installed by `_initialize_worker`."""
+  global _worker_calls
+  _worker_calls += 1
+  return function(_worker_schema, _worker_sample_data, item)
@@ -1,16 +1,30 @@
-import multiprocessing as mp
+import dataclasses
+import itertools
+import random
 import typing as t
 from dataclasses import dataclass
 from functools import partial
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from .aio import ProgressCallback, aiterate
 from .arguments import Arguments
+from .batch_query_builder import DEFAULT_BATCH_SIZE, BatchQueryBuilder
+from .column_statistics import StatisticsCatalog
+from .executor import Executor, worker_result_cache, worker_state
+from .limits import QueryLimits
+from .query import Query
 from .query_builder import QueryBuilder
-from .query_pool import QueryPool, QueryResult
+from .query_pool import GenerationStatistics, QueryPool, QueryResult, _execute_query
 from .query_structure import QueryStructure
+from .result_cache import DEFAULT_RESULT_CACHE_SIZE, ResultCache, ResultCacheStatistics
+from .sample_data import SampleDataOptions, generate_sample_data
 from .schema import Schema
+from .stratification import QueryShape, Stratification
+
+DEFAULT_MAX_ATTEMPTS = 100
 
 
 @dataclass
@@ -22,10 +36,33 @@ class GenerateOptions:
   and validated, including performance options like parallel processing.
 
   Attributes:
+    batch_size: Number of queries generated or executed per task sent to a worker
+      process, or None to adapt it to the measured cost of each query. With
+      `vectorized`, the number of queries built per batch.
+    candidates_per_attempt: Number of candidate queries built per attempt when
+      ensuring non-empty results, the first non-empty one is kept
     ensure_non_empty: If True, only generate queries that return data
+    max_attempts: Maximum number of attempts per query when ensuring non-empty
+      or unique results, or None for no limit. Queries without a non-empty
+      candidate within their budget, or after as many duplicates in a row, are
+      dropped.
+    max_total_attempts: Maximum number of attempts of a whole run, or None for no
+      limit. Once exhausted, the remaining queries are not generated.
     multi_line: If True, format queries with line breaks for readability
     multi_processing: If True, generate queries in parallel
     num_queries: Total number of queries to generate
+    seed: Seed making the generated queries reproducible. Query `i` is drawn from
+      its own stream derived from the seed and `i`, so the output does not depend
+      on the number of worker processes.
+    stratified: If True, fix the exact number of queries of every shape up front,
+      see `Stratification`, and build every query to its shape, so the operation
+      frequencies match the query structure instead of drifting from it
+    summarize_results: If True, the returned pool keeps a `ResultSummary` of the
+      result of every query it executes instead of the result
+    unique: If True, discard queries identical to an earlier one and generate
+      more until `num_queries` distinct queries exist, see `Query.fingerprint`
+    vectorized: If True, build queries in batches with a `BatchQueryBuilder`.
+      Seeded runs are reproducible, but differ from runs without this option.
 
   Example:
     options = GenerateOptions(
@@ -36,10 +73,19 @@ class GenerateOptions:
     generator.generate(options)
   """
 
+  batch_size: t.Optional[int] = None
+  candidates_per_attempt: int = 1
   ensure_non_empty: bool = False
+  max_attempts: t.Optional[int] = DEFAULT_MAX_ATTEMPTS
+  max_total_attempts: t.Optional[int] = None
   multi_line: bool = False
   multi_processing: bool = True
   num_queries: int = 1000
+  seed: t.Optional[int] = None
+  stratified: bool = False
+  summarize_results: bool = False
+  unique: bool = False
+  vectorized: bool = False
 
   @staticmethod
   def from_args(arguments: Arguments) -> 'GenerateOptions':
@@ -53,13 +99,155 @@ class GenerateOptions:
       GenerateOptions configured according to provided arguments
     """
     return GenerateOptions(
-      arguments.ensure_non_empty,
-      arguments.multi_line,
-      not arguments.disable_multi_processing,
-      arguments.num_queries,
+      batch_size=arguments.batch_size,
+      candidates_per_attempt=arguments.candidates_per_attempt,
+      ensure_non_empty=arguments.ensure_non_empty,
+      max_attempts=arguments.max_attempts,
+      max_total_attempts=arguments.max_total_attempts,
+      multi_line=arguments.multi_line,
+      multi_processing=not arguments.disable_multi_processing,
+      num_queries=arguments.num_queries,
+      seed=arguments.seed,
+      stratified=arguments.stratified,
+      summarize_results=arguments.summarize_results,
+      unique=arguments.unique,
+      vectorized=arguments.vectorized,
     )
 
 
+def query_rng(entropy: int, index: int) -> random.Random:
+  """
+  Create the random generator a single query is built with.
+
+  The generator is seeded from a seed sequence keyed by the root entropy and the
+  query's index, so every query draws from an independent stream that can be
+  recreated without generating any other query.
+
+  Args:
+    entropy: Root entropy shared by all queries of a run
+    index: Position of the query
+
+  Returns:
+    random.Random: The query's random generator
+  """
+  state = np.random.SeedSequence(entropy, spawn_key=(index,)).generate_state(2, np.uint64)
+  return random.Random(int(state[0]) << 64 | int(state[1]))
+
+
+class _GenerationState(t.NamedTuple):
+  """Inputs of query generation held by the worker processes of a generator, see `worker_state`."""
+
+  query_structure: QueryStructure
+  typed_sample_data: bool
+  statistics: t.Optional[StatisticsCatalog]
+
+
+def _generate_query(
+  generate_options: GenerateOptions,
+  entropy: int,
+  schema: t.Optional[Schema],
+  sample_data: t.Dict[str, pd.DataFrame],
+  slot: t.Tuple[int, t.Optional[QueryShape]],
+  state: t.Optional[_GenerationState] = None,
+  result_cache: t.Optional[ResultCache] = None,
+) -> t.Tuple[t.Optional[Query], int, ResultCacheStatistics]:
+  """
+  Generate the query at a position, with a shape if any, in a worker of an `Executor`.
+
+  The query structure and sample data statistics are those the worker holds,
+  or `state` outside of workers, so tasks only carry positions and shapes.
+  Candidates are executed with the worker's result cache, or with `result_cache`
+  outside of workers, and the cache statistics are returned with the query and
+  the number of attempts made.
+  """
+  assert schema is not None
+
+  query_structure, typed_sample_data, statistics = state if state is not None else worker_state()
+
+  cache = result_cache if result_cache is not None else worker_result_cache()
+
+  before = None if cache is None else dataclasses.replace(cache.statistics)
+
+  query, attempts = Generator._generate_single_query(
+    schema,
+    query_structure,
+    sample_data,
+    generate_options,
+    typed_sample_data,
+    statistics,
+    entropy,
+    *slot,
+    result_cache=cache,
+  )
+
+  return (
+    query,
+    attempts,
+    ResultCacheStatistics() if cache is None or before is None else cache.statistics - before,
+  )
+
+
+def _stratification(
+  query_structure: QueryStructure, schema: Schema, options: GenerateOptions, entropy: int
+) -> t.Optional[Stratification]:
+  """The shapes of a stratified run, shuffled with a stream no query index can share."""
+  if not options.stratified:
+    return None
+
+  return Stratification(
+    query_structure,
+    schema.plan,
+    options.num_queries,
+    np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(0, 0))),
+  )
+
+
+class _Slots(t.Sequence[t.Tuple[int, t.Optional[QueryShape]]]):
+  """
+  Consecutive query positions with the shape of each, if stratified.
+
+  Slots are only materialized when sliced, so a round of generation over
+  millions of positions does not build a list of them.
+  """
+
+  def __init__(self, start: int, count: int, shapes: t.Optional[t.Sequence[QueryShape]]):
+    self.start, self.count, self.shapes = start, count, shapes
+
+  def __len__(self) -> int:
+    return self.count
+
+  @t.overload
+  def __getitem__(self, index: int) -> t.Tuple[int, t.Optional[QueryShape]]: ...
+
+  @t.overload
+  def __getitem__(self, index: slice) -> t.List[t.Tuple[int, t.Optional[QueryShape]]]: ...
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(self.count))]
+
+    if not 0 <= index < self.count:
+      raise IndexError(index)
+
+    return self.start + index, None if self.shapes is None else self.shapes[index]
+
+
+def _should_retry(result: QueryResult) -> bool:
+  """Whether a candidate query failed or returned no data when ensuring non-empty results."""
+  df_result, error = result
+
+  if error is not None or df_result is None:
+    return True
+
+  if isinstance(df_result, pd.DataFrame):
+    return df_result.empty
+
+  if isinstance(df_result, pd.Series):
+    return df_result.size == 0
+
+  return False
+
+
 class Generator:
   """
   Generator for creating pools of pandas DataFrame queries.
@@ -75,10 +263,33 @@ class Generator:
     schema: Schema defining the database structure and relationships
     query_structure: Parameters controlling query complexity and features
     sample_data: Dictionary mapping entity names to sample DataFrames
+    sample_data_options: Options the sample data was generated with
+    statistics: Statistics of the sample data, built when the query structure sets
+      a selectivity range
     with_status: Whether to display progress bars during operations
+    result_cache: Cache of intermediate results of queries executed sequentially,
+      shared with the query pools the generator returns
+
+  In parallel, queries are generated and executed by worker processes of an
+  `Executor` the generator owns. The workers are started on first use and kept
+  for later calls to `generate` and for the query pools it returns, until the
+  generator is closed, which is best done by using it as a context manager. Every
+  worker keeps its own result cache, of the same size as `result_cache`:
+
+    with Generator(schema, query_structure) as generator:
+      query_pool = generator.generate(options)
+      print(query_pool.statistics())
   """
 
-  def __init__(self, schema: Schema, query_structure: QueryStructure, with_status: bool = False):
+  def __init__(
+    self,
+    schema: Schema,
+    query_structure: QueryStructure,
+    with_status: bool = False,
+    sample_data_options: t.Optional[SampleDataOptions] = None,
+    result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+    query_limits: t.Optional[QueryLimits] = None,
+  ):
     """
     Initialize generator with schema and generation parameters.
 
@@ -86,20 +297,46 @@ class Generator:
       schema: Schema defining database structure and relationships
       query_structure: Parameters controlling query generation
       with_status: If True, display progress bars during operations
+      sample_data_options: Options controlling sample data generation
+      result_cache_size: Maximum size in bytes of the cache of intermediate
+        results of the generator and of each of its worker processes, 0 disables it
+      query_limits: Limits enforced on every query executed by the worker processes
     """
     self.schema, self.query_structure = schema, query_structure
 
-    entities = schema.entities
+    self.sample_data_options = sample_data_options or SampleDataOptions()
+
+    self.sample_data: t.Dict[str, pd.DataFrame] = generate_sample_data(
+      schema, self.sample_data_options, with_status
+    )
+
+    self.statistics: t.Optional[StatisticsCatalog] = (
+      StatisticsCatalog.from_sample_data(self.sample_data)
+      if query_structure.selectivity is not None
+      else None
+    )
+
+    self.with_status = with_status
 
-    if with_status:
-      entities = tqdm(schema.entities, desc='Generating sample data', unit='entity')
+    self.result_cache = ResultCache(result_cache_size)
 
-    sample_data: t.Dict[str, pd.DataFrame] = {}
+    self.executor = Executor(
+      self.sample_data,
+      schema,
+      result_cache_size=result_cache_size,
+      query_limits=query_limits,
+      state=_GenerationState(query_structure, self.sample_data_options.typed, self.statistics),
+    )
 
-    for entity in entities:
-      sample_data[entity.name] = entity.generate_dataframe()
+  def __enter__(self) -> 'Generator':
+    return self
 
-    self.sample_data, self.with_status = sample_data, with_status
+  def __exit__(self, *_: t.Any) -> None:
+    self.close()
+
+  def close(self) -> None:
+    """Stop the worker processes shared by the generator and its query pools."""
+    self.executor.close()
 
   @staticmethod
   def _generate_single_query(
@@ -107,51 +344,110 @@ class Generator:
     query_structure: QueryStructure,
     sample_data: t.Dict[str, pd.DataFrame],
     generate_options: GenerateOptions,
-    _,
-  ):
+    typed_sample_data: bool,
+    statistics: t.Optional[StatisticsCatalog],
+    entropy: int,
+    index: int,
+    shape: t.Optional[QueryShape] = None,
+    result_cache: t.Optional[ResultCache] = None,
+  ) -> t.Tuple[t.Optional[Query], int]:
     """
     Generate a single query, optionally ensuring non-empty results.
 
     This method creates a query using the provided schema and structure parameters.
-    If ensure_non_empty is True, it will retry generation until the query produces
-    a non-empty result when executed against the sample data.
+    If ensure_non_empty is True, every attempt builds `candidates_per_attempt`
+    candidate queries and executes them against the sample data in turn, keeping
+    the first one that produces a non-empty result. Attempts are repeated up to
+    `max_attempts` times.
 
     Args:
       schema: Database schema containing entity definitions
       query_structure: Parameters controlling query complexity and features
       sample_data: Sample DataFrames for testing query results
       generate_options: Configuration options for generation
-      _: Ignored parameter (required for parallel mapping)
+      typed_sample_data: Whether the sample data uses compact dtypes
+      statistics: Statistics of the sample data guiding selection constants, if any
+      entropy: Root entropy the random stream of every query is derived from
+      index: Position of the query, selecting its random stream
+      shape: Operations the query must contain, if any
+      result_cache: Cache of intermediate results to execute candidates with, if any
 
     Returns:
-      Query: A randomly generated query conforming to the schema and structure
+      The generated query, or None if no candidate produced a non-empty result
+      within the attempt budget, and the number of attempts made
+    """
+    rng = query_rng(entropy, index)
+
+    def build() -> Query:
+      return QueryBuilder(
+        schema,
+        query_structure,
+        generate_options.multi_line,
+        typed_sample_data,
+        rng,
+        statistics,
+        shape,
+      ).build()
+
+    if not generate_options.ensure_non_empty:
+      return build(), 1
+
+    attempts = (
+      range(1, generate_options.max_attempts + 1)
+      if generate_options.max_attempts is not None
+      else itertools.count(1)
+    )
 
-    Note:
-      When ensure_non_empty is True, this method may enter an indefinite loop
-      if it cannot generate a query producing non-empty results.
+    attempt = 0
+
+    for attempt in attempts:
+      candidates = [build() for _ in range(generate_options.candidates_per_attempt)]
+
+      for query in candidates:
+        if not _should_retry(QueryPool._execute_single_query(query, sample_data, result_cache)):
+          return query, attempt
+
+    return None, attempt
+
+  def generate_query(self, options: GenerateOptions, index: int) -> t.Optional[Query]:
     """
-    query = QueryBuilder(schema, query_structure, generate_options.multi_line).build()
+    Generate the query at a given position without generating the ones before it.
 
-    if generate_options.ensure_non_empty:
-      result = QueryPool._execute_single_query(query, sample_data)
+    With a seed, the result is identical to the query at `index` of the pool
+    returned by `generate` with the same options, which allows regenerating
+    single queries of a large run on demand or splitting a run into shards.
 
-      def should_retry(result: QueryResult):
-        df_result, error = result
+    Args:
+      options: Configuration options controlling generation behavior
+      index: Position of the query
 
-        if error is not None or df_result is None:
-          return True
+    Returns:
+      The generated query, or None if it was dropped because no candidate produced
+      a non-empty result within the attempt budget
 
-        if isinstance(df_result, pd.DataFrame):
-          return df_result.empty
+    Raises:
+      ValueError: If the options build queries in batches or discard duplicates, as
+        the position of a query then depends on the queries before it.
+    """
+    if options.vectorized or options.unique:
+      raise ValueError('Queries built in batches or without duplicates depend on earlier ones')
 
-        if isinstance(df_result, pd.Series):
-          return df_result.size == 0
+    entropy = np.random.SeedSequence(options.seed).entropy
 
-        return False
+    stratification = _stratification(self.query_structure, self.schema, options, entropy)
 
-      while should_retry(result):
-        query = QueryBuilder(schema, query_structure, generate_options.multi_line).build()
-        result = QueryPool._execute_single_query(query, sample_data)
+    query, _ = self._generate_single_query(
+      self.schema,
+      self.query_structure,
+      self.sample_data,
+      options,
+      self.sample_data_options.typed,
+      self.statistics,
+      entropy,
+      index,
+      None if stratification is None else stratification[index],
+      self.result_cache,
+    )
 
     return query
 
@@ -170,40 +466,365 @@ class Generator:
       QueryPool containing the generated queries and sample data
 
     Note:
-      When using parallel processing, the progress bar accurately tracks
-      completion across all processes. The resulting QueryPool contains
-      all successfully generated queries in an arbitrary order.
+      When using parallel processing, queries are generated by the workers of
+      the generator's executor, which already hold the schema and sample data,
+      so tasks only carry batches of query indices. The progress bar
+      accurately tracks completion across all processes. Queries are returned
+      in index order, and with a seed the pool is identical regardless of the
+      number of processes.
+
+      When ensuring non-empty results, the pool records how many attempts
+      were made and how many queries were dropped, see `GenerationStatistics`.
+      Batches already running when the total attempt budget is exhausted still
+      complete, but their results are discarded.
+
+      With `options.unique`, queries whose fingerprint matches an earlier query
+      are discarded and more queries are generated in their place, until the
+      pool holds `num_queries` distinct queries. A query is dropped once
+      `max_attempts` candidates in a row turned out to be duplicates, which only
+      happens when nearly every query the structure allows was generated.
+
+      With `options.vectorized`, queries are built in the calling process in
+      batches, see `_generate_batches`.
+
+      To process queries while they are generated, without holding all of them
+      in memory, use `iter_queries` instead.
     """
-    f = partial(
-      self._generate_single_query, self.schema, self.query_structure, self.sample_data, options
-    )
+    statistics = GenerationStatistics(requested=options.num_queries)
 
-    if options.multi_processing:
-      with mp.Pool() as pool:
-        generated_queries = list(
-          tqdm(
-            pool.imap(f, range(options.num_queries)),
-            desc='Generating queries',
-            disable=not self.with_status,
-            total=options.num_queries,
-            unit='query',
-          )
-        )
-    else:
-      generated_queries = [
-        f(i)
-        for i in tqdm(
-          range(options.num_queries),
-          desc='Generating queries',
-          disable=not self.with_status,
-          unit='query',
-        )
-      ]
+    generated_queries = list(self.iter_queries(options, statistics))
 
+    return self._query_pool(options, generated_queries, statistics)
+
+  def _query_pool(
+    self,
+    options: GenerateOptions,
+    generated_queries: t.List[Query],
+    statistics: GenerationStatistics,
+  ) -> QueryPool:
+    """Wrap generated queries in a pool sharing the generator's sample data and workers."""
     return QueryPool(
       generated_queries,
       self.query_structure,
       self.sample_data,
       options.multi_processing,
       self.with_status,
+      options.batch_size,
+      self.executor,
+      statistics if options.ensure_non_empty or options.unique else None,
+      self.result_cache,
+      summarize=options.summarize_results,
     )
+
+  def iter_queries(
+    self, options: GenerateOptions, statistics: t.Optional[GenerationStatistics] = None
+  ) -> t.Iterator[Query]:
+    """
+    Generate queries lazily, yielding each one as soon as it is available.
+
+    The queries are those `generate` returns, in the same order, but only the
+    work needed for the next few queries is in flight at any time: with
+    multi-processing at most two batches per worker process, see
+    `imap_batched`, and with `options.vectorized` a single batch. Generation
+    advances only as the queries are consumed, so memory stays flat however
+    many queries are requested, apart from the fingerprints kept with
+    `options.unique`. Closing the iterator early stops generation.
+
+    Args:
+      options: Configuration options controlling generation behavior
+      statistics: Statistics updated with the attempts made and queries dropped
+        as generation proceeds, complete once the iterator is exhausted
+
+    Returns:
+      Iterator over the generated queries
+
+    Example:
+      with Generator(schema, query_structure) as generator:
+        for query in generator.iter_queries(GenerateOptions(num_queries=10**9)):
+          print(query)
+    """
+    if options.stratified and options.vectorized:
+      raise ValueError('Queries built in batches cannot be stratified')
+
+    if statistics is None:
+      statistics = GenerationStatistics(requested=options.num_queries)
+
+    generated = 0
+
+    for query in (
+      self._generate_batches(options, statistics)
+      if options.vectorized
+      else self._generate_indexed(options, statistics)
+    ):
+      generated += 1
+      yield query
+
+    processed = generated + statistics.failed
+
+    if processed < options.num_queries:
+      statistics.failed += options.num_queries - processed
+      statistics.budget_exhausted = True
+
+  async def agenerate(
+    self,
+    options: GenerateOptions,
+    progress: t.Optional[ProgressCallback] = None,
+    timeout: t.Optional[float] = None,
+  ) -> QueryPool:
+    """
+    Generate a pool of queries like `generate`, without blocking the event loop.
+
+    Args:
+      options: Configuration options controlling generation behavior
+      progress: Function called with the number of generated queries and
+        `options.num_queries` as generation proceeds, awaited if it returns an
+        awaitable
+      timeout: Seconds after which generation is stopped and `TimeoutError`
+        raised, or None
+
+    Returns:
+      QueryPool containing the generated queries and sample data
+    """
+    statistics = GenerationStatistics(requested=options.num_queries)
+
+    generated_queries = [
+      query async for query in self.aiter_queries(options, statistics, progress, timeout)
+    ]
+
+    return self._query_pool(options, generated_queries, statistics)
+
+  def aiter_queries(
+    self,
+    options: GenerateOptions,
+    statistics: t.Optional[GenerationStatistics] = None,
+    progress: t.Optional[ProgressCallback] = None,
+    timeout: t.Optional[float] = None,
+  ) -> t.AsyncIterator[Query]:
+    """
+    Generate queries lazily like `iter_queries`, without blocking the event loop.
+
+    Queries are generated in steps on the event loop's default executor, see
+    `aiterate`, so many generations can be multiplexed on a single event loop,
+    sharing the worker processes of the generator. Cancelling the consuming
+    task, a timeout or closing the iterator stops generation.
+
+    Args:
+      options: Configuration options controlling generation behavior
+      statistics: Statistics updated as generation proceeds, see `iter_queries`
+      progress: Function called with the number of generated queries and
+        `options.num_queries` as generation proceeds, awaited if it returns an
+        awaitable
+      timeout: Seconds after which generation is stopped and `TimeoutError`
+        raised, or None
+
+    Returns:
+      Asynchronous iterator over the generated queries
+
+    Example:
+      async for query in generator.aiter_queries(options, timeout=60):
+        await queue.put(query)
+    """
+    return aiterate(self.iter_queries(options, statistics), options.num_queries, progress, timeout)
+
+  def _generate_indexed(
+    self, options: GenerateOptions, statistics: GenerationStatistics
+  ) -> t.Iterator[Query]:
+    """
+    Generate the queries at consecutive indices, each from its own random stream.
+
+    Indices `0` to `num_queries - 1` are generated first. With `options.unique`,
+    every duplicate is replaced by generating the next unused indices, so a
+    seeded pool still does not depend on the number of worker processes. With
+    `options.stratified`, every replacement takes the shape of the duplicate it
+    replaces.
+
+    Args:
+      options: Configuration options controlling generation behavior
+      statistics: Statistics updated with the attempts made and queries dropped
+
+    Returns:
+      Iterator over the generated queries
+    """
+    entropy = np.random.SeedSequence(options.seed).entropy
+
+    f = partial(_generate_query, options, entropy)
+
+    seen: t.Set[int] = set()
+
+    generated, duplicates_in_a_row = 0, 0
+
+    slots = _Slots(
+      0,
+      options.num_queries,
+      _stratification(self.query_structure, self.schema, options, entropy),
+    )
+
+    with tqdm(
+      desc='Generating queries',
+      disable=not self.with_status,
+      total=options.num_queries,
+      unit='query',
+    ) as progress:
+      while slots:
+        results = (
+          self.executor.map(f, slots, options.batch_size)
+          if options.multi_processing
+          else (
+            f(self.schema, self.sample_data, slot, self.executor.state, self.result_cache)
+            for slot in slots
+          )
+        )
+
+        # Shapes of the duplicates to replace in the next round
+        replaced: t.List[t.Optional[QueryShape]] = []
+
+        for (_, shape), (query, attempts, cache_statistics) in zip(slots, results):
+          statistics.attempts += attempts
+          statistics.result_cache += cache_statistics
+
+          if query is None:
+            statistics.failed += 1
+            progress.update()
+          elif options.unique and query.fingerprint in seen:
+            statistics.duplicates += 1
+            duplicates_in_a_row += 1
+            replaced.append(shape)
+
+            if options.max_attempts is not None and duplicates_in_a_row >= options.max_attempts:
+              statistics.failed += 1
+              duplicates_in_a_row = 0
+              replaced.pop()
+              progress.update()
+          else:
+            if options.unique:
+              seen.add(query.fingerprint)
+
+            generated += 1
+            duplicates_in_a_row = 0
+            progress.update()
+            yield query
+
+          if (
+            options.max_total_attempts is not None
+            and statistics.attempts >= options.max_total_attempts
+          ):
+            return
+
+        slots = _Slots(
+          slots.start + len(slots), len(replaced), replaced if options.stratified else None
+        )
+
+  def _generate_batches(
+    self, options: GenerateOptions, statistics: GenerationStatistics
+  ) -> t.Iterator[Query]:
+    """
+    Generate queries with a `BatchQueryBuilder`, `options.batch_size` at a time.
+
+    When ensuring non-empty or unique results, the queries of a batch are
+    generated in rounds. Each round makes one attempt for every query still
+    missing: the candidates of all of them are built together, duplicates of
+    earlier queries are discarded before anything is executed, the remaining
+    ones are executed, by the workers of the executor with multi-processing, and
+    those with non-empty results fill the missing queries in order. Queries still
+    missing after `max_attempts` rounds are dropped.
+
+    Args:
+      options: Configuration options controlling generation behavior
+      statistics: Statistics updated with the attempts made and queries dropped
+
+    Returns:
+      Iterator over the generated queries
+    """
+    builder = BatchQueryBuilder(
+      self.schema,
+      self.query_structure,
+      options.multi_line,
+      self.sample_data_options.typed,
+      np.random.default_rng(options.seed),
+    )
+
+    def exhausted() -> bool:
+      return (
+        options.max_total_attempts is not None and statistics.attempts >= options.max_total_attempts
+      )
+
+    batch_size = options.batch_size or DEFAULT_BATCH_SIZE
+
+    seen: t.Set[int] = set()
+
+    candidates_per_attempt = options.candidates_per_attempt if options.ensure_non_empty else 1
+
+    with tqdm(
+      desc='Generating queries',
+      disable=not self.with_status,
+      total=options.num_queries,
+      unit='query',
+    ) as progress:
+      for start in range(0, options.num_queries, batch_size):
+        if exhausted():
+          break
+
+        missing, attempt = min(batch_size, options.num_queries - start), 0
+
+        while missing and not exhausted():
+          if options.max_attempts is not None and attempt >= options.max_attempts:
+            break
+
+          attempt += 1
+
+          candidates = builder.build_many(missing * candidates_per_attempt)
+
+          if options.unique:
+            candidates = self._discard_duplicates(candidates, seen, statistics)
+
+          if options.ensure_non_empty:
+            results = (
+              self.executor.map(_execute_query, candidates)
+              if options.multi_processing
+              else (
+                _execute_query(None, self.sample_data, query, self.result_cache)
+                for query in candidates
+              )
+            )
+
+            non_empty = []
+
+            for query, (result, cache_statistics) in zip(candidates, results):
+              statistics.result_cache += cache_statistics
+
+              if not _should_retry(result):
+                non_empty.append(query)
+
+            candidates = non_empty
+
+          found = candidates[:missing]
+
+          if options.unique:
+            seen.update(query.fingerprint for query in found)
+
+          statistics.attempts += missing
+          missing -= len(found)
+          progress.update(len(found))
+          yield from found
+
+        if missing and exhausted():
+          break
+
+        statistics.failed += missing
+        progress.update(missing)
+
+  @staticmethod
+  def _discard_duplicates(
+    queries: t.List[Query], seen: t.Set[int], statistics: GenerationStatistics
+  ) -> t.List[Query]:
+    """Drop queries whose fingerprint is in `seen` or repeats an earlier one of `queries`."""
+    fingerprints, unique_queries = set(), []
+
+    for query in queries:
+      if query.fingerprint in seen or query.fingerprint in fingerprints:
+        statistics.duplicates += 1
+      else:
+        fingerprints.add(query.fingerprint)
+        unique_queries.append(query)
+
+    return unique_queries
@@ -4,13 +4,25 @@ from dataclasses import dataclass
 from .operation import Operation
 
 
-@dataclass
+@dataclass(frozen=True)
 class GroupByAggregation(Operation):
+  """
+  Represents a group by aggregation operation in a query.
+
+  Attributes:
+    group_by_columns (List[str]): The columns to group by.
+    agg_function (str): The aggregation function applied to every group.
+    observed (bool): If True, only emit groups for observed values of categorical
+      columns instead of every combination of categories.
+  """
+
   group_by_columns: t.List[str]
   agg_function: str
+  observed: bool = False
 
   def apply(self, entity: str) -> str:
     group_cols = ', '.join(f"'{col}'" for col in self.group_by_columns)
+    observed = ', observed=True' if self.observed else ''
     numeric_only = 'numeric_only=True' if self.agg_function != 'count' else ''
     formatted_option = f', {numeric_only}' if numeric_only else ''
-    return f".groupby(by=[{group_cols}]).agg('{self.agg_function}'{formatted_option})"
+    return f".groupby(by=[{group_cols}]{observed}).agg('{self.agg_function}'{formatted_option})"
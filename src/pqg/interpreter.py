@@ -0,0 +1,170 @@
+import ast
+import operator
+import typing as t
+from functools import lru_cache
+
+import pandas as pd
+
+from .group_by_aggregation import GroupByAggregation
+from .merge import Merge
+from .projection import Projection
+from .query import Query
+from .result_cache import Result, ResultCache
+from .selection import Selection
+
+MAX_CACHED_LITERALS = 1 << 14
+
+COMPARISONS: t.Dict[str, t.Callable[[t.Any, t.Any], t.Any]] = {
+  '==': operator.eq,
+  '!=': operator.ne,
+  '<': operator.lt,
+  '<=': operator.le,
+  '>': operator.gt,
+  '>=': operator.ge,
+}
+
+
+def interpret(
+  query: Query, sample_data: t.Dict[str, pd.DataFrame], cache: t.Optional[ResultCache] = None
+) -> Result:
+  """
+  Execute a query by calling pandas directly on its operations.
+
+  The query is not rendered to code: every operation is mapped to the pandas
+  call its code would make, so neither `pd.eval` nor `eval` parse anything.
+  Only the literals of conditions and join keys, which operations hold as
+  code fragments, are converted to values, and those conversions are cached.
+
+  The result, or the type of the exception raised, equals the one of
+  evaluating the single-line code of the query with `pd.eval`. Conditions of a
+  selection are evaluated on the frame the selection applies to, which is the
+  entity the single-line code names since generated queries select first.
+
+  With a cache, execution starts from the result of the longest prefix of the
+  query found in the cache, and the results of the following operations are
+  added to it, see `ResultCache`. The result of the whole query is not added,
+  and is a copy if it is found in the cache, so results returned to callers
+  are never shared with the cache and can be modified.
+
+  Args:
+    query: Query to execute
+    sample_data: Dictionary mapping entity names to sample DataFrames
+    cache: Cache of intermediate results computed from `sample_data`, if any
+
+  Returns:
+    The result of the query
+
+  Raises:
+    Exception: Any exception pandas raises while executing the query.
+  """
+  if cache is None:
+    return _interpret(query, sample_data, None)
+
+  start, cached = cache.longest_prefix(query.prefix_fingerprints)
+
+  if cached is not None and start == len(query.operations):
+    return cached.copy()
+
+  return _interpret(query, sample_data, cache, start, cached, share_result=False)
+
+
+def _interpret(
+  query: Query,
+  sample_data: t.Dict[str, pd.DataFrame],
+  cache: t.Optional[ResultCache],
+  start: t.Optional[int] = None,
+  cached: t.Optional[Result] = None,
+  share_result: bool = True,
+) -> Result:
+  """
+  Execute the operations of a query after its longest cached prefix, see `interpret`.
+
+  Queries merged on the right are executed with `share_result`, so their
+  results are added to the cache and may be the cached objects, which is safe
+  since merges do not modify them. Otherwise, the result is never one the cache
+  holds.
+  """
+  if cache is not None and start is None:
+    start, cached = cache.longest_prefix(query.prefix_fingerprints)
+
+  start = start or 0
+
+  result: Result = sample_data[query.entity] if cached is None else cached
+
+  shared = cached
+
+  for i, op in enumerate(query.operations[start:], start):
+    match op:
+      case Selection(conditions):
+        if conditions:
+          result = result[_mask(result, conditions)]
+      case Projection(columns):
+        result = result[list(columns)]
+      case Merge(right, left_on, right_on):
+        result = result.merge(
+          _interpret(right, sample_data, cache),
+          left_on=_literal(left_on),
+          right_on=_literal(right_on),
+        )
+      case GroupByAggregation(group_by_columns, agg_function, observed):
+        grouped = (
+          result.groupby(by=list(group_by_columns), observed=True)
+          if observed
+          else result.groupby(by=list(group_by_columns))
+        )
+        result = (
+          grouped.agg(agg_function)
+          if agg_function == 'count'
+          else grouped.agg(agg_function, numeric_only=True)
+        )
+      case _:
+        raise ValueError('Unsupported operation type')
+
+    if cache is not None and (share_result or i < len(query.operations) - 1):
+      cache.put(query.prefix_fingerprints[i], result)
+      shared = result
+
+  # An empty selection as last operation passes on a result the cache may hold
+  if not share_result and shared is not None and result is shared:
+    return result.copy()
+
+  return result
+
+
+def _mask(df: Result, conditions: t.List[t.Tuple[str, str, t.Any, t.Optional[str]]]) -> t.Any:
+  """
+  Combine the conditions of a selection into a boolean mask.
+
+  As in Python and `pd.eval`, `&` binds tighter than `|`, so the conditions are
+  split into runs joined by `&`, and the runs are joined by `|`.
+  """
+  mask, run = None, None
+
+  for column, op, value, next_op in conditions:
+    series = df[_literal(column)]
+
+    if isinstance(value, str):
+      value = _literal(value)
+
+    if op == '.str.startswith':
+      term = series.str.startswith(value)
+    elif op == '.isin':
+      term = series.isin(value)
+    else:
+      term = COMPARISONS[op](series, value)
+
+    run = term if run is None else run & term
+
+    if next_op != '&':
+      mask, run = run if mask is None else mask | run, None
+
+  return mask
+
+
+@lru_cache(maxsize=MAX_CACHED_LITERALS)
+def _literal(code: str) -> t.Any:
+  """Convert a literal code fragment of an operation, possibly a `pd.Timestamp`, to a value."""
+  if code.startswith('pd.Timestamp(') and code.endswith(')'):
+    return pd.Timestamp(ast.literal_eval(code[len('pd.Timestamp(') : -1]))
+
+  return ast.literal_eval(code)
@@ -0,0 +1,150 @@
+import contextlib
+import os
+import signal
+import sys
+import typing as t
+from dataclasses import dataclass
+
+from .arguments import Arguments
+
+_violated = False
+
+
+class Timeout(Exception):
+  """Raised when a query runs longer than the timeout of its `QueryLimits`."""
+
+
+class MemoryLimit(Exception):
+  """Raised when a query allocates more memory than allowed by its `QueryLimits`."""
+
+
+@dataclass(frozen=True)
+class QueryLimits:
+  """
+  Limits enforced on every query executed by the worker processes of an `Executor`.
+
+  The timeout is enforced with a `SIGALRM` timer, which interrupts a query once
+  the operation it is running returns to Python. The memory limit caps the
+  address space a query may add to its worker with `RLIMIT_AS`, so allocations
+  beyond it fail. A query exceeding a limit fails with a `Timeout` or
+  `MemoryLimit` error, and the worker that ran it is replaced by a fresh process
+  once it has returned its results.
+
+  Timeouts need `SIGALRM`, so they are not supported on Windows. Memory limits
+  measure the address space of a worker from `/proc`, so they are only supported
+  on Linux. Limits the platform does not support raise a `ValueError`.
+
+  Attributes:
+    memory: Bytes of address space a query may allocate, or None for no limit
+    timeout: Seconds a query may run, or None for no limit
+
+  Example:
+    limits = QueryLimits(memory=1 << 30, timeout=5)
+    generator = Generator(schema, query_structure, query_limits=limits)
+  """
+
+  memory: t.Optional[int] = None
+  timeout: t.Optional[float] = None
+
+  def __post_init__(self) -> None:
+    if self.memory is not None and not sys.platform.startswith('linux'):
+      raise ValueError(f'Query memory limits are only supported on Linux, not {sys.platform}')
+
+    if self.timeout is not None and not hasattr(signal, 'setitimer'):
+      raise ValueError(f'Query timeouts are not supported on {sys.platform}')
+
+  def __bool__(self) -> bool:
+    return self.memory is not None or self.timeout is not None
+
+  @staticmethod
+  def from_args(arguments: Arguments) -> 'QueryLimits':
+    """
+    Create QueryLimits from command-line arguments.
+
+    Args:
+      arguments: Parsed command-line arguments
+
+    Returns:
+      QueryLimits configured according to provided arguments
+    """
+    return QueryLimits(
+      memory=(
+        arguments.query_memory_limit * 1024 * 1024
+        if arguments.query_memory_limit is not None
+        else None
+      ),
+      timeout=arguments.query_timeout,
+    )
+
+
+def violated() -> bool:
+  """Return True if a query of the current process exceeded its limits."""
+  return _violated
+
+
+@contextlib.contextmanager
+def enforce(limits: t.Optional[QueryLimits]) -> t.Iterator[None]:
+  """
+  Enforce query limits on the code run in the context, from the main thread.
+
+  Args:
+    limits: Limits to enforce, or None to enforce none
+
+  Raises:
+    Timeout: If the code runs longer than `limits.timeout`
+    MemoryLimit: If the code allocates more than `limits.memory`
+  """
+  if not limits:
+    yield
+    return
+
+  global _violated
+
+  def interrupt(*_: t.Any) -> None:
+    raise Timeout(f'Query exceeded {limits.timeout:g} seconds')
+
+  if limits.memory is not None:
+    import resource
+
+    previous = resource.getrlimit(resource.RLIMIT_AS)
+    soft = _address_space() + limits.memory
+
+    if previous[1] != resource.RLIM_INFINITY:
+      soft = min(soft, previous[1])
+
+    resource.setrlimit(resource.RLIMIT_AS, (soft, previous[1]))
+
+  if limits.timeout is not None:
+    handler = signal.signal(signal.SIGALRM, interrupt)
+
+  try:
+    if limits.timeout is not None:
+      signal.setitimer(signal.ITIMER_REAL, limits.timeout)
+
+    try:
+      yield
+    finally:
+      # Cancelled before anything else, so an alarm due until here is handled below
+      if limits.timeout is not None:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+  except Timeout:
+    _violated = True
+    raise
+  except MemoryError as e:
+    if limits.memory is None:
+      raise
+
+    _violated = True
+    raise MemoryLimit(f'Query exceeded {limits.memory // (1024 * 1024)} MB') from e
+  finally:
+    if limits.memory is not None:
+      resource.setrlimit(resource.RLIMIT_AS, previous)
+
+    if limits.timeout is not None:
+      signal.signal(signal.SIGALRM, handler)
+
+
+def _address_space() -> int:
+  """Return the size in bytes of the address space of the current process."""
+  with open('/proc/self/statm') as file:
+    return int(file.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
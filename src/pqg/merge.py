@@ -14,10 +14,10 @@ class Query(t.Protocol):
   def format_multi_line(self, start_counter: int = 1) -> t.Tuple[str, int]: ...
 
   @property
-  def merge_entities(self) -> t.Set[str]: ...
+  def merge_entities(self) -> t.AbstractSet[str]: ...
 
 
-@dataclass
+@dataclass(frozen=True)
 class Merge(Operation):
   right: Query
   left_on: str
@@ -0,0 +1,119 @@
+import math
+import queue
+import time
+import typing as t
+from multiprocessing.pool import Pool
+
+T = t.TypeVar('T')
+R = t.TypeVar('R')
+
+DEFAULT_BATCH_DURATION = 0.02
+
+
+def imap_batched(
+  pool: Pool,
+  function: t.Callable[[T], R],
+  items: t.Sequence[T],
+  processes: int,
+  batch_size: t.Optional[int] = None,
+  ordered: bool = True,
+  batch_duration: float = DEFAULT_BATCH_DURATION,
+) -> t.Iterator[t.Tuple[int, R]]:
+  """
+  Apply a function to items in a process pool, sending many items per task.
+
+  Items are submitted in batches, each a single round trip to a worker, which
+  matters when applying the function to one item takes less time than sending
+  it to a worker. Unless `batch_size` is given, the size of each batch adapts
+  to the measured cost per item so that a batch takes about `batch_duration`
+  seconds, but never exceeds the chunk size `Pool.map` would pick, so the work
+  stays balanced between workers until the end.
+
+  Batches complete in any order. Each result is tagged with the index of its
+  item, and when `ordered` is set, results are held in a reorder buffer until
+  all preceding results were yielded. At most two batches per process are in
+  flight at any time, which bounds the size of that buffer.
+
+  The function and its results are pickled with every batch, so the function
+  should be defined at module level and read large shared data from state a
+  pool initializer installed in each worker.
+
+  Args:
+    pool: Pool to run the batches in
+    function: Function applied to every item
+    items: Items to apply the function to
+    processes: Number of worker processes of the pool
+    batch_size: Fixed number of items per batch, or None to adapt it
+    ordered: If True, yield results in item order, otherwise as they complete
+    batch_duration: Targeted run time of an adaptive batch in seconds
+
+  Returns:
+    Iterator over (index, result) tuples
+
+  Raises:
+    ValueError: If `batch_size` is not positive.
+  """
+  if batch_size is not None and batch_size <= 0:
+    raise ValueError(f'Batch size must be positive, got {batch_size}')
+
+  completed: 'queue.SimpleQueue[t.Tuple[int, t.List[R], float] | BaseException]' = (
+    queue.SimpleQueue()
+  )
+
+  max_batch_size = max(1, math.ceil(len(items) / (4 * processes)))
+
+  max_in_flight, in_flight, submitted, cost = 2 * processes, 0, 0, None
+
+  buffer: t.Dict[int, t.List[R]] = {}
+
+  next_index = 0
+
+  while next_index < len(items):
+    while submitted < len(items) and in_flight < max_in_flight:
+      if batch_size is not None:
+        size = batch_size
+      elif cost is None:
+        size = 1
+      else:
+        size = min(max_batch_size, max(1, int(batch_duration / max(cost, 1e-9))))
+
+      pool.apply_async(
+        _run_batch,
+        (function, submitted, items[submitted : submitted + size]),
+        callback=completed.put,
+        error_callback=completed.put,
+      )
+
+      submitted, in_flight = submitted + size, in_flight + 1
+
+    result = completed.get()
+
+    if isinstance(result, BaseException):
+      raise result
+
+    start, results, elapsed = result
+
+    in_flight -= 1
+
+    cost = elapsed / len(results) if cost is None else (cost + elapsed / len(results)) / 2
+
+    if not ordered:
+      yield from enumerate(results, start)
+      next_index += len(results)
+      continue
+
+    buffer[start] = results
+
+    while next_index in buffer:
+      results = buffer.pop(next_index)
+      yield from enumerate(results, next_index)
+      next_index += len(results)
+
+
+def _run_batch(
+  function: t.Callable[[T], R], start: int, items: t.Sequence[T]
+) -> t.Tuple[int, t.List[R], float]:
+  """Apply a function to a batch of items in a worker, measuring how long it takes."""
+  begin = time.perf_counter()
+  results = [function(item) for item in items]
+  return start, results, time.perf_counter() - begin
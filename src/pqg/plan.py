@@ -0,0 +1,121 @@
+import typing as t
+from dataclasses import dataclass
+
+from .entity import Entity, Property
+
+if t.TYPE_CHECKING:
+  from .schema import Schema
+
+MAX_CACHED_MASKS = 1 << 16
+
+
+@dataclass(frozen=True)
+class EntityPlan:
+  """
+  The compiled form of an entity used during query generation.
+
+  Attributes:
+    entity: The entity
+    index: Position of the entity in the plan, its bit in entity masks
+    columns: Mask of the entity's columns
+    properties: Property of each column, keyed by column name
+    joins: Foreign keys as (local column bit, local column, foreign column, foreign table,
+      foreign entity bit), the foreign entity bit being 0 if the table is not in the plan
+    reach: Number of other entities reachable along foreign keys, the most merges a
+      query on the entity can contain
+  """
+
+  entity: Entity
+  index: int
+  columns: int
+  properties: t.Dict[str, Property]
+  joins: t.Tuple[t.Tuple[int, str, str, str, int], ...]
+  reach: int = 0
+
+
+class GenerationPlan:
+  """
+  A schema compiled for fast query generation.
+
+  Every column name used anywhere in the schema is assigned an integer id in
+  name order, so a set of columns is represented as an integer bitmask whose
+  set bits enumerate the names in sorted order. Unions, differences and
+  membership tests on columns become integer operations, and the sorted names
+  of a mask are computed once and then served from a bounded cache.
+
+  Entities are likewise numbered in name order, so the entities a query merges
+  are tracked as a bitmask too. Joins and reach are taken from the join graph
+  the schema indexes, see `Schema.references` and `Schema.reachable`.
+
+  Attributes:
+    column_names: All column names of the schema, sorted, indexed by column id
+    column_bits: Bit of each column name
+    entities: Compiled entities in name order
+    entity_plans: Compiled entities keyed by name
+  """
+
+  def __init__(self, schema: 'Schema'):
+    entities = schema.sorted_entities
+
+    self.column_names: t.Tuple[str, ...] = tuple(
+      sorted({column for entity in entities for column in entity.properties})
+    )
+
+    self.column_bits: t.Dict[str, int] = {
+      name: 1 << index for index, name in enumerate(self.column_names)
+    }
+
+    entity_bits = {entity.name: 1 << index for index, entity in enumerate(entities)}
+
+    self.entities: t.Tuple[EntityPlan, ...] = tuple(
+      EntityPlan(
+        entity=entity,
+        index=index,
+        columns=self.mask(entity.properties),
+        properties=dict(entity.properties),
+        joins=tuple(
+          (
+            self.column_bits.get(reference.local_column, 0),
+            reference.local_column,
+            reference.foreign_column,
+            reference.foreign_table,
+            entity_bits.get(reference.foreign_table, 0),
+          )
+          for reference in schema.references(entity.name)
+        ),
+        reach=len(schema.reachable(entity.name, len(entities))),
+      )
+      for index, entity in enumerate(entities)
+    )
+
+    self.entity_plans: t.Dict[str, EntityPlan] = {plan.entity.name: plan for plan in self.entities}
+
+    self._names: t.Dict[int, t.Tuple[str, ...]] = {}
+
+  def mask(self, columns: t.Iterable[str]) -> int:
+    """Return the mask of a collection of column names."""
+    mask = 0
+
+    for column in columns:
+      mask |= self.column_bits[column]
+
+    return mask
+
+  def names(self, mask: int) -> t.Tuple[str, ...]:
+    """Return the sorted column names of a mask."""
+    names = self._names.get(mask)
+
+    if names is None:
+      if len(self._names) >= MAX_CACHED_MASKS:
+        self._names.clear()
+
+      names, remaining = [], mask
+
+      while remaining:
+        lowest = remaining & -remaining
+        names.append(self.column_names[lowest.bit_length() - 1])
+        remaining ^= lowest
+
+      names = self._names[mask] = tuple(names)
+
+    return names
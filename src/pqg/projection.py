@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from .operation import Operation
 
 
-@dataclass
+@dataclass(frozen=True)
 class Projection(Operation):
   """
   Represents a projection operation in a query.
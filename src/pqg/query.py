@@ -1,4 +1,7 @@
+import hashlib
 import typing as t
+from dataclasses import dataclass
+from functools import cached_property
 
 from .group_by_aggregation import GroupByAggregation
 from .merge import Merge
@@ -7,6 +10,7 @@ from .projection import Projection
 from .selection import Selection
 
 
+@dataclass(frozen=True, eq=False)
 class Query:
   """
   Represents a complete database query with tracking for query complexity.
@@ -15,6 +19,11 @@ class Query:
   applied to that entity. Query complexity is determined primarily by the
   number of merge operations and their nesting depth.
 
+  Queries and their operations are frozen. Their code, complexity and merge
+  metadata are computed on first access and then cached, so sorting,
+  de-duplicating, saving or analyzing a pool renders every query only once.
+  The lists and sets a query is created with must not be modified afterwards.
+
   Attributes:
     entity (str): The name of the target entity.
     operations (List[Operation]): List of operations to apply.
@@ -22,42 +31,85 @@ class Query:
     columns (Set[str]): Columns available for operations.
   """
 
-  def __init__(
-    self,
-    entity: str,
-    operations: t.List[Operation],
-    multi_line: bool,
-    columns: t.Set[str],
-  ):
-    self.entity = entity
-    self.operations = operations
-    self.multi_line = multi_line
-    self.columns = columns
+  entity: str
+  operations: t.List[Operation]
+  multi_line: bool
+  columns: t.Set[str]
 
   def __str__(self) -> str:
-    return (
-      self.format_multi_line()[0]
-      if self.multi_line
-      else f'{self.entity}{''.join(op.apply(self.entity) for op in self.operations)}'
-    )
+    return self.multi_line_code if self.multi_line else self.code
+
+  @cached_property
+  def code(self) -> str:
+    """The query on a single line."""
+    return f'{self.entity}{''.join(self._operation_code)}'
+
+  @cached_property
+  def _operation_code(self) -> t.Tuple[str, ...]:
+    """The code of every operation of the query, in order."""
+    return tuple(op.apply(self.entity) for op in self.operations)
+
+  @cached_property
+  def multi_line_code(self) -> str:
+    """The query across multiple lines, see `format_multi_line`."""
+    return self.format_multi_line()[0]
+
+  @cached_property
+  def fingerprint(self) -> int:
+    """
+    A 64-bit fingerprint of the query, identical for queries with identical code.
+
+    The fingerprint is computed from the single-line form of the query, so it
+    does not depend on `multi_line`.
+
+    Returns:
+      int: The fingerprint
+    """
+    return int.from_bytes(hashlib.blake2b(self.code.encode(), digest_size=8).digest(), 'little')
+
+  @cached_property
+  def prefix_fingerprints(self) -> t.Tuple[int, ...]:
+    """
+    The fingerprints of the prefixes of the query, shortest first.
+
+    Fingerprint `i` identifies the entity and the first `i + 1` operations. It is
+    computed like `fingerprint`, from the single-line code of the prefix, so
+    queries starting with the same operations on the same entity share it and
+    the last one equals `fingerprint`.
+
+    Returns:
+      Tuple[int, ...]: One fingerprint per operation
+    """
+    digest, fingerprints = hashlib.blake2b(self.entity.encode(), digest_size=8), []
+
+    for code in self._operation_code:
+      digest.update(code.encode())
+      fingerprints.append(int.from_bytes(digest.digest(), 'little'))
+
+    return tuple(fingerprints)
+
+  @cached_property
+  def _key(self) -> t.Tuple[int, str]:
+    """The complexity and code the query is compared and hashed by."""
+    return self.complexity, str(self)
 
   def __hash__(self) -> int:
     """Hash based on complexity and string representation."""
-    return hash((self.complexity, str(self)))
+    return hash(self._key)
 
   def __eq__(self, other: object) -> bool:
     """Equality comparison based on complexity and string representation."""
     if not isinstance(other, Query):
       return NotImplemented
-    return (self.complexity, str(self)) == (other.complexity, str(other))
+    return self._key == other._key
 
   def __lt__(self, other: object) -> bool:
     """Less than comparison based on complexity and string representation."""
     if not isinstance(other, Query):
       return NotImplemented
-    return (self.complexity, str(self)) < (other.complexity, str(other))
+    return self._key < other._key
 
-  @property
+  @cached_property
   def complexity(self) -> int:
     """
     Calculate query complexity based on all operations and their details.
@@ -99,7 +151,7 @@ class Query:
 
     return base_complexity + operation_complexity
 
-  @property
+  @cached_property
   def merge_count(self) -> int:
     """
     Count the total number of merge operations in the query, including nested merges.
@@ -107,15 +159,10 @@ class Query:
     Returns:
       int: Total number of merge operations
     """
-    return sum(
-      1 + sum(1 for nested_op in op.right.operations if isinstance(nested_op, Merge))
-      if isinstance(op, Merge)
-      else 0
-      for op in self.operations
-    )
-
-  @property
-  def merge_entities(self) -> t.Set[str]:
+    return sum(1 + op.right.merge_count for op in self.operations if isinstance(op, Merge))
+
+  @cached_property
+  def merge_entities(self) -> t.FrozenSet[str]:
     """
     Get the set of all entities involved in this query, including
     the base entity and all merged entities.
@@ -131,7 +178,7 @@ class Query:
     - Invalid join paths
 
     Returns:
-      Set[str]:
+      FrozenSet[str]:
         A set of entity names (table names) that are part of this query's join graph.
         Includes both the base entity and all merged entities.
     """
@@ -141,7 +188,7 @@ class Query:
       if isinstance(op, Merge):
         merged.update(op.entities)
 
-    return merged
+    return frozenset(merged)
 
   def format_multi_line(self, start_counter: int = 1) -> t.Tuple[str, int]:
     """
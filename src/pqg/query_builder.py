@@ -1,15 +1,27 @@
 import random
 import typing as t
+from datetime import date
 
+from .column_statistics import StatisticsCatalog, target_selectivity
 from .entity import Entity, PropertyDate, PropertyEnum, PropertyFloat, PropertyInt, PropertyString
 from .group_by_aggregation import GroupByAggregation
 from .merge import Merge
 from .operation import Operation
+from .plan import EntityPlan, GenerationPlan
 from .projection import Projection
 from .query import Query
 from .query_structure import QueryStructure
 from .schema import Schema
 from .selection import Selection
+from .stratification import QueryShape
+
+Condition = t.Tuple[str, str, t.Any, t.Optional[str]]
+
+CONNECTIVES = ('&', '|')
+COMPARISONS = ('==', '!=', '<', '<=', '>', '>=')
+STRING_OPERATORS = ('==', '!=', '.str.startswith')
+ENUM_OPERATORS = ('==', '!=', '.isin')
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'count')
 
 
 class QueryBuilder:
@@ -27,21 +39,63 @@ class QueryBuilder:
     operations (List[Operation]): List of operations to be applied in the query.
     entity_name (str): Name of the current entity being queried.
     entity (Entity): The current entity's schema definition.
-    current_columns (Set[str]): Set of columns currently available for operations.
-    required_columns (Set[str]): Columns that must be preserved (e.g., join keys).
+    plan (GenerationPlan): The schema compiled for query generation.
+    entity_plan (EntityPlan): The current entity's compiled definition.
+    columns (int): Mask of the columns currently available for operations.
+    required_columns (int): Mask of the columns that must be preserved (e.g., join keys).
+    merge_entities (int): Mask of the entities merged into the query so far.
+    typed_sample_data (bool): Whether queries run against sample data with compact dtypes.
+    rng (random.Random): Source of randomness, the global `random` module by default.
+    statistics (StatisticsCatalog): Statistics of the sample data, used to choose
+      selection constants when the query structure sets a selectivity range.
+    shape (QueryShape): Operations the query must contain, or None to draw them
+      with the probabilities of the query structure.
+
+  Entities and columns are always drawn in name order, so a builder seeded with
+  the same random generator produces the same query in every process.
+
+  Columns and entities are tracked as bitmasks of the schema's generation plan,
+  see `GenerationPlan`, so the bookkeeping done between random draws is integer
+  arithmetic rather than set construction and sorting.
   """
 
-  def __init__(self, schema: Schema, query_structure: QueryStructure, multi_line: bool):
+  def __init__(
+    self,
+    schema: Schema,
+    query_structure: QueryStructure,
+    multi_line: bool,
+    typed_sample_data: bool = False,
+    rng: t.Optional[random.Random] = None,
+    statistics: t.Optional[StatisticsCatalog] = None,
+    shape: t.Optional[QueryShape] = None,
+  ):
     self.schema: Schema = schema
     self.query_structure: QueryStructure = query_structure
     self.multi_line: bool = multi_line
-    self.entity: Entity = random.choice(list(self.schema.entities))
-    self.columns: t.Set[str] = set(self.entity.properties.keys())
-    self.required_columns: t.Set[str] = set()
-    self.merge_entities: t.Set[str] = {self.entity.name}
+    self.typed_sample_data: bool = typed_sample_data
+    self.rng: random.Random = rng or t.cast(random.Random, random)
+    self.statistics: t.Optional[StatisticsCatalog] = statistics
+    self.plan: GenerationPlan = schema.plan
+    self.shape = shape
+    self._use_entity(
+      self.rng.choice(
+        self.plan.entities
+        if shape is None or not shape.merges
+        else [entity for entity in self.plan.entities if entity.reach >= shape.merges]
+        or self.plan.entities
+      )
+    )
+    self.required_columns: int = 0
     self.max_merges = self.query_structure.max_merges
     self.operations: t.List[Operation] = []
 
+  def _use_entity(self, entity_plan: EntityPlan) -> None:
+    """Make an entity the base of the query, with all of its columns available."""
+    self.entity_plan = entity_plan
+    self.entity: Entity = entity_plan.entity
+    self.columns: int = entity_plan.columns
+    self.merge_entities: int = 1 << entity_plan.index
+
   def build(self) -> Query:
     """
     Build a complete query by randomly combining different operations.
@@ -55,39 +109,65 @@ class QueryBuilder:
     Each operation is validated to ensure it uses only available columns
     and maintains referential integrity.
 
+    With a shape, the query contains exactly the operations of the shape
+    instead, and its merges are chosen so that the query contains the number of
+    merges of the shape whenever the joins of its entity allow it.
+
     Returns:
       Query: A complete, valid query object with all generated operations.
     """
+    shape = self.shape
+
     if (
       self.columns
       and self.query_structure.max_selection_conditions > 0
-      and random.random() < self.query_structure.selection_probability
+      and (
+        self.rng.random() < self.query_structure.selection_probability
+        if shape is None
+        else shape.selection
+      )
     ):
       self.operations.append(self._generate_selection())
 
     if (
       self.columns
       and self.query_structure.max_projection_columns > 0
-      and random.random() < self.query_structure.projection_probability
+      and (
+        self.rng.random() < self.query_structure.projection_probability
+        if shape is None
+        else shape.projection
+      )
     ):
+      if shape is not None and shape.merges:
+        self.required_columns |= self._reserve_joins(shape.merges)
+
       self.operations.append(self._generate_projection())
 
-    num_merges = random.randint(0, self.max_merges)
+    if shape is None:
+      num_merges = self.rng.randint(0, self.max_merges)
 
-    for _ in range(num_merges):
-      try:
-        self.operations.append(self._generate_merge(num_merges))
-      except ValueError:
-        break
+      for _ in range(num_merges):
+        try:
+          self.operations.append(self._generate_merge(num_merges))
+        except ValueError:
+          break
+    else:
+      self._generate_merges(shape.merges)
 
     if (
       self.columns
       and self.query_structure.max_groupby_columns > 0
-      and random.random() < self.query_structure.groupby_aggregation_probability
+      and (
+        self.rng.random() < self.query_structure.groupby_aggregation_probability
+        if shape is None
+        else shape.group_by
+      )
     ):
       self.operations.append(self._generate_group_by_aggregation())
 
-    return Query(self.entity.name, self.operations, self.multi_line, self.columns)
+    return Query(
+      self.entity.name, self.operations, self.multi_line, set(self.plan.names(self.columns))
+    )
 
   def _generate_selection(self) -> Operation:
     """
@@ -97,64 +177,165 @@ class QueryBuilder:
     - Numeric columns: Comparison operators (==, !=, <, <=, >, >=)
     - String columns: Equality, inequality, and string operations
     - Enum columns: Value matching and set membership tests
-    - Date columns: Date comparison operations
+    - Date columns: Date comparison operations, against `pd.Timestamp` literals
+      when the sample data stores dates as datetimes
 
     Conditions are combined using AND (&) or OR (|) operators. The number
     of conditions is bounded by max_selection_conditions configuration.
 
+    If the query structure sets a selectivity range and statistics of the
+    sample data are available, constants are chosen so that each condition on
+    its own selects a fraction of rows within that range, see
+    `_guided_constant`.
+
     Returns:
       Operation: A Selection operation with the generated conditions.
     """
-    num_conditions = random.randint(
-      1, min(self.query_structure.max_selection_conditions, len(self.columns))
+    available_columns = self.plan.names(self.columns)
+
+    num_conditions = self.rng.randint(
+      1, min(self.query_structure.max_selection_conditions, len(available_columns))
     )
 
-    conditions, available_columns = [], list(self.columns)
+    conditions: t.List[Condition] = []
 
     for i in range(num_conditions):
-      column = random.choice(available_columns)
+      column = self.rng.choice(available_columns)
 
       property, next_op = (
-        self.entity.properties[column],
-        random.choice(['&', '|']) if i < num_conditions - 1 else None,
+        self.entity_plan.properties[column],
+        self.rng.choice(CONNECTIVES) if i < num_conditions - 1 else None,
       )
 
-      match property:
-        case PropertyInt(minimum, maximum) | PropertyFloat(minimum, maximum):
-          op = random.choice(['==', '!=', '<', '<=', '>', '>='])
-          value = random.uniform(minimum, maximum)
-          if isinstance(property, PropertyInt):
-            value = int(value)
-          conditions.append((f"'{column}'", op, value, next_op))
-        case PropertyString(starting_character):
-          op = random.choice(['==', '!=', '.str.startswith'])
-          value = random.choice(starting_character)
-          quoted_value = f"'{value}'" if "'" not in value else f'"{value}"'
-          conditions.append((f"'{column}'", op, quoted_value, next_op))
-        case PropertyEnum(values):
-          op = random.choice(['==', '!=', '.isin'])
-          if op == '.isin':
-            selected_values = random.sample(values, random.randint(1, len(values)))
-            quoted_values = [f"'{v}'" if "'" not in v else f'"{v}"' for v in selected_values]
-            value = f"[{', '.join(quoted_values)}]"
-          else:
-            value = random.choice(values)
-            value = f"'{value}'" if "'" not in value else f'"{value}"'
-          conditions.append((f"'{column}'", op, value, next_op))
-        case PropertyDate(minimum, maximum):
-          op = random.choice(['==', '!=', '<', '<=', '>', '>='])
-          value = f"'{random.choice([minimum, maximum]).isoformat()}'"
-          conditions.append((f"'{column}'", op, value, next_op))
+      conditions.append(self._CONDITIONS[type(property)](self, column, property, next_op))
 
     return Selection(conditions)
 
+  def _numeric_condition(
+    self, column: str, property: PropertyInt | PropertyFloat, next_op: t.Optional[str]
+  ) -> Condition:
+    """Generate a comparison of a numeric column with a constant."""
+    op = self.rng.choice(COMPARISONS)
+    value = self._guided_constant(column, op)
+    if value is None:
+      value = self.rng.uniform(property.min, property.max)
+    if isinstance(property, PropertyInt):
+      value = int(value)
+    return (f"'{column}'", op, value, next_op)
+
+  def _string_condition(
+    self, column: str, property: PropertyString, next_op: t.Optional[str]
+  ) -> Condition:
+    """Generate an equality or prefix test of a string column."""
+    starting_character = property.starting_character
+    op = self.rng.choice(STRING_OPERATORS)
+    value = self._guided_constant(column, op)
+    if op == '.str.startswith' and value is not None:
+      prefixes = [prefix for prefix in starting_character if str(value).startswith(prefix)]
+      value = max(prefixes, key=len) if prefixes else None
+    if value is None:
+      value = self.rng.choice(starting_character)
+    quoted_value = f"'{value}'" if "'" not in value else f'"{value}"'
+    return (f"'{column}'", op, quoted_value, next_op)
+
+  def _enum_condition(
+    self, column: str, property: PropertyEnum, next_op: t.Optional[str]
+  ) -> Condition:
+    """Generate an equality or membership test of an enum column."""
+    values = property.values
+    op = self.rng.choice(ENUM_OPERATORS)
+    guided = self._guided_constant(column, op)
+    if op == '.isin':
+      selected_values = guided or self.rng.sample(values, self.rng.randint(1, len(values)))
+      quoted_values = [f"'{v}'" if "'" not in v else f'"{v}"' for v in selected_values]
+      value = f"[{', '.join(quoted_values)}]"
+    else:
+      value = guided if guided is not None else self.rng.choice(values)
+      value = f"'{value}'" if "'" not in value else f'"{value}"'
+    return (f"'{column}'", op, value, next_op)
+
+  def _date_condition(
+    self, column: str, property: PropertyDate, next_op: t.Optional[str]
+  ) -> Condition:
+    """Generate a comparison of a date column with a date literal."""
+    op = self.rng.choice(COMPARISONS)
+    guided = self._guided_constant(column, op)
+    selected_date = (
+      date.fromisoformat(str(guided)[:10])
+      if guided is not None
+      else self.rng.choice((property.min, property.max))
+    )
+    value = f"'{selected_date.isoformat()}'"
+    if self.typed_sample_data:
+      value = f'pd.Timestamp({value})'
+    return (f"'{column}'", op, value, next_op)
+
+  _CONDITIONS: t.Dict[type, t.Callable[..., Condition]] = {
+    PropertyInt: _numeric_condition,
+    PropertyFloat: _numeric_condition,
+    PropertyString: _string_condition,
+    PropertyEnum: _enum_condition,
+    PropertyDate: _date_condition,
+  }
+
+  def _guided_constant(self, column: str, op: str) -> t.Optional[t.Any]:
+    """
+    Choose a constant for a condition on a column of the current entity from statistics
+    of the sample data.
+
+    Range comparisons use the quantile matching a selectivity drawn from the
+    configured range. Equality and membership tests use most common values whose
+    frequency falls in the range, and otherwise fall back to any value present in
+    the sample data so the condition matches at least one row. Prefix tests get a
+    value present in the sample data, whose prefix the caller extracts.
+
+    Selectivities apply to each condition on its own, conditions combined with
+    `&` and `|` select correspondingly fewer or more rows.
+
+    Args:
+      column: The column the condition applies to
+      op: The comparison operator or method of the condition
+
+    Returns:
+      The constant, a list of constants for `.isin`, or None if the constant should
+      be drawn from the schema instead
+    """
+    if self.statistics is None or self.query_structure.selectivity is None:
+      return None
+
+    statistics = self.statistics.get(self.entity.name, column)
+
+    if statistics is None:
+      return None
+
+    minimum, maximum = self.query_structure.selectivity
+
+    match op:
+      case '<' | '<=':
+        return statistics.quantile(target_selectivity(self.rng, (minimum, maximum)))
+      case '>' | '>=':
+        return statistics.quantile(1 - target_selectivity(self.rng, (minimum, maximum)))
+      case '.str.startswith':
+        return statistics.quantile(self.rng.random())
+      case '==':
+        value = statistics.value_with_frequency(self.rng, minimum, maximum)
+      case '!=':
+        value = statistics.value_with_frequency(self.rng, 1 - maximum, 1 - minimum)
+      case '.isin':
+        return statistics.values_with_frequency(self.rng, minimum, maximum)
+      case _:
+        return None
+
+    return value if value is not None else statistics.quantile(self.rng.random())
+
   def _generate_projection(self) -> Operation:
     """
     Generate a SELECT clause for choosing columns.
 
     Randomly selects a subset of available columns while ensuring that
     required columns (like join keys) are always included. The number
-    of selected columns is bounded by max_projection_columns configuration.
+    of selected columns, required ones included, is bounded by
+    max_projection_columns configuration.
 
     The operation updates the available columns for subsequent operations
     while maintaining required columns for joins and other operations.
@@ -162,22 +343,80 @@ class QueryBuilder:
     Returns:
       Operation: A Projection operation with the selected columns.
     """
-    available_for_projection = self.columns - self.required_columns
+    available_for_projection = self.columns & ~self.required_columns
 
     if not available_for_projection:
-      return Projection(list(self.columns))
+      return Projection(list(self.plan.names(self.columns)))
 
-    to_project = random.randint(
-      1, min(self.query_structure.max_projection_columns, len(available_for_projection))
-    )
+    # Required columns count against the limit, so they are kept instead of drawn columns
+    room = self.query_structure.max_projection_columns - self.required_columns.bit_count()
+
+    if room < 1:
+      self.columns = self.required_columns
+      return Projection(list(self.plan.names(self.columns)))
 
-    columns = set(random.sample(list(available_for_projection), to_project)) | self.required_columns
+    to_project = self.rng.randint(1, min(room, available_for_projection.bit_count()))
+
+    columns = (
+      self.plan.mask(self.rng.sample(self.plan.names(available_for_projection), to_project))
+      | self.required_columns
+    )
 
     self.columns = columns
 
-    return Projection(list(columns))
+    return Projection(list(self.plan.names(columns)))
+
+  def _reserve_joins(self, merges: int) -> int:
+    """
+    Choose the join columns a projection must keep for the query to reach `merges` merges.
+
+    Joins are drawn at random until the merges they can hold, one for the join
+    and the reach of its table for the right query, add up to `merges`, so the
+    projection keeps only the join columns that the merges of the shape need.
+
+    Returns:
+      int: The mask of the local columns of the chosen joins.
+    """
+    joins = [
+      (local_bit, foreign_table)
+      for local_bit, _, _, foreign_table, foreign_bit in self.entity_plan.joins
+      if local_bit & self.columns and not foreign_bit & self.merge_entities
+    ]
+
+    reserved, tables = 0, set()
+
+    for local_bit, foreign_table in self.rng.sample(joins, len(joins)):
+      if merges <= 0:
+        break
 
-  def _generate_merge(self, num_merges: int) -> Operation:
+      reserved |= local_bit
+
+      if foreign_table not in tables:
+        tables.add(foreign_table)
+        merges -= 1 + self.plan.entity_plans[foreign_table].reach
+
+    return reserved
+
+  def _generate_merges(self, count: int) -> None:
+    """
+    Add merges until the query contains `count` of them, including nested ones.
+
+    Every merge is given a share of the remaining merges for its right query to
+    contain, all of them if no other join is left to place them, and merges
+    stop early only when no join is left.
+    """
+    remaining = count
+
+    while remaining > 0:
+      try:
+        merge = self._generate_merge(count, remaining)
+      except ValueError:
+        break
+
+      self.operations.append(merge)
+      remaining -= 1 + merge.right.merge_count
+
+  def _generate_merge(self, num_merges: int, remaining: t.Optional[int] = None) -> Merge:
     """
     Generate a JOIN operation with another table.
 
@@ -192,43 +431,76 @@ class QueryBuilder:
     3. Creates a new query for the right side
     4. Ensures join columns are preserved
 
+    Args:
+      num_merges: Number of merges drawn for the query.
+      remaining: Number of merges the query still needs when building to a
+        shape, the right query then containing up to `remaining - 1` merges.
+
     Returns:
-      Operation: A Merge operation with the join conditions.
+      Merge: A Merge operation with the join conditions.
 
     Raises:
       ValueError: If no valid join relationships are available.
     """
 
-    possible_right_entities = []
-
-    for local_col, [foreign_col, foreign_table] in self.entity.foreign_keys.items():
-      if local_col in self.columns and foreign_table not in self.merge_entities:
-        possible_right_entities.append((local_col, foreign_col, foreign_table))
+    possible_right_entities = [
+      (local_column, foreign_column, foreign_table)
+      for local_bit, local_column, foreign_column, foreign_table, foreign_bit in (
+        self.entity_plan.joins
+      )
+      if local_bit & self.columns and not foreign_bit & self.merge_entities
+    ]
 
     if not possible_right_entities:
       raise ValueError('No valid entities for merge')
 
-    left_on, right_on, right_entity_name = random.choice(possible_right_entities)
+    left_on, right_on, right_entity_name = self.rng.choice(possible_right_entities)
+
+    right_shape = None
+
+    if remaining is not None:
+      # Leave the right query enough merges for the other joins to place the rest
+      others = sum(
+        1 + self.plan.entity_plans[table].reach
+        for table in {table for *_, table in possible_right_entities} - {right_entity_name}
+      )
+
+      most = min(remaining - 1, self.plan.entity_plans[right_entity_name].reach)
+
+      right_shape = QueryShape(
+        selection=self.rng.random() < self.query_structure.selection_probability,
+        projection=self.rng.random() < self.query_structure.projection_probability,
+        group_by=False,
+        merges=self.rng.randint(min(max(remaining - 1 - others, 0), most), most),
+      )
 
     right_query_structure = QueryStructure(
       groupby_aggregation_probability=0,
       max_groupby_columns=0,
-      max_merges=self.max_merges - num_merges,
+      max_merges=self.max_merges - num_merges if right_shape is None else right_shape.merges,
       max_projection_columns=self.query_structure.max_projection_columns,
       max_selection_conditions=self.query_structure.max_selection_conditions,
       projection_probability=self.query_structure.projection_probability,
       selection_probability=self.query_structure.selection_probability,
+      selectivity=self.query_structure.selectivity,
     )
 
-    right_builder = QueryBuilder(self.schema, right_query_structure, self.multi_line)
-    right_builder.entity = self.schema[right_entity_name]
-    right_builder.columns = set(right_builder.entity.properties.keys())
-    right_builder.required_columns.add(right_on)
+    right_builder = QueryBuilder(
+      self.schema,
+      right_query_structure,
+      self.multi_line,
+      self.typed_sample_data,
+      self.rng,
+      self.statistics,
+      right_shape,
+    )
+    right_builder._use_entity(self.plan.entity_plans[right_entity_name])
+    right_builder.required_columns |= self.plan.column_bits[right_on]
 
     right_query = right_builder.build()
 
-    self.columns = self.columns.union(right_query.columns)
-    self.merge_entities = self.merge_entities.union(right_query.merge_entities)
+    self.columns |= right_builder.columns
+    self.merge_entities |= right_builder.merge_entities
     self.max_merges = self.max_merges - right_query.merge_count
 
     def format_join_columns(columns: str | t.List[str]) -> str:
@@ -252,6 +524,7 @@ class QueryBuilder:
     1. Randomly selects columns to group by
     2. Chooses an aggregation function (mean, sum, min, max, count)
     3. Ensures numeric_only parameter is set appropriately
+    4. Only keeps observed groups when enums are categorical in typed sample data
 
     The number of grouping columns is bounded by max_groupby_columns
     configuration and available columns.
@@ -260,11 +533,13 @@ class QueryBuilder:
       Operation: A GroupByAggregation operation with the grouping
       configuration.
     """
-    group_columns = random.sample(
-      list(self.columns),
-      random.randint(1, min(self.query_structure.max_groupby_columns, len(self.columns))),
+    available_columns = self.plan.names(self.columns)
+
+    group_columns = self.rng.sample(
+      available_columns,
+      self.rng.randint(1, min(self.query_structure.max_groupby_columns, len(available_columns))),
     )
 
-    agg_function = random.choice(['mean', 'sum', 'min', 'max', 'count'])
+    agg_function = self.rng.choice(AGGREGATIONS)
 
-    return GroupByAggregation(group_columns, agg_function)
+    return GroupByAggregation(group_columns, agg_function, observed=self.typed_sample_data)
@@ -1,23 +1,106 @@
-import multiprocessing as mp
+import dataclasses
 import os
 import statistics as stats
+import time
 import typing as t
 from collections import Counter
+from contextlib import closing
 from dataclasses import dataclass, field
 from functools import partial
 
 import pandas as pd
 from tqdm import tqdm
 
+from .aio import ProgressCallback, aiterate
 from .arguments import QueryFilter
+from .executor import Executor, worker_query_limits, worker_result_cache
 from .group_by_aggregation import GroupByAggregation
+from .interpreter import interpret
+from .limits import QueryLimits, enforce
 from .merge import Merge
 from .projection import Projection
 from .query import Query
 from .query_structure import QueryStructure
+from .result_cache import ResultCache, ResultCacheStatistics
+from .result_summary import ResultSummary
+from .schema import Schema
 from .selection import Selection
 
-QueryResult = t.Tuple[t.Optional[t.Union[pd.DataFrame, pd.Series]], t.Optional[str]]
+QueryResult = t.Tuple[t.Optional[t.Union[pd.DataFrame, pd.Series, ResultSummary]], t.Optional[str]]
+
+
+def _execute_query(
+  _: t.Optional[Schema],
+  sample_data: t.Dict[str, pd.DataFrame],
+  query: Query,
+  result_cache: t.Optional[ResultCache] = None,
+  summarize: bool = False,
+) -> t.Tuple[QueryResult, ResultCacheStatistics]:
+  """
+  Execute a query in a worker of an `Executor`, with the worker's result cache.
+
+  Outside of workers, the query is executed with `result_cache`, if any. The
+  cache statistics of the execution are returned with its result, so they can be
+  added up across workers. With `summarize`, the result is replaced by its
+  `ResultSummary` before it is returned.
+  """
+  cache = result_cache if result_cache is not None else worker_result_cache()
+
+  before = dataclasses.replace(cache.statistics) if cache is not None else None
+
+  start = time.perf_counter()
+
+  result, error = QueryPool._execute_single_query(query, sample_data, cache)
+
+  if summarize:
+    result = ResultSummary.from_result(result, error, time.perf_counter() - start)
+
+  if cache is None:
+    return (result, error), ResultCacheStatistics()
+
+  return (result, error), cache.statistics - before
+
+
+def _is_empty(
+  result: t.Optional[t.Union[pd.DataFrame, pd.Series, ResultSummary]],
+) -> t.Optional[bool]:
+  """Return whether a result, or the result a summary describes, is empty, None without one."""
+  match result:
+    case pd.DataFrame():
+      return result.empty
+    case pd.Series():
+      return result.size == 0
+    case ResultSummary(error=None):
+      return result.empty
+
+  return None
+
+
+def write_queries(queries: t.Iterable[Query], file: t.TextIO) -> int:
+  """
+  Write queries to a text file as they are consumed, separated by blank lines.
+
+  Whitespace around each query is trimmed and empty queries are skipped, so
+  the output is that of `QueryPool.save`, whether the queries come from a pool
+  or are streamed from `Generator.iter_queries`.
+
+  Args:
+    queries: Queries to write
+    file: Text file to write to
+
+  Returns:
+    int: The number of queries written
+  """
+  count = 0
+
+  for query in queries:
+    code = str(query).strip()
+
+    if code:
+      file.write(f'\n\n{code}' if count else code)
+      count += 1
+
+  return count
 
 
 @dataclass
@@ -74,6 +157,62 @@ class ExecutionStatistics:
     return '\n'.join(lines)
 
 
+@dataclass
+class GenerationStatistics:
+  """
+  Statistics about the attempts made to generate queries with non-empty results
+  or without duplicates.
+
+  Attributes:
+    requested (int): Number of queries requested
+    attempts (int): Number of attempts made, each building one or more candidates
+    failed (int): Number of requested queries that were not generated
+    budget_exhausted (bool): Whether the total attempt budget ran out
+    duplicates (int): Number of generated queries discarded as duplicates of
+      earlier ones
+    result_cache (ResultCacheStatistics): Intermediate results reused while
+      executing candidates to check that their results are non-empty
+  """
+
+  requested: int = 0
+  attempts: int = 0
+  failed: int = 0
+  budget_exhausted: bool = False
+  duplicates: int = 0
+  result_cache: ResultCacheStatistics = field(default_factory=ResultCacheStatistics)
+
+  def __str__(self) -> str:
+    if self.requested == 0:
+      return ''
+
+    generated = self.requested - self.failed
+
+    lines = [
+      f'Generation Results (n = {self.requested}):',
+      f'  Attempts per Query: {self.attempts / max(generated, 1):.1f}',
+      f'  Failed: {self.failed / self.requested * 100:4.1f}% ({self.failed} / {self.requested})',
+    ]
+
+    if self.duplicates:
+      candidates = generated + self.duplicates
+      lines.append(
+        f'  Duplicates: {self.duplicates / candidates * 100:4.1f}% '
+        f'({self.duplicates} / {candidates})'
+      )
+
+    if operations := self.result_cache.hits + self.result_cache.misses:
+      lines.append(
+        f'  Result Cache Hit Rate: {self.result_cache.hit_rate * 100:4.1f}% '
+        f'({self.result_cache.hits} / {operations} operations, '
+        f'{self.result_cache.evictions} evictions)'
+      )
+
+    if self.budget_exhausted:
+      lines.append('  Total attempt budget exhausted')
+
+    return '\n'.join(lines)
+
+
 @dataclass
 class QueryStatistics:
   """
@@ -94,6 +233,9 @@ class QueryStatistics:
     groupby_columns: List of column counts from each groupby operation
     merge_count: List of merge counts from each query
     execution_results: Statistics about query execution outcomes
+    generation_results: Statistics about attempts to generate non-empty or unique
+      queries, if any
+    result_cache: Intermediate results reused while executing the queries
   """
 
   query_structure: QueryStructure
@@ -107,6 +249,8 @@ class QueryStatistics:
   groupby_columns: t.List[int] = field(default_factory=list)
   merge_count: t.List[int] = field(default_factory=list)
   execution_results: ExecutionStatistics = field(default_factory=ExecutionStatistics)
+  generation_results: t.Optional[GenerationStatistics] = None
+  result_cache: ResultCacheStatistics = field(default_factory=ResultCacheStatistics)
 
   @staticmethod
   def _safe_stats(values: t.List[int]) -> tuple[float, float, int]:
@@ -170,8 +314,14 @@ class QueryStatistics:
         mean, std, max_val = self._safe_stats(data)
         lines.append(self._format_count(label, mean, std, max_val, limit))
 
+    if self.generation_results is not None:
+      lines.extend(['', str(self.generation_results)])
+
     lines.extend(['', str(self.execution_results)])
 
+    if self.result_cache.hits + self.result_cache.misses:
+      lines.extend(['', str(self.result_cache)])
+
     return '\n'.join(lines)
 
 
@@ -187,8 +337,25 @@ class QueryPool:
     _queries: List of Query objects in the pool
     _query_structure: Parameters controlling query generation
     _sample_data: Dictionary mapping entity names to sample DataFrames
-    _results: Cached query execution results (DataFrame/Series, error message)
+    _results: Cached query execution results (DataFrame/Series or its
+      ResultSummary, error message)
     _with_status: Whether to display progress bars during operations
+    _batch_size: Queries sent to a worker per task, or None to adapt it to their cost
+    _executor: Worker processes executing queries in parallel, shared with the
+      generator that created the pool or started by the pool on first use
+    _generation_statistics: Attempts made to generate the queries, if they were
+      required to produce non-empty results
+    _result_cache: Cache of intermediate results used when executing sequentially,
+      shared with the generator that created the pool
+    _result_cache_statistics: Intermediate results reused by all executions of
+      the pool, sequential or in parallel
+    _query_limits: Limits enforced on queries executed by the worker processes
+      the pool starts, if any
+    _summarize: Whether to keep a `ResultSummary` of every result instead of
+      the result, which workers then do not send back
+
+  A pool that starts its own worker processes keeps them for later executions
+  until it is closed, either explicitly or by using it as a context manager.
   """
 
   def __init__(
@@ -198,6 +365,12 @@ class QueryPool:
     sample_data: t.Dict[str, pd.DataFrame],
     multi_processing: bool = True,
     with_status: bool = False,
+    batch_size: t.Optional[int] = None,
+    executor: t.Optional[Executor] = None,
+    generation_statistics: t.Optional[GenerationStatistics] = None,
+    result_cache: t.Optional[ResultCache] = None,
+    query_limits: t.Optional[QueryLimits] = None,
+    summarize: bool = False,
   ):
     self._queries = queries
     self._query_structure = query_structure
@@ -205,6 +378,25 @@ class QueryPool:
     self._results: t.List[QueryResult] = []
     self._multi_processing = multi_processing
     self._with_status = with_status
+    self._batch_size = batch_size
+    self._executor = executor
+    self._owns_executor = executor is None
+    self._generation_statistics = generation_statistics
+    self._result_cache = result_cache if result_cache is not None else ResultCache()
+    self._result_cache_statistics = ResultCacheStatistics()
+    self._query_limits = query_limits
+    self._summarize = summarize
+
+  def __enter__(self) -> 'QueryPool':
+    return self
+
+  def __exit__(self, *_: t.Any) -> None:
+    self.close()
+
+  def close(self) -> None:
+    """Stop the worker processes started by the pool, if any."""
+    if self._owns_executor and self._executor is not None:
+      self._executor.close()
 
   def __len__(self) -> int:
     """Return the number of queries in the pool."""
@@ -223,7 +415,7 @@ class QueryPool:
       local_vars = sample_data.copy()
       for line in str(query).split('\n'):
         df_name, expression = line.split(' = ', 1)
-        result = eval(expression, {}, local_vars)
+        result = eval(expression, {'pd': pd}, local_vars)
         local_vars[df_name] = result
       last_df = max(k for k in local_vars.keys() if k.startswith('df'))
       return local_vars[last_df], None
@@ -231,12 +423,36 @@ class QueryPool:
       return None, f'{type(e).__name__}: {str(e)}'
 
   @staticmethod
-  def _execute_single_query(query: Query, sample_data: t.Dict[str, pd.DataFrame]) -> QueryResult:
-    """Execute a single query and handle any errors."""
+  def _execute_single_query(
+    query: Query,
+    sample_data: t.Dict[str, pd.DataFrame],
+    result_cache: t.Optional[ResultCache] = None,
+  ) -> QueryResult:
+    """
+    Execute a single query with `interpret` and handle any errors.
+
+    In the worker processes of an `Executor`, the query is held to the worker's
+    `QueryLimits`, and exceeding them is reported as a `Timeout` or
+    `MemoryLimit` error.
+    """
+    try:
+      with enforce(worker_query_limits()):
+        return interpret(query, sample_data, result_cache), None
+    except Exception as e:
+      return None, f'{type(e).__name__}: {str(e)}'
+
+  @staticmethod
+  def _evaluate_single_query(query: Query, sample_data: t.Dict[str, pd.DataFrame]) -> QueryResult:
+    """
+    Execute a single query by evaluating its code and handle any errors.
+
+    This is the reference `interpret` is checked against: both give the same
+    results and errors for single-line queries.
+    """
     try:
       if query.multi_line:
         return QueryPool._execute_multi_line_query(query, sample_data)
-      result = pd.eval(str(query), local_dict=sample_data)
+      result = pd.eval(str(query), local_dict={'pd': pd, **sample_data})
       if isinstance(result, (pd.DataFrame, pd.Series)):
         return result, None
       return None, f'Result was not a DataFrame or Series: {type(result)}'
@@ -255,11 +471,15 @@ class QueryPool:
     sequential processing. Results are cached to avoid re-execution unless
     explicitly requested.
 
+    In parallel, queries are sent in batches to worker processes that already
+    hold the sample data, see `Executor`.
+
     Args:
       force_execute: If True, re-execute all queries even if results exist
       num_processes:
         Number of parallel processes to use. Defaults to CPU count.
-        Only used when multi_processing is True.
+        Only used when multi_processing is True and the pool starts its own
+        worker processes.
 
     Returns:
       List of tuples containing (result, error) for each query
@@ -270,30 +490,84 @@ class QueryPool:
     if len(self._results) > 0 and not force_execute:
       return self._results
 
-    f = partial(self._execute_single_query, sample_data=self._sample_data)
+    iterator = self._iter_results(num_processes)
 
-    if self._multi_processing:
-      ctx = mp.get_context('fork')
+    if self._with_status:
+      iterator = tqdm(iterator, total=len(self._queries), desc='Executing queries', unit='query')
 
-      with ctx.Pool(num_processes) as pool:
-        iterator = pool.imap(f, self._queries)
+    self._results = list(iterator)
 
-        if self._with_status:
-          iterator = tqdm(
-            iterator, total=len(self._queries), desc='Executing queries', unit='query'
-          )
+    return self._results
 
-        self._results = list(iterator)
-    else:
-      if self._with_status:
-        iterator = tqdm(self._queries, desc='Executing queries', unit='query')
-      else:
-        iterator = self._queries
+  async def aexecute(
+    self,
+    force_execute: bool = False,
+    num_processes: t.Optional[int] = None,
+    progress: t.Optional[ProgressCallback] = None,
+    timeout: t.Optional[float] = None,
+  ) -> t.List[QueryResult]:
+    """
+    Execute all queries like `execute`, without blocking the event loop.
+
+    Results are collected in steps on the event loop's default executor, see
+    `aiterate`. They are cached only once every query was executed, so a
+    cancelled or timed out execution leaves the pool unchanged.
+
+    Args:
+      force_execute: If True, re-execute all queries even if results exist
+      num_processes: Number of parallel processes to use, see `execute`
+      progress: Function called with the number of executed queries and the
+        number of queries as execution proceeds, awaited if it returns an awaitable
+      timeout: Seconds after which execution is stopped and `TimeoutError`
+        raised, or None
+
+    Returns:
+      List of tuples containing (result, error) for each query
+    """
+    if len(self._queries) == 0:
+      return []
+
+    if len(self._results) > 0 and not force_execute:
+      return self._results
 
-      self._results = [f(query) for query in iterator]
+    self._results = [
+      result
+      async for result in aiterate(
+        self._iter_results(num_processes), len(self._queries), progress, timeout
+      )
+    ]
 
     return self._results
 
+  def _iter_results(self, num_processes: t.Optional[int]) -> t.Iterator[QueryResult]:
+    """
+    Execute the queries lazily, in parallel if the pool uses multi-processing.
+
+    The cache statistics of every execution are added to `_result_cache_statistics`.
+    """
+    if self._multi_processing:
+      if self._executor is None:
+        self._executor = Executor(
+          self._sample_data,
+          processes=num_processes,
+          result_cache_size=self._result_cache.max_size,
+          query_limits=self._query_limits,
+        )
+
+      results = self._executor.map(
+        partial(_execute_query, summarize=self._summarize), self._queries, self._batch_size
+      )
+    else:
+      results = (
+        _execute_query(None, self._sample_data, query, self._result_cache, self._summarize)
+        for query in self._queries
+      )
+
+    with closing(results):
+      for result, cache_statistics in results:
+        self._result_cache_statistics += cache_statistics
+        yield result
+
   def filter(
     self,
     filter_type: QueryFilter,
@@ -321,15 +595,9 @@ class QueryPool:
 
       match filter_type:
         case QueryFilter.NON_EMPTY:
-          should_keep = result is not None and (
-            (isinstance(result, pd.DataFrame) and not result.empty)
-            or (isinstance(result, pd.Series) and result.size > 0)
-          )
+          should_keep = _is_empty(result) is False
         case QueryFilter.EMPTY:
-          should_keep = result is not None and (
-            (isinstance(result, pd.DataFrame) and result.empty)
-            or (isinstance(result, pd.Series) and result.size == 0)
-          )
+          should_keep = _is_empty(result) is True
         case QueryFilter.HAS_ERROR:
           should_keep = error is not None
         case QueryFilter.WITHOUT_ERROR:
@@ -384,7 +652,11 @@ class QueryPool:
     if not self._results or force_execute:
       self._results = self.execute()
 
-    statistics = QueryStatistics(query_structure=self._query_structure)
+    statistics = QueryStatistics(
+      query_structure=self._query_structure,
+      generation_results=self._generation_statistics,
+      result_cache=self._result_cache_statistics,
+    )
     statistics.total_queries = len(self._queries)
 
     for query in self._queries:
@@ -430,12 +702,10 @@ class QueryPool:
           statistics.execution_results.errors[error] += 1
         else:
           statistics.execution_results.successful += 1
-          if result is not None:
-            if (isinstance(result, pd.DataFrame) and not result.empty) or (
-              isinstance(result, pd.Series) and result.size > 0
-            ):
+          match _is_empty(result):
+            case False:
               statistics.execution_results.non_empty += 1
-            else:
+            case True:
               statistics.execution_results.empty += 1
 
     return statistics
@@ -454,10 +724,8 @@ class QueryPool:
     if create_dirs and os.path.dirname(output_file):
       os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-    queries = filter(None, map(lambda q: str(q).strip(), self._queries))
-
     with open(output_file, 'w+') as f:
-      f.write('\n\n'.join(queries))
+      write_queries(self._queries, f)
 
   def sort(self) -> None:
     """
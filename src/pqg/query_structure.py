@@ -1,3 +1,4 @@
+import typing as t
 from dataclasses import dataclass
 
 from .arguments import Arguments
@@ -20,6 +21,9 @@ class QueryStructure:
     max_selection_conditions: Maximum number of WHERE clause conditions
     projection_probability: Probability (0-1) of including a SELECT operation
     selection_probability: Probability (0-1) of including a WHERE operation
+    selectivity: Range (0-1) of the fraction of rows each WHERE condition should
+      select. If set, constants are chosen from statistics of the sample data,
+      otherwise they are drawn from the ranges declared in the schema.
   """
 
   groupby_aggregation_probability: float
@@ -29,6 +33,11 @@ class QueryStructure:
   max_selection_conditions: int
   projection_probability: float
   selection_probability: float
+  selectivity: t.Optional[t.Tuple[float, float]] = None
+
+  def __post_init__(self):
+    if self.selectivity is not None and not 0 <= self.selectivity[0] <= self.selectivity[1] <= 1:
+      raise ValueError(f'Invalid selectivity range: {self.selectivity}')
 
   @staticmethod
   def from_args(arguments: Arguments) -> 'QueryStructure':
@@ -49,4 +58,12 @@ class QueryStructure:
       max_selection_conditions=arguments.max_selection_conditions,
       projection_probability=arguments.projection_probability,
       selection_probability=arguments.selection_probability,
+      selectivity=(
+        None
+        if arguments.min_selectivity is None and arguments.max_selectivity is None
+        else (
+          arguments.min_selectivity if arguments.min_selectivity is not None else 0.0,
+          arguments.max_selectivity if arguments.max_selectivity is not None else 1.0,
+        )
+      ),
     )
@@ -0,0 +1,193 @@
+import threading
+import typing as t
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+DEFAULT_RESULT_CACHE_SIZE = 1 << 28
+
+MAX_SEEN_KEYS = 1 << 20
+
+Result = t.Union[pd.DataFrame, pd.Series]
+
+
+@dataclass
+class ResultCacheStatistics:
+  """
+  Statistics about the intermediate results reused from a `ResultCache`.
+
+  Attributes:
+    hits (int): Number of operations whose result was taken from the cache
+    misses (int): Number of operations executed while the cache was used
+    evictions (int): Number of results evicted to stay within the size limit
+  """
+
+  hits: int = 0
+  misses: int = 0
+  evictions: int = 0
+
+  @property
+  def hit_rate(self) -> float:
+    """The share of operations whose result was taken from the cache."""
+    return self.hits / max(self.hits + self.misses, 1)
+
+  def __add__(self, other: 'ResultCacheStatistics') -> 'ResultCacheStatistics':
+    return ResultCacheStatistics(
+      self.hits + other.hits, self.misses + other.misses, self.evictions + other.evictions
+    )
+
+  def __sub__(self, other: 'ResultCacheStatistics') -> 'ResultCacheStatistics':
+    return ResultCacheStatistics(
+      self.hits - other.hits, self.misses - other.misses, self.evictions - other.evictions
+    )
+
+  def __str__(self) -> str:
+    total = self.hits + self.misses
+
+    if total == 0:
+      return ''
+
+    return '\n'.join(
+      [
+        f'Result Cache (n = {total} operations):',
+        f'  Hit Rate: {self.hit_rate * 100:5.1f}% ({self.hits} / {total})',
+        f'  Evictions: {self.evictions}',
+      ]
+    )
+
+
+class ResultCache:
+  """
+  A size-bounded in-memory LRU cache of intermediate query results.
+
+  Queries of a pool often share a prefix: the same selection on the same
+  entity, or the same query merged on the right. The results of the prefixes of
+  a query executed with the cache are stored under the prefixes' fingerprints,
+  see `Query.prefix_fingerprints`, so the next query sharing a prefix only
+  executes the operations after it. Most prefixes are only executed once, so a
+  result is only stored the second time its prefix is executed, which keeps
+  results that would never be reused from taking memory and evicting others.
+
+  Sizes are estimated from the number of rows and the item size of every
+  column, not counting the objects columns point to, which results share with
+  the sample data they are computed from. When the total size exceeds
+  `max_size` bytes, the least recently used results are evicted.
+
+  Results are shared between the cache and the queries reusing them, so they
+  must not be modified in place, which `interpret` guarantees by never
+  returning a result the cache holds. A cache must only be used with the sample
+  data its results were computed from. A cache can be used from several threads.
+
+  Attributes:
+    max_size: Maximum total size of the cached results in bytes, 0 disables caching
+    size: Total size of the cached results in bytes
+    statistics: Operations reused and executed, and results evicted so far
+
+  Example:
+    cache = ResultCache(max_size=64 * 1024 * 1024)
+    results = [interpret(query, sample_data, cache) for query in queries]
+    print(cache.statistics)
+  """
+
+  def __init__(self, max_size: int = DEFAULT_RESULT_CACHE_SIZE):
+    self.max_size, self.size = max_size, 0
+    self.statistics = ResultCacheStatistics()
+    self._entries: OrderedDict[int, t.Tuple[Result, int]] = OrderedDict()
+    self._lock = threading.Lock()
+    self._seen: t.Set[int] = set()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def longest_prefix(self, keys: t.Sequence[int]) -> t.Tuple[int, t.Optional[Result]]:
+    """
+    Find the longest cached prefix of a query.
+
+    The operations of the prefix count as hits and the remaining ones as misses,
+    unless caching is disabled.
+
+    Args:
+      keys: Fingerprints of the prefixes of the query, shortest first
+
+    Returns:
+      The number of operations in the longest cached prefix and its result, or
+      0 and None if no prefix is cached
+    """
+    if self.max_size <= 0:
+      return 0, None
+
+    with self._lock:
+      for length in range(len(keys), 0, -1):
+        entry = self._entries.get(keys[length - 1])
+
+        if entry is not None:
+          self._entries.move_to_end(keys[length - 1])
+          break
+      else:
+        length, entry = 0, None
+
+      self.statistics.hits += length
+      self.statistics.misses += len(keys) - length
+
+    return length, None if entry is None else entry[0]
+
+  def put(self, key: int, result: Result) -> None:
+    """
+    Store a result, evicting least recently used results if the cache is full.
+
+    The first result stored under a key is not kept, only the key is remembered,
+    and results larger than `max_size` are not stored.
+
+    Args:
+      key: Fingerprint of the prefix the result is of
+      result: The result to store
+    """
+    if self.max_size <= 0:
+      return
+
+    with self._lock:
+      if key not in self._seen:
+        if len(self._seen) >= MAX_SEEN_KEYS:
+          self._seen.clear()
+
+        self._seen.add(key)
+        return
+
+    size = _estimated_size(result)
+
+    if size > self.max_size:
+      return
+
+    with self._lock:
+      if (previous := self._entries.pop(key, None)) is not None:
+        self.size -= previous[1]
+
+      self._entries[key] = (result, size)
+      self.size += size
+
+      while self.size > self.max_size:
+        _, (_, evicted_size) = self._entries.popitem(last=False)
+        self.size -= evicted_size
+        self.statistics.evictions += 1
+
+  def clear(self) -> None:
+    """Remove all cached results."""
+    with self._lock:
+      self._entries.clear()
+      self._seen.clear()
+      self.size = 0
+
+
+def _estimated_size(result: Result) -> int:
+  """
+  Estimate the memory of the columns and index of a result in bytes.
+
+  Values of types without a fixed item size count 8 bytes, the size of a pointer.
+  This is much cheaper than `memory_usage`, which builds a Series per column.
+  """
+  dtypes = result.dtypes if isinstance(result, pd.DataFrame) else [result.dtype]
+
+  return len(result) * sum(getattr(dtype, 'itemsize', 8) for dtype in dtypes) + int(
+    result.index.nbytes
+  )
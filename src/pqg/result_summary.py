@@ -0,0 +1,118 @@
+import hashlib
+import typing as t
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ResultSummary:
+  """
+  A compact summary of the result of executing a query, kept instead of the result.
+
+  Summaries are computed where the query is executed, so worker processes only
+  send them back and the result itself is discarded there.
+
+  Attributes:
+    rows: Number of rows of the result, or None if the query failed
+    columns: Number of columns of the result, None for series and failed queries
+    dtypes: Names of the dtypes of the result's columns, or of the series
+    hash: Hash of the result's index, column names and values, or None if the
+      query failed
+    elapsed: Seconds taken to execute the query
+    error: Error message of the query, or None if it succeeded
+  """
+
+  rows: t.Optional[int] = None
+  columns: t.Optional[int] = None
+  dtypes: t.Tuple[str, ...] = ()
+  hash: t.Optional[str] = None
+  elapsed: float = 0.0
+  error: t.Optional[str] = None
+
+  @property
+  def empty(self) -> bool:
+    """Whether the query succeeded with a result without values."""
+    return self.error is None and (self.rows == 0 or self.columns == 0)
+
+  @property
+  def error_class(self) -> t.Optional[str]:
+    """The name of the class of the query's error, such as `KeyError`, if any."""
+    return None if self.error is None else self.error.split(':', 1)[0]
+
+  @staticmethod
+  def from_result(
+    result: t.Optional[t.Union[pd.DataFrame, pd.Series]], error: t.Optional[str], elapsed: float
+  ) -> 'ResultSummary':
+    """
+    Summarize the result of executing a query.
+
+    Args:
+      result: Result of the query, or None if it failed
+      error: Error message of the query, or None if it succeeded
+      elapsed: Seconds taken to execute the query
+
+    Returns:
+      ResultSummary: The summary of the result
+    """
+    if result is None:
+      return ResultSummary(elapsed=elapsed, error=error)
+
+    if isinstance(result, pd.Series):
+      return ResultSummary(
+        rows=len(result),
+        dtypes=(str(result.dtype),),
+        hash=_content_hash(result),
+        elapsed=elapsed,
+        error=error,
+      )
+
+    return ResultSummary(
+      rows=len(result),
+      columns=len(result.columns),
+      dtypes=tuple(str(dtype) for dtype in result.dtypes),
+      hash=_content_hash(result),
+      elapsed=elapsed,
+      error=error,
+    )
+
+  def __str__(self) -> str:
+    if self.error is not None:
+      return f'{self.error} ({self.elapsed * 1000:.1f} ms)'
+
+    shape = f'{self.rows} rows' if self.columns is None else f'{self.rows} x {self.columns}'
+
+    return f'{shape} [{", ".join(self.dtypes)}] {self.hash} ({self.elapsed * 1000:.1f} ms)'
+
+
+def _content_hash(result: t.Union[pd.DataFrame, pd.Series]) -> str:
+  """
+  Hash the index, column names and values of a result.
+
+  Numeric and datetime values are hashed as their bytes, other values as their
+  `repr`, which is several times faster than `pd.util.hash_pandas_object`. The
+  levels of a `MultiIndex` are hashed separately rather than as tuples.
+  """
+  digest = hashlib.blake2b(digest_size=8)
+
+  index = result.index
+
+  columns = result.items() if isinstance(result, pd.DataFrame) else [(result.name, result)]
+
+  for values in [
+    *(index.get_level_values(level).to_numpy() for level in range(index.nlevels)),
+    *(column.to_numpy() for _, column in columns),
+  ]:
+    if values.dtype.kind in 'biufcmM':
+      digest.update(np.ascontiguousarray(values).data)
+    else:
+      digest.update('\x00'.join(map(repr, values)).encode('utf-8', 'surrogatepass'))
+
+    digest.update(b'\x01')
+
+  digest.update(
+    repr(list(result.columns) if isinstance(result, pd.DataFrame) else result.name).encode()
+  )
+
+  return digest.hexdigest()
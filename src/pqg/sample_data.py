@@ -0,0 +1,415 @@
+import contextlib
+import multiprocessing as mp
+import os
+import typing as t
+import zlib
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from .arguments import Arguments, SampleDataFormat
+from .cache import DEFAULT_CACHE_SIZE, SampleDataCache
+from .entity import Entity
+from .schema import Schema
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+@dataclass
+class SampleDataOptions:
+  """
+  Configuration options for controlling sample data generation.
+
+  Sample data is generated for every entity in a schema and is used to execute
+  generated queries. Its size is controlled with a TPC-H style scale factor
+  applied to the `num_rows` of each entity.
+
+  Attributes:
+    cache_dir: If set, reuse sample data cached in this directory (requires a seed)
+    cache_max_size: Maximum size of the cache directory in bytes, or None for no limit
+    chunk_size: Maximum number of rows generated at once when writing to disk
+    multi_processing: If True, generate entities in parallel, largest first
+    output_dir: If set, write each entity to this directory and load it back from there
+    output_format: File format used for entities written to `output_dir`
+    scale_factor: Multiplier applied to the number of rows of every entity
+    seed: Seed making the generated sample data reproducible
+    typed: If True, use compact dtypes (categoricals, narrow integers, datetime64 and
+      Arrow strings) instead of object columns
+
+  Example:
+    options = SampleDataOptions(
+      cache_dir='.pqg-cache',
+      scale_factor=10,
+      seed=42,
+    )
+    generator = Generator(schema, query_structure, sample_data_options=options)
+  """
+
+  cache_dir: t.Optional[str] = None
+  cache_max_size: t.Optional[int] = DEFAULT_CACHE_SIZE
+  chunk_size: int = DEFAULT_CHUNK_SIZE
+  multi_processing: bool = False
+  output_dir: t.Optional[str] = None
+  output_format: SampleDataFormat = SampleDataFormat.PARQUET
+  scale_factor: float = 1.0
+  seed: t.Optional[int] = None
+  typed: bool = False
+
+  @staticmethod
+  def from_args(arguments: Arguments) -> 'SampleDataOptions':
+    """
+    Create SampleDataOptions from command-line arguments.
+
+    Args:
+      arguments: Parsed command-line arguments
+
+    Returns:
+      SampleDataOptions configured according to provided arguments
+    """
+    return SampleDataOptions(
+      cache_dir=arguments.sample_data_cache,
+      cache_max_size=arguments.sample_data_cache_size * 1024 * 1024,
+      chunk_size=arguments.sample_data_chunk_size,
+      multi_processing=not arguments.disable_multi_processing,
+      output_dir=arguments.sample_data_dir,
+      output_format=arguments.sample_data_format,
+      scale_factor=arguments.scale_factor,
+      seed=arguments.seed,
+      typed=arguments.typed_sample_data,
+    )
+
+
+def entity_seed_sequence(entropy: int, entity: Entity) -> np.random.SeedSequence:
+  """
+  Derive the seed sequence used to generate an entity's sample data.
+
+  The sequence only depends on the root entropy and the name of the entity, so
+  every entity draws from an independent stream that does not change with the
+  order in which entities are generated.
+
+  Args:
+    entropy: Root entropy shared by all entities of a schema
+    entity: The entity to derive a seed sequence for
+
+  Returns:
+    np.random.SeedSequence: The entity's seed sequence
+  """
+  return np.random.SeedSequence(entropy, spawn_key=(zlib.crc32(entity.name.encode()),))
+
+
+def write_entity_data(
+  entity: Entity,
+  path: str,
+  num_rows: int,
+  output_format: SampleDataFormat = SampleDataFormat.PARQUET,
+  chunk_size: int = DEFAULT_CHUNK_SIZE,
+  rng: t.Optional[np.random.Generator] = None,
+  references: t.Optional[t.Mapping[str, pd.DataFrame]] = None,
+  typed: bool = False,
+) -> None:
+  """
+  Generate sample data for an entity and write it to a columnar file.
+
+  Rows are generated and written in chunks of at most `chunk_size` rows, so
+  peak memory usage is bounded by the chunk size rather than the size of the
+  entity.
+
+  Args:
+    entity: The entity to generate sample data for
+    path: Path of the file to write
+    num_rows: Number of rows to generate
+    output_format: Whether to write a Parquet or a Feather (Arrow IPC) file
+    chunk_size: Maximum number of rows held in memory at once
+    rng: Random generator to draw values from
+    references: Sample data of the entities referenced by foreign keys
+    typed: If True, use compact dtypes
+
+  Raises:
+    ImportError: If pyarrow is not installed.
+  """
+  try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+  except ImportError as e:
+    raise ImportError(
+      'Writing sample data to disk requires pyarrow, install it with `pip install pyarrow`'
+    ) from e
+
+  writer = None
+
+  try:
+    for chunk in entity.generate_dataframes(num_rows, chunk_size, rng, references, typed):
+      table = pa.Table.from_pandas(chunk, preserve_index=False)
+
+      if writer is None:
+        writer = (
+          pq.ParquetWriter(path, table.schema)
+          if output_format == SampleDataFormat.PARQUET
+          else pa.ipc.new_file(path, table.schema)
+        )
+
+      writer.write_table(table)
+  finally:
+    if writer is not None:
+      writer.close()
+
+
+def read_entity_data(
+  path: str, output_format: SampleDataFormat = SampleDataFormat.PARQUET
+) -> pd.DataFrame:
+  """
+  Read sample data previously written with `write_entity_data`.
+
+  Args:
+    path: Path of the file to read
+    output_format: The format the file was written in
+
+  Returns:
+    pd.DataFrame: The sample data stored in the file
+  """
+  if output_format == SampleDataFormat.PARQUET:
+    return pd.read_parquet(path)
+
+  return pd.read_feather(path)
+
+
+def generation_order(schema: Schema) -> t.List[t.List[Entity]]:
+  """
+  Order the entities of a schema along their foreign key relationships.
+
+  Entities are grouped into waves such that every entity only references
+  entities of earlier waves, so referenced key columns exist before the foreign
+  keys pointing at them are generated. Entities of a wave do not depend on each
+  other. Entities taking part in a reference cycle are placed in a final wave.
+
+  Args:
+    schema: Schema containing the entities to order
+
+  Returns:
+    List of waves, each a list of entities sorted by name
+  """
+  dependencies = {
+    entity.name: {
+      foreign_table
+      for _, foreign_table in entity.foreign_keys.values()
+      if foreign_table in schema and foreign_table != entity.name
+    }
+    for entity in schema.entities
+  }
+
+  waves, done = [], set()
+
+  while len(done) < len(dependencies):
+    wave = sorted(
+      name for name, depends_on in dependencies.items() if name not in done and depends_on <= done
+    )
+
+    if not wave:
+      wave = sorted(name for name in dependencies if name not in done)
+
+    waves.append([schema[name] for name in wave])
+    done.update(wave)
+
+  return waves
+
+
+def generate_sample_data(
+  schema: Schema, options: SampleDataOptions, with_status: bool = False
+) -> t.Dict[str, pd.DataFrame]:
+  """
+  Generate sample data for every entity in a schema.
+
+  Entities are generated in the order given by `generation_order`, and foreign
+  key columns are drawn from the already generated key columns they reference,
+  so merges along foreign keys find matching rows.
+
+  When `options.output_dir` is set, each entity is streamed to disk in chunks
+  and then loaded back, which avoids holding intermediate copies of large
+  entities in memory. When `options.cache_dir` is set, entities found in the
+  cache are loaded instead of being generated, and written to the output
+  directory, if any.
+
+  With `options.multi_processing`, the entities of each wave are generated
+  concurrently in a process pool, largest first so that the biggest entity does
+  not start last. Every entity draws from its own seeded stream, so the result
+  is identical to generating the entities one after the other.
+
+  Args:
+    schema: Schema containing the entities to generate data for
+    options: Configuration options for sample data generation
+    with_status: If True, display a progress bar
+
+  Returns:
+    Dictionary mapping entity names to sample DataFrames
+
+  Raises:
+    ValueError: If a cache directory is set without a seed.
+  """
+  if options.cache_dir is not None and options.seed is None:
+    raise ValueError('Caching sample data requires a seed')
+
+  cache = (
+    SampleDataCache(options.cache_dir, options.cache_max_size)
+    if options.cache_dir is not None
+    else None
+  )
+
+  if options.output_dir is not None:
+    os.makedirs(options.output_dir, exist_ok=True)
+
+  entropy = np.random.SeedSequence(options.seed).entropy
+
+  sample_data: t.Dict[str, pd.DataFrame] = {}
+
+  keys: t.Dict[str, str] = {}
+
+  f = partial(_generate_entity_data, options=options, entropy=entropy)
+
+  processes = min(len(schema), os.cpu_count() or 1)
+
+  with contextlib.ExitStack() as stack:
+    pool = (
+      stack.enter_context(mp.Pool(processes))
+      if options.multi_processing and processes > 1
+      else None
+    )
+
+    progress = stack.enter_context(
+      tqdm(
+        desc='Generating sample data',
+        disable=not with_status,
+        total=len(schema),
+        unit='entity',
+      )
+    )
+
+    for wave in generation_order(schema):
+      pending: t.List[t.Tuple[Entity, int, t.Dict[str, pd.DataFrame]]] = []
+
+      for entity in wave:
+        num_rows = entity.row_count(options.scale_factor)
+
+        references = _references(entity, sample_data)
+
+        if cache is not None:
+          assert options.seed is not None
+
+          keys[entity.name] = cache.key(
+            entity,
+            num_rows,
+            options.seed,
+            references={name: keys[name] for name in sorted(references)},
+            typed=options.typed,
+            # Entities written to disk are drawn in chunks, which changes their values
+            chunk_size=options.chunk_size if options.output_dir is not None else None,
+            output_format=options.output_format if options.output_dir is not None else None,
+          )
+
+          if (df := cache.get(keys[entity.name])) is not None:
+            if options.output_dir is not None:
+              _write_dataframe(df, _entity_path(entity.name, options), options.output_format)
+
+            sample_data[entity.name] = df
+            progress.update()
+            continue
+
+        pending.append((entity, num_rows, references))
+
+      pending.sort(key=lambda task: task[1] * len(task[0].properties), reverse=True)
+
+      results = (
+        pool.imap_unordered(f, pending)
+        if pool is not None and len(pending) > 1
+        else map(f, pending)
+      )
+
+      for name, columns in results:
+        sample_data[name] = _load_entity_data(name, columns, options)
+        progress.update()
+
+      if cache is not None:
+        for entity, _, _ in pending:
+          cache.put(keys[entity.name], sample_data[entity.name])
+
+  return {entity.name: sample_data[entity.name] for entity in schema.entities}
+
+
+def _references(
+  entity: Entity, sample_data: t.Dict[str, pd.DataFrame]
+) -> t.Dict[str, pd.DataFrame]:
+  """Collect the referenced key columns of an entity's foreign keys that are already generated."""
+  referenced_columns: t.Dict[str, t.List[str]] = {}
+
+  for foreign_column, foreign_table in entity.foreign_keys.values():
+    if foreign_table in sample_data and foreign_column in sample_data[foreign_table]:
+      referenced_columns.setdefault(foreign_table, []).append(foreign_column)
+
+  return {
+    table: sample_data[table][list(dict.fromkeys(columns))]
+    for table, columns in referenced_columns.items()
+  }
+
+
+def _generate_entity_data(
+  task: t.Tuple[Entity, int, t.Dict[str, pd.DataFrame]], options: SampleDataOptions, entropy: int
+) -> t.Tuple[str, t.Optional[t.Dict[str, np.ndarray]]]:
+  """
+  Generate the sample data of a single entity.
+
+  Returns the generated columns, or None if they were written to the output
+  directory instead. Returning raw arrays rather than a DataFrame keeps string
+  columns in a compact form that is cheap to send back from a worker process.
+  """
+  entity, num_rows, references = task
+
+  rng = np.random.default_rng(entity_seed_sequence(entropy, entity))
+
+  if options.output_dir is None:
+    return entity.name, entity.generate_columns(num_rows, rng, references, options.typed)
+
+  write_entity_data(
+    entity,
+    _entity_path(entity.name, options),
+    num_rows,
+    options.output_format,
+    options.chunk_size,
+    rng,
+    references,
+    options.typed,
+  )
+
+  return entity.name, None
+
+
+def _load_entity_data(
+  name: str, columns: t.Optional[t.Dict[str, np.ndarray]], options: SampleDataOptions
+) -> pd.DataFrame:
+  """Build the DataFrame of an entity from the result of `_generate_entity_data`."""
+  if columns is None:
+    return read_entity_data(_entity_path(name, options), options.output_format)
+
+  return pd.DataFrame(columns)
+
+
+def _write_dataframe(df: pd.DataFrame, path: str, output_format: SampleDataFormat) -> None:
+  """Write sample data to a file like `write_entity_data`, in a single chunk."""
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+
+  table = pa.Table.from_pandas(df, preserve_index=False)
+
+  if output_format == SampleDataFormat.PARQUET:
+    pq.write_table(table, path)
+    return
+
+  with pa.ipc.new_file(path, table.schema) as writer:
+    writer.write_table(table)
+
+
+def _entity_path(name: str, options: SampleDataOptions) -> str:
+  """Return the path an entity's sample data is written to in the output directory."""
+  assert options.output_dir is not None
+  return os.path.join(options.output_dir, f'{name}.{options.output_format.value}')
@@ -4,6 +4,24 @@ from collections.abc import Mapping
 from dataclasses import dataclass, field
 
 from .entity import Entity
+from .plan import GenerationPlan
+
+
+class Reference(t.NamedTuple):
+  """
+  A foreign key of an entity.
+
+  Attributes:
+    entity (str): Name of the entity declaring the foreign key.
+    local_column (str): Column of the entity holding the key.
+    foreign_column (str): Referenced column.
+    foreign_table (str): Name of the referenced entity.
+  """
+
+  entity: str
+  local_column: str
+  foreign_column: str
+  foreign_table: str
 
 
 @dataclass
@@ -14,17 +32,96 @@ class Schema(Mapping):
   The Schema class provides dictionary-style access to Entity objects, allowing for
   both iteration over entities and direct access to specific entities by name.
 
+  On creation, the schema also indexes its join graph, where an edge leads from
+  each entity to every entity one of its foreign keys references, so that query
+  generation can look up join candidates instead of scanning entities. Its
+  `plan` takes the joins and the reach of every entity from this index, and
+  query builders only merge entities whose reach allows the merges left.
+
   Attributes:
     entities (t.Set[Entity]): Set of Entity objects in the schema.
+    sorted_entities (t.Tuple[Entity, ...]): The entities sorted by name.
     _entity_map (t.Dict[str, Entity]): Internal mapping of entity names to Entity objects.
+    _references (t.Dict[str, t.Tuple[Reference, ...]]): Foreign keys of each entity.
+    _reachable (t.Dict[str, t.Tuple[t.FrozenSet[str], ...]]): Entities reachable from
+      each entity within one, two, ... joins, up to the longest path.
+    plan (GenerationPlan): The schema compiled for query generation.
   """
 
   entities: t.Set[Entity] = field(default_factory=set)
+  sorted_entities: t.Tuple[Entity, ...] = field(init=False)
   _entity_map: t.Dict[str, Entity] = field(init=False)
+  _references: t.Dict[str, t.Tuple['Reference', ...]] = field(init=False)
+  _reachable: t.Dict[str, t.Tuple[t.FrozenSet[str], ...]] = field(init=False)
+  plan: GenerationPlan = field(init=False, repr=False, compare=False)
 
   def __post_init__(self):
-    """Initialize the internal entity mapping after entity set is created."""
-    self._entity_map = {entity.name: entity for entity in self.entities}
+    """Initialize the internal entity mapping and join graph index after entity set is created."""
+    self.sorted_entities = tuple(sorted(self.entities, key=lambda entity: entity.name))
+
+    self._entity_map = {entity.name: entity for entity in self.sorted_entities}
+
+    self._references = {
+      entity.name: tuple(
+        Reference(entity.name, local_column, foreign_column, foreign_table)
+        for local_column, [foreign_column, foreign_table] in entity.foreign_keys.items()
+      )
+      for entity in self.sorted_entities
+    }
+
+    self._reachable = {name: self._reachable_by_depth(name) for name in self._entity_map}
+
+    self.plan = GenerationPlan(self)
+
+  def _reachable_by_depth(self, name: str) -> t.Tuple[t.FrozenSet[str], ...]:
+    """Collect the entities reachable from an entity within each number of joins."""
+    levels: t.List[t.FrozenSet[str]] = []
+
+    reached, frontier = {name}, {name}
+
+    while frontier:
+      frontier = {
+        reference.foreign_table
+        for current in frontier
+        for reference in self._references[current]
+        if reference.foreign_table in self._entity_map
+      } - reached
+
+      if frontier:
+        reached |= frontier
+        levels.append(frozenset(reached - {name}))
+
+    return tuple(levels)
+
+  def references(self, name: str) -> t.Tuple['Reference', ...]:
+    """
+    Get the foreign keys of an entity, in the order they are declared.
+
+    Args:
+      name (str): The name of the entity.
+
+    Returns:
+      t.Tuple[Reference, ...]: The entity's foreign keys.
+    """
+    return self._references[name]
+
+  def reachable(self, name: str, depth: int) -> t.FrozenSet[str]:
+    """
+    Get the entities a query on an entity can join within a number of merges.
+
+    Args:
+      name (str): The name of the entity the query starts from.
+      depth (int): The maximum number of consecutive merges.
+
+    Returns:
+      t.FrozenSet[str]: Names of the reachable entities, excluding the entity itself.
+    """
+    levels = self._reachable[name]
+
+    if depth <= 0 or not levels:
+      return frozenset()
+
+    return levels[min(depth, len(levels)) - 1]
 
   def __getitem__(self, key: str) -> Entity:
     """
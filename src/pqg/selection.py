@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from .operation import Operation
 
 
-@dataclass
+@dataclass(frozen=True)
 class Selection(Operation):
   """
   Represents a selection operation in a query.
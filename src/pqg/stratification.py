@@ -0,0 +1,159 @@
+import math
+import typing as t
+from dataclasses import dataclass
+
+import numpy as np
+
+from .group_by_aggregation import GroupByAggregation
+from .plan import GenerationPlan
+from .projection import Projection
+from .query import Query
+from .query_structure import QueryStructure
+from .selection import Selection
+
+
+@dataclass(frozen=True, order=True)
+class QueryShape:
+  """
+  The operation mix of a query, as counted by `QueryStatistics`.
+
+  Attributes:
+    selection: Whether the query filters rows
+    projection: Whether the query selects columns
+    group_by: Whether the query ends with a group by aggregation
+    merges: Number of merges, including merges nested in merged queries
+  """
+
+  selection: bool
+  projection: bool
+  group_by: bool
+  merges: int
+
+  @staticmethod
+  def of(query: Query) -> 'QueryShape':
+    """Return the shape of a query."""
+    return QueryShape(
+      selection=any(isinstance(op, Selection) for op in query.operations),
+      projection=any(isinstance(op, Projection) for op in query.operations),
+      group_by=any(isinstance(op, GroupByAggregation) for op in query.operations),
+      merges=query.merge_count,
+    )
+
+
+class Stratification:
+  """
+  A fixed multiset of query shapes matching the targets of a query structure.
+
+  Selections, projections and group by aggregations are included with the
+  probabilities of the query structure, independently of each other, and the
+  number of merges is uniform between 0 and `max_merges`, capped by the most
+  merges a query on any entity of the schema can contain.
+
+  The queries are split by one operation at a time, every group of queries
+  already split being divided with the largest remainder method while
+  carrying the rounding of earlier groups over. The shape counts therefore sum
+  to the number of queries, and both the number of queries of every shape and
+  the number of queries containing every operation or merge count differ from
+  their expectation by about one query at most.
+
+  The shapes are then shuffled with the seed, and query `i` is built to the
+  `i`-th shape, so a run reproduces the same shape counts regardless of how
+  many queries any worker builds.
+
+  Attributes:
+    shapes: The distinct shapes, sorted
+    counts: Number of queries of each shape
+    codes: Index into `shapes` of the shape of each query, shuffled
+  """
+
+  def __init__(
+    self,
+    query_structure: QueryStructure,
+    plan: GenerationPlan,
+    num_queries: int,
+    rng: np.random.Generator,
+  ):
+    max_merges = min(
+      query_structure.max_merges, max((entity.reach for entity in plan.entities), default=0)
+    )
+
+    operations = [
+      _probability(query_structure.selection_probability, query_structure.max_selection_conditions),
+      _probability(query_structure.projection_probability, query_structure.max_projection_columns),
+      _probability(
+        query_structure.groupby_aggregation_probability, query_structure.max_groupby_columns
+      ),
+    ]
+
+    strata: t.List[t.Tuple[t.Tuple[t.Any, ...], int]] = [((), num_queries)]
+
+    for p in operations:
+      strata = _split(strata, [(False, 1 - p), (True, p)])
+
+    strata = _split(strata, [(merges, 1 / (max_merges + 1)) for merges in range(max_merges + 1)])
+
+    self.shapes: t.Tuple[QueryShape, ...] = tuple(QueryShape(*key) for key, _ in strata)
+    self.counts: t.Tuple[int, ...] = tuple(count for _, count in strata)
+
+    self.codes: np.ndarray = rng.permutation(
+      np.repeat(
+        np.arange(len(self.shapes), dtype=np.min_scalar_type(len(self.shapes))), self.counts
+      )
+    )
+
+  def __len__(self) -> int:
+    return len(self.codes)
+
+  def __getitem__(self, index: int) -> QueryShape:
+    return self.shapes[self.codes[index]]
+
+  def targets(self) -> t.Dict[QueryShape, int]:
+    """Return the number of queries of every shape with at least one query."""
+    return {shape: count for shape, count in zip(self.shapes, self.counts) if count}
+
+
+def _probability(probability: float, limit: int) -> float:
+  """The probability of an operation the query builder only adds when its limit is positive."""
+  return min(max(probability, 0.0), 1.0) if limit > 0 else 0.0
+
+
+def _split(
+  strata: t.List[t.Tuple[t.Tuple[t.Any, ...], int]], categories: t.List[t.Tuple[t.Any, float]]
+) -> t.List[t.Tuple[t.Tuple[t.Any, ...], int]]:
+  """
+  Divide every stratum between categories in proportion to their probabilities.
+
+  Each stratum is divided by the largest remainder method, aiming at the share
+  every category is owed over all strata so far rather than within the stratum,
+  so category totals stay within about one of their expectation.
+  """
+  categories = [(value, p) for value, p in categories if p > 0]
+
+  owed, given, divided = [0.0] * len(categories), [0] * len(categories), []
+
+  for key, count in strata:
+    targets = [owed[j] + count * p - given[j] for j, (_, p) in enumerate(categories)]
+
+    shares = _apportion(targets, count)
+
+    for j, (value, p) in enumerate(categories):
+      owed[j] += count * p
+      given[j] += shares[j]
+      divided.append(((*key, value), shares[j]))
+
+  return divided
+
+
+def _apportion(targets: t.List[float], total: int) -> t.List[int]:
+  """Round targets summing to a total to non-negative integers with the same sum."""
+  counts = [max(math.floor(target), 0) for target in targets]
+
+  while sum(counts) < total:
+    counts[max(range(len(counts)), key=lambda j: targets[j] - counts[j])] += 1
+
+  while sum(counts) > total:
+    counts[
+      min((j for j in range(len(counts)) if counts[j]), key=lambda j: targets[j] - counts[j])
+    ] -= 1
+
+  return counts
@@ -0,0 +1,109 @@
+import asyncio
+import time
+import typing as t
+
+import pytest
+
+from pqg.aio import aiterate
+
+
+def slow_count(closed: t.List[bool], delay: float = 0.0) -> t.Iterator[int]:
+  try:
+    for i in range(10**9):
+      time.sleep(delay)
+      yield i
+  finally:
+    closed.append(True)
+
+
+async def wait_for_close(closed: t.List[bool]) -> None:
+  while not closed:
+    await asyncio.sleep(0.01)
+
+
+def test_items_are_yielded_in_order():
+  progress: t.List[t.Tuple[int, int]] = []
+
+  async def collect() -> t.List[int]:
+    return [
+      item async for item in aiterate(iter(range(1000)), 1000, lambda *args: progress.append(args))
+    ]
+
+  assert asyncio.run(collect()) == list(range(1000))
+  assert progress[-1] == (1000, 1000)
+
+
+def test_async_progress_is_awaited():
+  progress: t.List[int] = []
+
+  async def report(done: int, total: int) -> None:
+    await asyncio.sleep(0)
+    progress.append(done)
+
+  async def collect() -> t.List[int]:
+    return [item async for item in aiterate(iter(range(10)), 10, report)]
+
+  assert asyncio.run(collect()) == list(range(10))
+  assert progress == [10]
+
+
+def test_timeout_closes_iterator():
+  closed: t.List[bool] = []
+
+  async def collect() -> None:
+    try:
+      async for _ in aiterate(slow_count(closed, 0.01), 10**9, timeout=0.1):
+        pass
+    finally:
+      await asyncio.wait_for(wait_for_close(closed), 1)
+
+  with pytest.raises(TimeoutError):
+    asyncio.run(collect())
+
+  assert closed == [True]
+
+
+def test_cancellation_closes_iterator():
+  closed: t.List[bool] = []
+
+  async def consume() -> None:
+    async for _ in aiterate(slow_count(closed, 0.01), 10**9):
+      pass
+
+  async def cancel() -> None:
+    task = asyncio.create_task(consume())
+
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+      await task
+
+    await asyncio.wait_for(wait_for_close(closed), 1)
+
+  asyncio.run(cancel())
+
+  assert closed == [True]
+
+
+def test_event_loop_is_not_blocked():
+  ticks: t.List[int] = []
+
+  async def tick() -> None:
+    while True:
+      ticks.append(1)
+      await asyncio.sleep(0.01)
+
+  async def run() -> None:
+    ticker = asyncio.create_task(tick())
+
+    try:
+      async for _ in aiterate(slow_count([], 0.01), 10**9, timeout=0.3):
+        pass
+    finally:
+      ticker.cancel()
+
+  with pytest.raises(TimeoutError):
+    asyncio.run(run())
+
+  assert len(ticks) > 10
@@ -0,0 +1,199 @@
+import collections
+import pathlib
+import sys
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pqg.batch_query_builder import BatchQueryBuilder
+from pqg.generator import GenerateOptions, Generator
+from pqg.group_by_aggregation import GroupByAggregation
+from pqg.merge import Merge
+from pqg.projection import Projection
+from pqg.query_pool import GenerationStatistics
+from pqg.query_structure import QueryStructure
+from pqg.schema import Schema
+from pqg.selection import Selection
+
+EXAMPLES_DIR = pathlib.Path(__file__).parent.parent / 'examples'
+
+
+def find_schema_files() -> List[Tuple[str, pathlib.Path]]:
+  return sorted(
+    (example_dir.name, example_dir / 'schema.json')
+    for example_dir in EXAMPLES_DIR.iterdir()
+    if (example_dir / 'schema.json').exists()
+  )
+
+
+@pytest.fixture(params=find_schema_files(), ids=lambda x: x[0])
+def schema(request) -> Schema:
+  return Schema.from_file(str(request.param[1]))
+
+
+@pytest.fixture
+def query_structure() -> QueryStructure:
+  return QueryStructure(
+    groupby_aggregation_probability=0.3,
+    max_groupby_columns=3,
+    max_merges=4,
+    max_projection_columns=5,
+    max_selection_conditions=4,
+    projection_probability=0.7,
+    selection_probability=0.7,
+  )
+
+
+def test_queries_execute(schema: Schema, query_structure: QueryStructure):
+  with Generator(schema, query_structure) as generator:
+    options = GenerateOptions(
+      batch_size=64, multi_processing=False, num_queries=200, seed=0, vectorized=True
+    )
+
+    query_pool = generator.generate(options)
+
+    assert len(query_pool) == 200
+
+    for query, (result, error) in query_pool.items():
+      assert error is None, f'Query execution failed with error: {error}\nQuery: {str(query)}'
+      assert result is not None
+
+
+def test_queries_respect_structure(schema: Schema, query_structure: QueryStructure):
+  builder = BatchQueryBuilder(schema, query_structure, False, rng=np.random.default_rng(1))
+
+  for query in builder.build_many(500):
+    assert query.merge_count <= query_structure.max_merges
+
+    pending = [query]
+
+    while pending:
+      current = pending.pop()
+
+      for op in current.operations:
+        match op:
+          case Selection(conditions):
+            assert 1 <= len(conditions) <= query_structure.max_selection_conditions
+            assert conditions[-1][3] is None
+          case Projection(columns):
+            assert columns == sorted(set(columns))
+          case GroupByAggregation(group_by_columns):
+            assert current is query
+            assert 1 <= len(group_by_columns) <= query_structure.max_groupby_columns
+          case Merge(right):
+            pending.append(right)
+
+
+def test_seeded_batches_are_reproducible(schema: Schema, query_structure: QueryStructure):
+  def build(seed: int) -> List[str]:
+    builder = BatchQueryBuilder(schema, query_structure, False, rng=np.random.default_rng(seed))
+    return [str(query) for query in builder.build_many(50)]
+
+  assert build(3) == build(3)
+  assert build(3) != build(4)
+
+
+def test_integer_constants_are_exact():
+  schema = Schema.from_dict(
+    {
+      'entities': {
+        'a': {
+          'properties': {
+            'x': {'type': 'int'},
+            'y': {'type': 'int', 'min': sys.maxsize, 'max': sys.maxsize},
+            'z': {'type': 'int', 'min': 2**53 + 1, 'max': 2**53 + 1},
+          }
+        }
+      }
+    }
+  )
+
+  query_structure = QueryStructure(
+    groupby_aggregation_probability=0,
+    max_groupby_columns=0,
+    max_merges=0,
+    max_projection_columns=0,
+    max_selection_conditions=3,
+    projection_probability=0,
+    selection_probability=1,
+  )
+
+  builder = BatchQueryBuilder(schema, query_structure, False, rng=np.random.default_rng(0))
+
+  values = collections.defaultdict(set)
+
+  for query in builder.build_many(200):
+    (selection,) = query.operations
+
+    for column, _, value, _ in selection.conditions:
+      values[column].add(value)
+
+  assert all(type(value) is int for column in values.values() for value in column)
+  assert all(-sys.maxsize <= value <= sys.maxsize for value in values["'x'"])
+  assert values["'y'"] == {sys.maxsize}
+  assert values["'z'"] == {2**53 + 1}
+
+
+def test_selectivity_is_rejected(schema: Schema):
+  query_structure = QueryStructure(
+    groupby_aggregation_probability=0,
+    max_groupby_columns=0,
+    max_merges=0,
+    max_projection_columns=0,
+    max_selection_conditions=1,
+    projection_probability=0,
+    selection_probability=1,
+    selectivity=(0.2, 0.6),
+  )
+
+  with pytest.raises(ValueError):
+    BatchQueryBuilder(schema, query_structure, False)
+
+
+class TestEnsureNonEmpty:
+  @pytest.fixture
+  def generator(self, query_structure: QueryStructure) -> Generator:
+    return Generator(
+      Schema.from_file(str(EXAMPLES_DIR / 'customer' / 'schema.json')), query_structure
+    )
+
+  def test_rounds_fill_missing_queries(self, generator, mocker):
+    execute = mocker.patch(
+      'pqg.query_pool.QueryPool._execute_single_query',
+      side_effect=[(pd.DataFrame(), None), (pd.DataFrame({'a': [1]}), None)] * 10,
+    )
+
+    options = GenerateOptions(
+      ensure_non_empty=True, multi_processing=False, num_queries=4, vectorized=True
+    )
+
+    query_pool = generator.generate(options)
+
+    assert len(query_pool) == 4
+    assert execute.call_count == 4 + 2 + 1 + 1
+    assert query_pool._generation_statistics == GenerationStatistics(requested=4, attempts=8)
+
+  def test_budgets(self, generator, mocker):
+    mocker.patch(
+      'pqg.query_pool.QueryPool._execute_single_query', return_value=(pd.DataFrame(), None)
+    )
+
+    options = GenerateOptions(
+      batch_size=2,
+      ensure_non_empty=True,
+      max_attempts=3,
+      max_total_attempts=8,
+      multi_processing=False,
+      num_queries=6,
+      vectorized=True,
+    )
+
+    assert generator.generate(options)._generation_statistics == GenerationStatistics(
+      requested=6, attempts=8, failed=6, budget_exhausted=True
+    )
+
+  def test_individual_queries_are_rejected(self, generator):
+    with pytest.raises(ValueError):
+      generator.generate_query(GenerateOptions(vectorized=True), 0)
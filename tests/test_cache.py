@@ -0,0 +1,156 @@
+import os
+
+import pytest
+
+from pqg.arguments import SampleDataFormat
+from pqg.entity import Entity, PropertyInt, PropertyString
+from pqg.sample_data import SampleDataOptions, generate_sample_data, read_entity_data
+from pqg.schema import Schema
+
+pytest.importorskip('pyarrow')
+
+from pqg.cache import SampleDataCache  # noqa: E402
+
+
+@pytest.fixture
+def entity():
+  return Entity(
+    name='customer',
+    primary_key='id',
+    properties={
+      'id': PropertyInt(min=1, max=100),
+      'name': PropertyString(starting_character=['A', 'B']),
+    },
+    foreign_keys={},
+  )
+
+
+@pytest.fixture
+def cache(tmp_path):
+  return SampleDataCache(str(tmp_path / 'cache'))
+
+
+class TestSampleDataCache:
+  def test_key_depends_on_inputs(self, entity):
+    key = SampleDataCache.key(entity, 100, 1)
+
+    assert key.startswith('customer-')
+    assert key == SampleDataCache.key(entity, 100, 1)
+    assert key != SampleDataCache.key(entity, 50, 1)
+    assert key != SampleDataCache.key(entity, 100, 2)
+
+    changed = Entity(
+      name='customer',
+      primary_key='id',
+      properties={'id': PropertyInt(min=1, max=200)},
+      foreign_keys={},
+    )
+
+    assert key != SampleDataCache.key(changed, 100, 1)
+
+  def test_get_and_put(self, cache, entity):
+    key = cache.key(entity, 100, 1)
+
+    assert cache.get(key) is None
+
+    df = entity.generate_dataframe(100)
+    cache.put(key, df)
+
+    assert cache.get(key).equals(df)
+
+  def test_invalidate(self, cache, entity):
+    df = entity.generate_dataframe(100)
+
+    cache.put(cache.key(entity, 100, 1), df)
+    cache.put(cache.key(entity, 100, 2), df)
+    cache.put('other-0', df)
+
+    cache.invalidate('customer')
+
+    assert [key for key, _, _ in cache.entries()] == ['other-0']
+
+    cache.invalidate()
+
+    assert cache.entries() == []
+
+  def test_evicts_least_recently_used(self, cache, entity):
+    df = entity.generate_dataframe(100)
+
+    for i in range(3):
+      key = cache.key(entity, 100, i)
+      cache.put(key, df)
+      os.utime(cache.path(key), (i, i))
+
+    cache.get(cache.key(entity, 100, 0))
+
+    cache.max_size = cache.size() - 1
+    cache.evict()
+
+    assert cache.get(cache.key(entity, 100, 0)) is not None
+    assert cache.get(cache.key(entity, 100, 1)) is None
+    assert cache.get(cache.key(entity, 100, 2)) is not None
+
+
+def test_generate_sample_data_uses_cache(tmp_path, entity):
+  schema = Schema({entity})
+
+  options = SampleDataOptions(cache_dir=str(tmp_path), seed=7)
+
+  first = generate_sample_data(schema, options)
+  second = generate_sample_data(schema, options)
+
+  assert len(os.listdir(tmp_path)) == 1
+  assert first['customer'].equals(second['customer'])
+  assert first['customer'].equals(
+    generate_sample_data(schema, SampleDataOptions(seed=7))['customer']
+  )
+
+
+def test_cache_requires_seed(tmp_path, entity):
+  with pytest.raises(ValueError):
+    generate_sample_data(Schema({entity}), SampleDataOptions(cache_dir=str(tmp_path)))
+
+
+def test_cache_depends_on_chunks(tmp_path, entity):
+  schema = Schema({entity})
+
+  cache_dir = str(tmp_path / 'cache')
+
+  for chunk_size in (1, 2):
+    options = SampleDataOptions(
+      cache_dir=cache_dir,
+      chunk_size=chunk_size,
+      output_dir=str(tmp_path / 'output'),
+      seed=7,
+    )
+
+    cached = generate_sample_data(schema, options)['customer']
+
+    options = SampleDataOptions(
+      chunk_size=chunk_size, output_dir=str(tmp_path / f'fresh-{chunk_size}'), seed=7
+    )
+
+    assert cached.equals(generate_sample_data(schema, options)['customer'])
+
+  assert len(os.listdir(cache_dir)) == 2
+
+
+@pytest.mark.parametrize('output_format', list(SampleDataFormat))
+def test_cache_hits_are_written_to_output_dir(tmp_path, entity, output_format):
+  schema = Schema({entity})
+
+  for output_dir in ('cold', 'warm'):
+    options = SampleDataOptions(
+      cache_dir=str(tmp_path / 'cache'),
+      output_dir=str(tmp_path / output_dir),
+      output_format=output_format,
+      seed=7,
+    )
+
+    generate_sample_data(schema, options)
+
+  path = f'customer.{output_format.value}'
+
+  assert read_entity_data(str(tmp_path / 'warm' / path), output_format).equals(
+    read_entity_data(str(tmp_path / 'cold' / path), output_format)
+  )
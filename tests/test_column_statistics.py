@@ -0,0 +1,59 @@
+import random
+
+import pandas as pd
+import pytest
+
+from pqg.column_statistics import ColumnStatistics, StatisticsCatalog
+from pqg.query_structure import QueryStructure
+
+
+@pytest.fixture
+def statistics():
+  return ColumnStatistics.from_series(pd.Series(['a'] * 50 + ['b'] * 30 + ['c'] * 20))
+
+
+class TestColumnStatistics:
+  def test_quantiles(self):
+    statistics = ColumnStatistics.from_series(pd.Series(range(1001)), num_quantiles=10)
+
+    assert statistics.quantiles == list(range(0, 1001, 100))
+    assert statistics.quantile(0) == 0
+    assert statistics.quantile(0.5) == 500
+    assert statistics.quantile(1) == 1000
+
+  def test_most_common(self, statistics):
+    assert statistics.most_common == [('a', 0.5), ('b', 0.3), ('c', 0.2)]
+    assert statistics.distinct_count == 3
+
+  def test_value_with_frequency(self, statistics):
+    rng = random.Random(0)
+
+    assert statistics.value_with_frequency(rng, 0.25, 0.4) == 'b'
+    assert statistics.value_with_frequency(rng, 0.6, 0.9) is None
+
+  def test_values_with_frequency(self, statistics):
+    rng = random.Random(0)
+
+    for _ in range(10):
+      values = statistics.values_with_frequency(rng, 0.7, 0.8)
+      assert sorted(values) in (['a', 'b'], ['a', 'c'])
+
+    assert statistics.values_with_frequency(rng, 0.05, 0.1) is None
+
+  def test_empty_column(self):
+    assert ColumnStatistics.from_series(pd.Series([None, None])) is None
+
+
+def test_catalog_samples_large_entities():
+  catalog = StatisticsCatalog.from_sample_data(
+    {'numbers': pd.DataFrame({'x': range(10000)})}, max_sample_rows=100
+  )
+
+  assert 'numbers' in catalog
+  assert catalog['numbers']['x'].distinct_count == 100
+  assert catalog.get('numbers', 'y') is None
+
+
+def test_invalid_selectivity():
+  with pytest.raises(ValueError):
+    QueryStructure(0, 0, 0, 0, 1, 0, 1, selectivity=(0.6, 0.2))
@@ -0,0 +1,148 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pqg.entity import (
+  Entity,
+  PropertyDate,
+  PropertyEnum,
+  PropertyFloat,
+  PropertyInt,
+  PropertyString,
+)
+
+
+@pytest.fixture
+def entity():
+  return Entity(
+    name='customer',
+    primary_key='id',
+    properties={
+      'id': PropertyInt(min=1, max=500),
+      'age': PropertyInt(min=18, max=80),
+      'balance': PropertyFloat(min=0.0, max=100.0),
+      'name': PropertyString(starting_character=['A', 'B', 'C']),
+      'status': PropertyEnum(values=['active', 'inactive']),
+      'joined': PropertyDate(min=date(2020, 1, 1), max=date(2020, 12, 31)),
+    },
+    foreign_keys={},
+  )
+
+
+class TestGenerateDataframe:
+  def test_row_count_limited_by_primary_key(self, entity):
+    df = entity.generate_dataframe(num_rows=1000)
+
+    assert len(df) == 500
+    assert df['id'].tolist() == list(range(1, 501))
+
+  def test_row_count(self, entity):
+    df = entity.generate_dataframe(num_rows=100)
+
+    assert len(df) == 100
+    assert list(df.columns) == list(entity.properties)
+
+  def test_values_within_ranges(self, entity):
+    df = entity.generate_dataframe(num_rows=200)
+
+    assert df['age'].between(18, 80).all()
+    assert df['balance'].between(0.0, 100.0).all()
+    assert (df['balance'] == df['balance'].round(2)).all()
+    assert df['status'].isin(['active', 'inactive']).all()
+
+  def test_string_values(self, entity):
+    df = entity.generate_dataframe(num_rows=200)
+
+    assert df['name'].str.len().eq(10).all()
+    assert df['name'].str[0].isin(['A', 'B', 'C']).all()
+    assert df['name'].str[1:].str.isalpha().all()
+
+  def test_date_values(self, entity):
+    df = entity.generate_dataframe(num_rows=200)
+
+    assert df['joined'].str.match(r'^\d{4}-\d{2}-\d{2}$').all()
+    assert df['joined'].between('2020-01-01', '2020-12-31').all()
+
+  def test_large_ranges_are_clamped(self):
+    entity = Entity(
+      name='numbers',
+      primary_key=None,
+      properties={'i': PropertyInt(min=-(2**40), max=2**40), 'f': PropertyFloat(-1e308, 1e308)},
+      foreign_keys={},
+    )
+
+    df = entity.generate_dataframe(num_rows=100)
+
+    assert df['i'].between(-1000000, 1000000).all()
+    assert df['f'].between(-1000000, 1000000).all()
+
+  def test_reproducible_with_rng(self, entity):
+    first = entity.generate_dataframe(num_rows=50, rng=np.random.default_rng(42))
+    second = entity.generate_dataframe(num_rows=50, rng=np.random.default_rng(42))
+
+    assert first.equals(second)
+
+  def test_typed_dtypes(self, entity):
+    df = entity.generate_dataframe(num_rows=200, rng=np.random.default_rng(1), typed=True)
+
+    assert df['id'].dtype == np.int16
+    assert df['age'].dtype == np.int8
+    assert isinstance(df['status'].dtype, pd.CategoricalDtype)
+    assert list(df['status'].cat.categories) == ['active', 'inactive']
+    assert pd.api.types.is_string_dtype(df['name'])
+    assert pd.api.types.is_datetime64_dtype(df['joined'])
+
+    untyped = entity.generate_dataframe(num_rows=200, rng=np.random.default_rng(1))
+
+    assert (df['status'].astype(str) == untyped['status']).all()
+    assert (df['joined'].dt.strftime('%Y-%m-%d') == untyped['joined']).all()
+    assert (df['name'].astype(str) == untyped['name']).all()
+
+  def test_zero_rows(self, entity):
+    assert entity.generate_dataframe(num_rows=0).empty
+
+  def test_unique_primary_key(self, entity):
+    df = entity.generate_dataframe(num_rows=120)
+
+    assert df['id'].is_unique
+    assert df['id'].between(1, 500).all()
+
+  def test_foreign_keys_reference_existing_rows(self, entity):
+    order = Entity(
+      name='order',
+      primary_key='order_id',
+      properties={
+        'order_id': PropertyInt(min=1, max=1000),
+        'customer_id': PropertyInt(min=1, max=1000000),
+      },
+      foreign_keys={'customer_id': ['id', 'customer']},
+    )
+
+    customers = entity.generate_dataframe(num_rows=50)
+
+    orders = order.generate_dataframe(num_rows=500, references={'customer': customers})
+
+    assert orders['customer_id'].isin(customers['id']).all()
+
+  def test_composite_foreign_keys_reference_existing_rows(self):
+    supply = Entity(
+      name='supply',
+      primary_key=['part', 'supplier'],
+      properties={'part': PropertyInt(min=1, max=1000), 'supplier': PropertyInt(min=1, max=1000)},
+      foreign_keys={},
+    )
+
+    item = Entity(
+      name='item',
+      primary_key=None,
+      properties={'part': PropertyInt(min=1, max=1000), 'supplier': PropertyInt(min=1, max=1000)},
+      foreign_keys={'part': ['part', 'supply'], 'supplier': ['supplier', 'supply']},
+    )
+
+    supplies = supply.generate_dataframe(num_rows=100)
+
+    items = item.generate_dataframe(num_rows=300, references={'supply': supplies})
+
+    assert len(items.merge(supplies, on=['part', 'supplier'])) >= 300
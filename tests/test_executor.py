@@ -0,0 +1,164 @@
+import inspect
+import os
+import signal
+import time
+from multiprocessing import pool as mp_pool
+
+import pandas as pd
+import pytest
+
+from pqg import limits
+from pqg.executor import POOL_WORKER_PARAMETERS, Executor, worker_query_limits, worker_state
+from pqg.generator import GenerateOptions, Generator
+from pqg.limits import QueryLimits, Timeout, enforce
+from pqg.merge import Merge
+from pqg.query import Query
+from pqg.query_pool import QueryPool
+from pqg.query_structure import QueryStructure
+from pqg.schema import Schema
+
+
+def row_count(_, sample_data, name):
+  return len(sample_data[name])
+
+
+def process_id(*_):
+  return os.getpid()
+
+
+def held_state(*_):
+  return worker_state()
+
+
+def limited_sleep(_, sample_data, seconds):
+  try:
+    with enforce(worker_query_limits()):
+      time.sleep(seconds)
+  except Timeout:
+    pass
+
+  return os.getpid()
+
+
+@pytest.fixture
+def sample_data():
+  return {'a': pd.DataFrame({'x': range(3)}), 'b': pd.DataFrame({'x': range(5)})}
+
+
+class TestExecutor:
+  def test_map(self, sample_data):
+    with Executor(sample_data, processes=2) as executor:
+      assert list(executor.map(row_count, ['a', 'b', 'a'])) == [3, 5, 3]
+
+  def test_workers_are_reused(self, sample_data):
+    with Executor(sample_data, processes=2) as executor:
+      first = set(executor.map(process_id, range(20)))
+      second = set(executor.map(process_id, range(20)))
+
+      assert first | second <= {process.pid for process in executor.pool._pool}
+
+  def test_state_is_held_by_workers(self, sample_data):
+    with Executor(sample_data, processes=2, state={'y': 1}) as executor:
+      assert list(executor.map(held_state, range(4))) == [{'y': 1}] * 4
+
+  def test_restarts_after_close(self, sample_data):
+    executor = Executor(sample_data, processes=1)
+
+    executor.close()
+
+    assert list(executor.map(row_count, ['b'])) == [5]
+
+    executor.close()
+
+
+class TestQueryLimits:
+  @pytest.fixture
+  def structure(self):
+    return QueryStructure(0, 0, 1, 0, 0, 0, 0)
+
+  def test_timeouts_are_reported(self, structure, mocker):
+    mocker.patch('pqg.query_pool.interpret', side_effect=lambda *_: time.sleep(1))
+
+    query = Query('a', [], False, {'x'})
+
+    with QueryPool(
+      [query, query], structure, {'a': pd.DataFrame()}, query_limits=QueryLimits(timeout=0.1)
+    ) as pool:
+      results = pool.execute(num_processes=1)
+
+    assert [error for _, error in results] == ['Timeout: Query exceeded 0.1 seconds'] * 2
+
+  def test_memory_limits_are_reported(self, structure):
+    frame = pd.DataFrame({'x': [0] * 3000})
+
+    query = Query('a', [Merge(Query('a', [], False, {'x'}), "'x'", "'x'")], False, {'x'})
+
+    with QueryPool(
+      [query], structure, {'a': frame}, query_limits=QueryLimits(memory=16 << 20)
+    ) as pool:
+      ((result, error),) = pool.execute(num_processes=1)
+
+    assert result is None and error == 'MemoryLimit: Query exceeded 16 MB'
+
+  def test_workers_are_recycled(self, sample_data):
+    with Executor(sample_data, processes=1, query_limits=QueryLimits(timeout=0.1)) as executor:
+      first, second, third, fourth = executor.map(limited_sleep, [0, 0, 1, 0], 1)
+
+    assert first == second == third != fourth
+
+  def test_pool_worker_signature_is_supported(self):
+    parameters = tuple(inspect.signature(mp_pool.worker).parameters)
+
+    assert (
+      parameters == POOL_WORKER_PARAMETERS
+    ), 'multiprocessing.pool.worker changed, check _run_worker against this Python version'
+
+  def test_workers_are_replaced_without_recycling(self, sample_data, mocker):
+    mocker.patch('pqg.executor._supports_recycling', return_value=False)
+
+    with Executor(sample_data, processes=1, query_limits=QueryLimits(timeout=0.1)) as executor:
+      first, second, third = executor.map(limited_sleep, [0, 1, 0], 1)
+
+    assert len({first, second, third}) == 3
+
+  def test_late_timeouts_mark_the_worker(self, mocker):
+    mocker.patch.object(limits, '_violated', False)
+
+    def setitimer(_, seconds):
+      # The alarm goes off after the query, right before the timer is cancelled
+      if seconds == 0:
+        signal.getsignal(signal.SIGALRM)(signal.SIGALRM, None)
+
+    mocker.patch('signal.setitimer', side_effect=setitimer)
+
+    with pytest.raises(Timeout), enforce(QueryLimits(timeout=1)):
+      pass
+
+    assert limits.violated()
+
+  def test_unsupported_platforms_are_rejected(self, mocker):
+    mocker.patch('sys.platform', 'darwin')
+
+    with pytest.raises(ValueError, match='only supported on Linux'):
+      QueryLimits(memory=16 << 20)
+
+    assert QueryLimits(timeout=1)
+
+
+def test_generator_shares_executor():
+  schema = Schema.from_dict(
+    {'entities': {'a': {'properties': {'x': {'type': 'int', 'min': 0, 'max': 9}}}}}
+  )
+
+  structure = QueryStructure(0.5, 1, 0, 1, 1, 0.5, 0.5)
+
+  with Generator(schema, structure) as generator:
+    query_pool = generator.generate(GenerateOptions(num_queries=10))
+    pool = generator.executor.pool
+
+    query_pool.execute()
+    generator.generate(GenerateOptions(num_queries=10))
+
+    assert generator.executor.pool is pool
+
+  assert generator.executor._pool is None
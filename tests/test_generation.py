@@ -1,9 +1,13 @@
+import asyncio
+import itertools
 import pathlib
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
+import pandas as pd
 import pytest
 
 from pqg.generator import GenerateOptions, Generator
+from pqg.query_pool import GenerationStatistics, QueryPool, QueryResult
 from pqg.query_structure import QueryStructure
 from pqg.schema import Schema
 
@@ -41,6 +45,14 @@ def query_structure() -> QueryStructure:
   )
 
 
+@pytest.fixture
+def generator(query_structure: QueryStructure) -> Iterator[Generator]:
+  with Generator(
+    Schema.from_file(str(EXAMPLES_DIR / 'customer' / 'schema.json')), query_structure
+  ) as generator:
+    yield generator
+
+
 def test_schema_query_generation_and_execution(
   schema_fixture: Tuple[str, Schema], query_structure: QueryStructure
 ):
@@ -72,3 +84,245 @@ def test_schema_query_generation_and_execution(
     f'Too few non-empty results in {example_name} schema. '
     f'Expected at least {min_non_empty_ratio:.1%}, got {actual_ratio:.1%}'
   )
+
+
+def test_seeded_generation_is_reproducible(
+  schema_fixture: Tuple[str, Schema], query_structure: QueryStructure
+):
+  _, schema = schema_fixture
+
+  with Generator(schema, query_structure) as generator:
+    serial = generator.generate(GenerateOptions(multi_processing=False, num_queries=20, seed=5))
+    parallel = generator.generate(GenerateOptions(multi_processing=True, num_queries=20, seed=5))
+
+    queries = [str(query) for query in serial]
+
+    assert queries == [str(query) for query in parallel]
+    assert len(set(queries)) > 1
+
+    assert str(generator.generate_query(GenerateOptions(seed=5), 7)) == queries[7]
+
+    other = generator.generate(GenerateOptions(multi_processing=False, num_queries=20, seed=6))
+
+  assert queries != [str(query) for query in other]
+
+
+def test_selectivity_guided_selections(schema_fixture: Tuple[str, Schema]):
+  _, schema = schema_fixture
+
+  query_structure = QueryStructure(
+    groupby_aggregation_probability=0,
+    max_groupby_columns=0,
+    max_merges=0,
+    max_projection_columns=0,
+    max_selection_conditions=1,
+    projection_probability=0,
+    selection_probability=1,
+    selectivity=(0.2, 0.6),
+  )
+
+  with Generator(schema, query_structure) as generator:
+    query_pool = generator.generate(GenerateOptions(multi_processing=False, num_queries=50, seed=1))
+
+    for query, (result, error) in query_pool.items():
+      assert error is None
+      assert not result.empty, f'Guided selection selected no rows\nQuery: {str(query)}'
+
+
+class TestEnsureNonEmptyBudget:
+  @pytest.fixture
+  def always_empty(self, mocker):
+    return mocker.patch(
+      'pqg.query_pool.QueryPool._execute_single_query', return_value=(pd.DataFrame(), None)
+    )
+
+  def test_per_query_budget(self, generator, always_empty):
+    options = GenerateOptions(
+      candidates_per_attempt=2,
+      ensure_non_empty=True,
+      max_attempts=4,
+      multi_processing=False,
+      num_queries=3,
+    )
+
+    query_pool = generator.generate(options)
+
+    assert len(query_pool) == 0
+    assert always_empty.call_count == 3 * 4 * 2
+    assert query_pool._generation_statistics == GenerationStatistics(
+      requested=3, attempts=12, failed=3
+    )
+
+  def test_total_budget(self, generator, always_empty):
+    options = GenerateOptions(
+      ensure_non_empty=True,
+      max_attempts=4,
+      max_total_attempts=5,
+      multi_processing=False,
+      num_queries=3,
+    )
+
+    statistics = generator.generate(options)._generation_statistics
+
+    assert statistics == GenerationStatistics(
+      requested=3, attempts=8, failed=3, budget_exhausted=True
+    )
+    assert 'Total attempt budget exhausted' in str(statistics)
+
+  def test_first_non_empty_candidate_is_kept(self, generator, mocker):
+    mocker.patch(
+      'pqg.query_pool.QueryPool._execute_single_query',
+      side_effect=[(pd.DataFrame(), None), (pd.DataFrame({'a': [1]}), None)] * 3,
+    )
+
+    options = GenerateOptions(
+      candidates_per_attempt=2, ensure_non_empty=True, multi_processing=False, num_queries=3
+    )
+
+    query_pool = generator.generate(options)
+
+    assert len(query_pool) == 3
+    assert query_pool._generation_statistics.attempts == 3
+
+
+class TestUnique:
+  @pytest.fixture
+  def query_structure(self) -> QueryStructure:
+    return QueryStructure(
+      groupby_aggregation_probability=0,
+      max_groupby_columns=0,
+      max_merges=0,
+      max_projection_columns=1,
+      max_selection_conditions=0,
+      projection_probability=0.5,
+      selection_probability=0,
+    )
+
+  @pytest.mark.parametrize('vectorized', [False, True])
+  def test_duplicates_are_replaced(self, generator, vectorized):
+    options = GenerateOptions(
+      multi_processing=False, num_queries=8, seed=2, unique=True, vectorized=vectorized
+    )
+
+    query_pool = generator.generate(options)
+
+    queries = [str(query) for query in query_pool]
+
+    assert len(queries) == 8
+    assert len(set(queries)) == 8
+
+    statistics = query_pool._generation_statistics
+
+    assert statistics.failed == 0
+    assert statistics.duplicates > 0
+    assert 'Duplicates' in str(statistics)
+
+  def test_unique_pool_is_reproducible(self, generator):
+    options = GenerateOptions(multi_processing=False, num_queries=8, seed=2, unique=True)
+
+    serial = [str(query) for query in generator.generate(options)]
+
+    options.multi_processing = True
+
+    assert serial == [str(query) for query in generator.generate(options)]
+
+  @pytest.mark.parametrize('vectorized', [False, True])
+  def test_exhausted_query_space(self, generator, vectorized):
+    num_distinct = sum(len(entity.properties) + 1 for entity in generator.schema.entities)
+
+    options = GenerateOptions(
+      max_attempts=50,
+      multi_processing=False,
+      num_queries=num_distinct + 3,
+      seed=0,
+      unique=True,
+      vectorized=vectorized,
+    )
+
+    query_pool = generator.generate(options)
+
+    assert len(query_pool) == num_distinct
+    assert query_pool._generation_statistics.failed == 3
+
+
+class TestIterQueries:
+  @pytest.mark.parametrize('vectorized', [False, True])
+  @pytest.mark.parametrize('multi_processing', [False, True])
+  def test_queries_match_generate(self, generator, vectorized, multi_processing):
+    options = GenerateOptions(
+      multi_processing=multi_processing, num_queries=50, seed=5, vectorized=vectorized
+    )
+
+    streamed = [str(query) for query in generator.iter_queries(options)]
+
+    assert streamed == [str(query) for query in generator.generate(options)]
+
+  def test_statistics_are_updated(self, generator, mocker):
+    mocker.patch(
+      'pqg.query_pool.QueryPool._execute_single_query', return_value=(pd.DataFrame(), None)
+    )
+
+    options = GenerateOptions(
+      ensure_non_empty=True,
+      max_attempts=2,
+      max_total_attempts=3,
+      multi_processing=False,
+      num_queries=3,
+    )
+
+    statistics = GenerationStatistics(requested=3)
+
+    assert list(generator.iter_queries(options, statistics)) == []
+    assert statistics == GenerationStatistics(
+      requested=3, attempts=4, failed=3, budget_exhausted=True
+    )
+
+  def test_generation_follows_consumption(self, generator, mocker):
+    build = mocker.spy(Generator, '_generate_single_query')
+
+    queries = generator.iter_queries(GenerateOptions(multi_processing=False, num_queries=10**9))
+
+    assert len(list(itertools.islice(queries, 3))) == 3
+    assert build.call_count == 3
+
+
+class TestAsync:
+  @pytest.mark.parametrize('multi_processing', [False, True])
+  def test_concurrent_generations_match_generate(self, generator, multi_processing):
+    options = [
+      GenerateOptions(multi_processing=multi_processing, num_queries=30, seed=seed)
+      for seed in range(3)
+    ]
+
+    async def generate_all() -> List[QueryPool]:
+      return await asyncio.gather(*(generator.agenerate(o) for o in options))
+
+    pools = asyncio.run(generate_all())
+
+    for o, query_pool in zip(options, pools):
+      assert list(query_pool) == list(generator.generate(o))
+
+  def test_execution_and_progress(self, generator):
+    progress: List[int] = []
+
+    async def report(done: int, total: int) -> None:
+      assert total == 20
+      progress.append(done)
+
+    options = GenerateOptions(multi_processing=False, num_queries=20, seed=0)
+
+    async def run() -> List[QueryResult]:
+      query_pool = await generator.agenerate(options, progress=report)
+      return await query_pool.aexecute(progress=report)
+
+    results = asyncio.run(run())
+
+    assert len(results) == 20
+    assert all(error is None for _, error in results)
+    assert progress[-1] == 20
+
+  def test_timeout(self, generator):
+    options = GenerateOptions(multi_processing=False, num_queries=10**9)
+
+    with pytest.raises(TimeoutError):
+      asyncio.run(generator.agenerate(options, timeout=0.2))
@@ -22,3 +22,7 @@ class TestGroupByAggregation:
       expected = f".groupby(by=['country']).agg('{agg}'"
       expected += ', numeric_only=True)' if agg != 'count' else ')'
       assert groupby.apply('customer') == expected
+
+  def test_observed_groupby(self):
+    groupby = GroupByAggregation(['status'], 'count', observed=True)
+    assert groupby.apply('customer') == ".groupby(by=['status'], observed=True).agg('count')"
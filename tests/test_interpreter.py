@@ -0,0 +1,110 @@
+import pathlib
+from typing import List, Tuple
+
+import pandas as pd
+import pytest
+
+from pqg.generator import GenerateOptions, Generator
+from pqg.interpreter import interpret
+from pqg.query import Query
+from pqg.query_pool import QueryPool
+from pqg.query_structure import QueryStructure
+from pqg.sample_data import SampleDataOptions
+from pqg.schema import Schema
+from pqg.selection import Selection
+
+EXAMPLES_DIR = pathlib.Path(__file__).parent.parent / 'examples'
+
+
+def find_schema_files() -> List[Tuple[str, pathlib.Path]]:
+  return sorted(
+    (example_dir.name, example_dir / 'schema.json')
+    for example_dir in EXAMPLES_DIR.iterdir()
+    if (example_dir / 'schema.json').exists()
+  )
+
+
+@pytest.fixture(params=find_schema_files(), ids=lambda x: x[0])
+def schema(request) -> Schema:
+  return Schema.from_file(str(request.param[1]))
+
+
+@pytest.fixture
+def query_structure() -> QueryStructure:
+  return QueryStructure(
+    groupby_aggregation_probability=0.5,
+    max_groupby_columns=3,
+    max_merges=3,
+    max_projection_columns=5,
+    max_selection_conditions=5,
+    projection_probability=0.5,
+    selection_probability=0.8,
+  )
+
+
+@pytest.mark.parametrize('typed', [False, True], ids=['object', 'typed'])
+@pytest.mark.parametrize('vectorized', [False, True], ids=['scalar', 'vectorized'])
+def test_results_equal_evaluated_code(
+  schema: Schema, query_structure: QueryStructure, typed: bool, vectorized: bool
+):
+  generator = Generator(
+    schema, query_structure, sample_data_options=SampleDataOptions(seed=3, typed=typed)
+  )
+
+  options = GenerateOptions(multi_processing=False, num_queries=60, seed=1, vectorized=vectorized)
+
+  for query in generator.generate(options):
+    expected, expected_error = QueryPool._evaluate_single_query(query, generator.sample_data)
+    result, error = QueryPool._execute_single_query(query, generator.sample_data)
+
+    if expected_error is not None:
+      assert error is not None and error.split(':')[0] == expected_error.split(':')[0], str(query)
+    elif isinstance(expected, pd.Series):
+      pd.testing.assert_series_equal(result, expected)
+    else:
+      pd.testing.assert_frame_equal(result, expected)
+
+
+def test_and_binds_tighter_than_or():
+  sample_data = {'t': pd.DataFrame({'a': [1, 2, 3, 4], 'b': [1, 0, 1, 0]})}
+
+  query = Query(
+    't',
+    [
+      Selection(
+        [("'a'", '==', 1, '|'), ("'a'", '>=', 3, '&'), ("'b'", '==', 1, '&'), ("'a'", '<', 4, None)]
+      )
+    ],
+    False,
+    {'a', 'b'},
+  )
+
+  assert interpret(query, sample_data)['a'].tolist() == [1, 3]
+  assert interpret(query, sample_data).equals(
+    QueryPool._evaluate_single_query(query, sample_data)[0]
+  )
+
+
+def test_literals_are_converted():
+  sample_data = {
+    't': pd.DataFrame(
+      {'day': pd.to_datetime(['2020-01-01', '2021-06-01']), 'name': ['ab', 'cd']},
+    )
+  }
+
+  query = Query(
+    't',
+    [
+      Selection(
+        [
+          ("'day'", '>', "pd.Timestamp('2020-03-01')", '&'),
+          ("'name'", '.isin', "['cd', 'x']", '&'),
+          ("'name'", '.str.startswith', '"c"', None),
+        ]
+      )
+    ],
+    False,
+    {'day', 'name'},
+  )
+
+  assert interpret(query, sample_data)['name'].tolist() == ['cd']
@@ -0,0 +1,43 @@
+import multiprocessing as mp
+
+import pytest
+
+from pqg.parallel import imap_batched
+
+
+def square(x: int) -> int:
+  return x * x
+
+
+def fail(x: int) -> int:
+  raise ZeroDivisionError(x)
+
+
+@pytest.fixture(scope='module')
+def pool():
+  with mp.get_context('fork').Pool(2) as pool:
+    yield pool
+
+
+class TestImapBatched:
+  @pytest.mark.parametrize('batch_size', [None, 1, 7])
+  def test_ordered(self, pool, batch_size):
+    results = list(imap_batched(pool, square, range(100), 2, batch_size))
+
+    assert results == [(i, i * i) for i in range(100)]
+
+  def test_unordered(self, pool):
+    results = list(imap_batched(pool, square, range(100), 2, ordered=False))
+
+    assert sorted(results) == [(i, i * i) for i in range(100)]
+
+  def test_empty(self, pool):
+    assert list(imap_batched(pool, square, [], 2)) == []
+
+  def test_error(self, pool):
+    with pytest.raises(ZeroDivisionError):
+      list(imap_batched(pool, fail, range(10), 2))
+
+  def test_invalid_batch_size(self, pool):
+    with pytest.raises(ValueError):
+      list(imap_batched(pool, square, range(10), 2, batch_size=0))
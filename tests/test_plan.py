@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from pqg.merge import Merge
+from pqg.plan import GenerationPlan
+from pqg.query_builder import QueryBuilder
+from pqg.query_structure import QueryStructure
+from pqg.schema import Schema
+
+
+@pytest.fixture
+def schema():
+  return Schema.from_dict(
+    {
+      'entities': {
+        'region': {'properties': {'r_id': {'type': 'int'}, 'name': {'type': 'string'}}},
+        'nation': {
+          'properties': {'n_id': {'type': 'int'}, 'region': {'type': 'int'}},
+          'foreign_keys': {'region': ['r_id', 'region']},
+        },
+        'customer': {
+          'properties': {'c_id': {'type': 'int'}, 'nation': {'type': 'int'}},
+          'foreign_keys': {'nation': ['n_id', 'nation'], 'missing': ['id', 'unknown']},
+        },
+      }
+    }
+  )
+
+
+class TestGenerationPlan:
+  def test_column_ids(self, schema):
+    plan = schema.plan
+
+    assert plan.column_names == ('c_id', 'n_id', 'name', 'nation', 'r_id', 'region')
+    assert plan.column_bits['c_id'] == 1
+    assert plan.column_bits['region'] == 1 << 5
+
+  def test_entities(self, schema):
+    plan = schema.plan
+
+    assert [entity_plan.entity.name for entity_plan in plan.entities] == [
+      'customer',
+      'nation',
+      'region',
+    ]
+
+    customer = plan.entity_plans['customer']
+
+    assert plan.names(customer.columns) == ('c_id', 'nation')
+    assert customer.joins == (
+      (plan.column_bits['nation'], 'nation', 'n_id', 'nation', 1 << 1),
+      (0, 'missing', 'id', 'unknown', 0),
+    )
+
+  def test_mask_and_names(self, schema):
+    plan = schema.plan
+
+    mask = plan.mask(['region', 'c_id', 'name'])
+
+    assert plan.names(mask) == ('c_id', 'name', 'region')
+    assert plan.names(mask | plan.mask(['c_id'])) == ('c_id', 'name', 'region')
+    assert plan.names(mask & ~plan.mask(['name'])) == ('c_id', 'region')
+    assert plan.names(0) == ()
+
+  def test_names_cache_is_bounded(self, schema, mocker):
+    mocker.patch('pqg.plan.MAX_CACHED_MASKS', 2)
+
+    plan = GenerationPlan(schema)
+
+    for mask in range(1, 6):
+      assert len(plan.names(mask)) == mask.bit_count()
+      assert len(plan._names) <= 2
+
+
+class TestQueryBuilder:
+  def test_merges_never_repeat_an_entity(self, schema):
+    query_structure = QueryStructure(
+      groupby_aggregation_probability=0,
+      max_groupby_columns=0,
+      max_merges=3,
+      max_projection_columns=2,
+      max_selection_conditions=2,
+      projection_probability=0.5,
+      selection_probability=0.5,
+    )
+
+    rng = random.Random(0)
+
+    for _ in range(200):
+      query = QueryBuilder(schema, query_structure, False, rng=rng).build()
+
+      entities, pending = [], [query]
+
+      while pending:
+        current = pending.pop()
+        entities.append(current.entity)
+        pending.extend(op.right for op in current.operations if isinstance(op, Merge))
+
+      assert len(entities) == len(set(entities))
+      assert query.merge_entities == set(entities)
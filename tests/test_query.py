@@ -1,3 +1,5 @@
+from dataclasses import FrozenInstanceError
+
 import pytest
 
 from pqg.group_by_aggregation import GroupByAggregation
@@ -217,6 +219,46 @@ class TestQuery:
     assert expected_single_line in result_strings
     assert expected_multi_line in result_strings
 
+  def test_fingerprint(self, sample_entity, simple_selection, simple_projection):
+    query = Query(sample_entity, [simple_selection], False, {'age', 'status'})
+
+    assert query.fingerprint == Query(sample_entity, [simple_selection], False, set()).fingerprint
+    assert query.fingerprint == Query(sample_entity, [simple_selection], True, set()).fingerprint
+    assert 0 <= query.fingerprint < 1 << 64
+
+    other = Query(sample_entity, [simple_selection, simple_projection], False, {'age'})
+
+    assert query.fingerprint != other.fingerprint
+
+  def test_frozen(self, sample_entity, simple_selection):
+    query = Query(sample_entity, [simple_selection], False, {'age', 'status'})
+
+    with pytest.raises(FrozenInstanceError):
+      query.multi_line = True  # type: ignore
+
+    with pytest.raises(FrozenInstanceError):
+      simple_selection.conditions = []  # type: ignore
+
+  def test_rendering_is_cached(self, sample_entity, simple_selection, mocker):
+    merge = Merge(Query('orders', [simple_selection], False, set()), "'id'", "'id'")
+
+    query = Query(sample_entity, [simple_selection, merge], True, set())
+
+    apply = mocker.spy(Selection, 'apply')
+
+    expected = str(query)
+
+    assert apply.call_count == 2
+
+    assert str(query) == expected
+    assert sorted([query, query]) == [query, query]
+    assert {query} == {query}
+    assert query.code == query.code
+    assert query.complexity == query.complexity
+    assert query.merge_entities == frozenset({'customer', 'orders'})
+
+    assert apply.call_count == 4
+
   def test_merge_count(self, sample_entity):
     single_merge = Query(
       sample_entity, [Merge(Query('orders', [], False, set()), "'id'", "'id'")], False, {'id'}
@@ -238,3 +280,7 @@ class TestQuery:
     )
 
     assert nested_merge.merge_count == 2
+
+    deeply_nested_merge = Query(sample_entity, [Merge(nested_merge, "'id'", "'id'")], False, {'id'})
+
+    assert deeply_nested_merge.merge_count == 3
@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
@@ -9,6 +11,7 @@ from pqg.projection import Projection
 from pqg.query import Query
 from pqg.query_pool import QueryPool
 from pqg.query_structure import QueryStructure
+from pqg.result_summary import ResultSummary
 from pqg.selection import Selection
 
 
@@ -89,6 +92,19 @@ class TestQueryPoolExecution:
 
     assert_frame_equal(result, expected)
 
+  def test_timestamp_selection(self, query_structure):
+    sample_data = {'events': pd.DataFrame({'day': pd.to_datetime(['2020-01-01', '2020-01-02'])})}
+
+    selection = Selection([("'day'", '==', "pd.Timestamp('2020-01-01')", None)])
+
+    for multi_line in (False, True):
+      query = Query('events', [selection], multi_line, {'day'})
+
+      result, error = QueryPool([query], query_structure, sample_data).execute()[0]
+
+      assert error is None
+      assert len(result) == 1
+
   def test_simple_projection(self, sample_dataframes, query_structure, simple_projection):
     pool = QueryPool([simple_projection], query_structure, sample_dataframes)
     results = pool.execute()
@@ -198,6 +214,72 @@ class TestQueryPoolFilter:
     assert pool._queries == [bad_query]
 
 
+class TestQueryPoolSummaries:
+  @pytest.fixture
+  def queries(self, simple_selection, simple_projection, simple_groupby):
+    return [
+      simple_selection,
+      simple_projection,
+      simple_groupby,
+      Query('customers', [Selection([("'age'", '>', 100, None)])], False, {'age'}),
+      Query('customers', [Selection([("'nonexistent'", '>=', 30, None)])], False, {'nonexistent'}),
+    ]
+
+  @pytest.mark.parametrize('multi_processing', [False, True])
+  def test_summaries_describe_results(
+    self, sample_dataframes, query_structure, queries, multi_processing
+  ):
+    with QueryPool(queries, query_structure, sample_dataframes, multi_processing) as pool:
+      results = pool.execute(num_processes=1)
+
+    with QueryPool(
+      queries, query_structure, sample_dataframes, multi_processing, summarize=True
+    ) as pool:
+      summaries = pool.execute(num_processes=1)
+
+    for (result, error), (summary, summary_error) in zip(results, summaries):
+      assert isinstance(summary, ResultSummary)
+      assert summary.error == summary_error == error
+      assert summary.elapsed > 0
+
+      if error is None:
+        assert summary.rows == len(result)
+        assert summary == replace(
+          ResultSummary.from_result(result, None, 0), elapsed=summary.elapsed
+        )
+
+    assert summaries[0][0].columns == 4 and summaries[0][0].dtypes == ('int64', 'object') * 2
+    assert summaries[2][0].rows == 2 and summaries[3][0].empty
+    assert summaries[4][0].error_class == 'KeyError' and summaries[4][0].rows is None
+
+  def test_hashes_identify_contents(self, sample_dataframes):
+    frame = sample_dataframes['customers']
+
+    def hash(result):
+      return ResultSummary.from_result(result, None, 0).hash
+
+    assert hash(frame) == hash(frame.copy())
+    assert hash(frame) != hash(frame.iloc[::-1])
+    assert hash(frame) != hash(frame.rename(columns={'age': 'years'}))
+    assert hash(frame['age']) != hash(frame['id'])
+    assert ResultSummary.from_result(frame['age'], None, 0).columns is None
+
+  def test_filter_and_statistics(self, sample_dataframes, query_structure, queries):
+    pool = QueryPool(queries, query_structure, sample_dataframes, False)
+    summarized = QueryPool(queries, query_structure, sample_dataframes, False, summarize=True)
+
+    assert str(summarized.statistics()) == str(pool.statistics())
+
+    for query_filter in QueryFilter:
+      pool = QueryPool(queries, query_structure, sample_dataframes, False)
+      summarized = QueryPool(queries, query_structure, sample_dataframes, False, summarize=True)
+
+      pool.filter(query_filter)
+      summarized.filter(query_filter)
+
+      assert summarized._queries == pool._queries
+
+
 class TestQueryPoolSort:
   def test_sort_empty_pool(self, query_structure, sample_dataframes):
     pool = QueryPool([], query_structure, sample_dataframes)
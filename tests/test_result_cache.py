@@ -0,0 +1,202 @@
+import pathlib
+
+import pandas as pd
+import pytest
+
+from pqg.generator import GenerateOptions, Generator
+from pqg.interpreter import interpret
+from pqg.merge import Merge
+from pqg.projection import Projection
+from pqg.query import Query
+from pqg.query_pool import QueryPool
+from pqg.query_structure import QueryStructure
+from pqg.result_cache import ResultCache, ResultCacheStatistics
+from pqg.schema import Schema
+from pqg.selection import Selection
+
+EXAMPLES_DIR = pathlib.Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def sample_data():
+  return {
+    'customers': pd.DataFrame(
+      {'id': [1, 2, 3], 'age': [25, 30, 35], 'country': ['US', 'UK', 'US']}
+    ),
+    'orders': pd.DataFrame({'id': [1, 2, 3, 4], 'customer_id': [1, 1, 2, 3]}),
+  }
+
+
+def adults(*operations) -> Query:
+  return Query(
+    'customers', [Selection([("'age'", '>=', 30, None)]), *operations], False, {'id', 'age'}
+  )
+
+
+class TestPrefixFingerprints:
+  def test_shared_prefixes_share_fingerprints(self):
+    first, second = adults(Projection(['age'])), adults(Projection(['id']))
+
+    assert len(first.prefix_fingerprints) == 2
+    assert first.prefix_fingerprints[0] == second.prefix_fingerprints[0]
+    assert first.prefix_fingerprints[1] != second.prefix_fingerprints[1]
+    assert first.prefix_fingerprints[-1] == first.fingerprint
+
+  def test_entity_is_part_of_fingerprints(self):
+    selection = Selection([("'id'", '>', 1, None)])
+
+    assert (
+      Query('customers', [selection], False, {'id'}).prefix_fingerprints
+      != Query('orders', [selection], False, {'id'}).prefix_fingerprints
+    )
+
+
+class TestResultCache:
+  def test_longest_prefix_is_reused(self, sample_data):
+    cache = ResultCache()
+
+    interpret(adults(Projection(['age'])), sample_data, cache)
+    interpret(adults(Projection(['country'])), sample_data, cache)
+
+    assert cache.statistics == ResultCacheStatistics(hits=0, misses=4)
+
+    result = interpret(adults(Projection(['id'])), sample_data, cache)
+
+    assert result['id'].tolist() == [2, 3]
+    assert cache.statistics == ResultCacheStatistics(hits=1, misses=5)
+
+  def test_results_are_stored_when_seen_twice(self, sample_data):
+    cache = ResultCache()
+
+    cache.put(1, sample_data['orders'])
+
+    assert len(cache) == 0
+
+    cache.put(1, sample_data['orders'])
+
+    assert cache.longest_prefix([1]) == (1, sample_data['orders'])
+
+  def test_merged_queries_are_reused(self, sample_data):
+    cache = ResultCache()
+
+    def query(column: str) -> Query:
+      return Query(
+        'orders',
+        [Merge(adults(), "'customer_id'", "'id'"), Projection([column])],
+        False,
+        {'id', 'customer_id', 'age'},
+      )
+
+    interpret(query('age'), sample_data, cache)
+    interpret(query('country'), sample_data, cache)
+    result = interpret(query('customer_id'), sample_data, cache)
+
+    assert result['customer_id'].tolist() == [2, 3]
+    assert cache.statistics.hits == 1
+
+  def test_results_equal_uncached_results(self):
+    generator = Generator(
+      Schema.from_file(str(EXAMPLES_DIR / 'tpch' / 'schema.json')),
+      QueryStructure(
+        groupby_aggregation_probability=0.5,
+        max_groupby_columns=3,
+        max_merges=3,
+        max_projection_columns=5,
+        max_selection_conditions=3,
+        projection_probability=0.5,
+        selection_probability=0.5,
+      ),
+    )
+
+    cache = ResultCache()
+
+    for query in generator.generate(
+      GenerateOptions(multi_processing=False, num_queries=300, seed=0)
+    ):
+      try:
+        expected = interpret(query, generator.sample_data)
+      except Exception:
+        continue
+
+      assert interpret(query, generator.sample_data, cache).equals(expected), str(query)
+
+    assert cache.statistics.hits > 0
+
+  def test_least_recently_used_results_are_evicted(self):
+    frame = pd.DataFrame({'a': range(100)})
+
+    cache = ResultCache()
+
+    for key in [1, 1, 2, 2]:
+      cache.put(key, frame)
+
+    size = cache.size // 2
+    cache.max_size = 2 * size
+
+    cache.longest_prefix([1])
+    cache.put(3, frame)
+    cache.put(3, frame)
+
+    assert len(cache) == 2 and cache.size == 2 * size
+    assert cache.statistics.evictions == 1
+    assert cache.longest_prefix([2]) == (0, None)
+    assert cache.longest_prefix([1])[0] == 1
+
+  def test_oversized_results_are_not_stored(self):
+    cache = ResultCache(max_size=8)
+
+    cache.put(1, pd.DataFrame({'a': range(100)}))
+    cache.put(1, pd.DataFrame({'a': range(100)}))
+
+    assert len(cache) == 0 and cache.statistics.evictions == 0
+
+  def test_returned_results_are_not_shared(self, sample_data):
+    structure = QueryStructure(0, 0, 0, 1, 1, 0.5, 0.5)
+
+    queries = [adults(), adults(), adults(Projection(['age'])), adults(Selection([]))]
+
+    pool = QueryPool(queries, structure, sample_data, multi_processing=False)
+
+    for result, _ in pool.execute():
+      result['age'] = -1
+
+    for result, _ in pool.execute(force_execute=True):
+      assert result['age'].tolist() == [30, 35]
+
+  def test_zero_size_disables_caching(self, sample_data):
+    cache = ResultCache(max_size=0)
+
+    interpret(adults(), sample_data, cache)
+    interpret(adults(), sample_data, cache)
+
+    assert len(cache) == 0 and cache.statistics == ResultCacheStatistics()
+
+
+def test_statistics_are_reported():
+  generator = Generator(
+    Schema.from_file(str(EXAMPLES_DIR / 'customer' / 'schema.json')),
+    QueryStructure(
+      groupby_aggregation_probability=0,
+      max_groupby_columns=0,
+      max_merges=2,
+      max_projection_columns=2,
+      max_selection_conditions=1,
+      projection_probability=0.5,
+      selection_probability=0.2,
+    ),
+  )
+
+  with generator:
+    for multi_processing in (False, True):
+      options = GenerateOptions(
+        ensure_non_empty=True, multi_processing=multi_processing, num_queries=200, seed=0
+      )
+
+      query_pool = generator.generate(options)
+
+      statistics = query_pool.statistics()
+
+      assert statistics.result_cache.hits > 0
+      assert query_pool._generation_statistics.result_cache.hits > 0
+      assert 'Result Cache (n = ' in str(statistics)
+      assert 'Result Cache Hit Rate' in str(statistics)
@@ -0,0 +1,181 @@
+import pandas as pd
+import pytest
+
+from pqg.arguments import SampleDataFormat
+from pqg.entity import Entity, PropertyEnum, PropertyInt
+from pqg.sample_data import (
+  SampleDataOptions,
+  generate_sample_data,
+  generation_order,
+  read_entity_data,
+  write_entity_data,
+)
+from pqg.schema import Schema
+
+
+@pytest.fixture
+def customer():
+  return Entity.from_configuration(
+    'customer',
+    {
+      'primary_key': 'id',
+      'num_rows': 50,
+      'properties': {
+        'id': {'type': 'int', 'min': 1, 'max': 120},
+        'status': {'type': 'enum', 'values': ['active', 'inactive']},
+      },
+    },
+  )
+
+
+@pytest.fixture
+def event():
+  return Entity(
+    name='event',
+    primary_key=None,
+    properties={
+      'kind': PropertyEnum(values=['a', 'b']),
+      'value': PropertyInt(min=0, max=10),
+    },
+    foreign_keys={},
+  )
+
+
+class TestRowCount:
+  def test_num_rows_from_configuration(self, customer):
+    assert customer.num_rows == 50
+    assert customer.row_count() == 50
+
+  def test_scale_factor(self, customer, event):
+    assert customer.row_count(2) == 100
+    assert event.row_count(0.5) == 500
+
+  def test_limited_by_primary_key(self, customer):
+    assert customer.row_count(10) == 120
+
+
+class TestGenerateDataframes:
+  def test_chunks(self, customer):
+    chunks = list(customer.generate_dataframes(120, chunk_size=50))
+
+    assert [len(chunk) for chunk in chunks] == [50, 50, 20]
+
+    combined = pd.concat(chunks)
+
+    assert combined['id'].tolist() == list(range(1, 121))
+    assert combined.index.tolist() == list(range(120))
+
+  def test_invalid_chunk_size(self, customer):
+    with pytest.raises(ValueError):
+      list(customer.generate_dataframes(10, chunk_size=0))
+
+
+@pytest.mark.parametrize('output_format', list(SampleDataFormat))
+def test_write_and_read(tmp_path, event, output_format):
+  pytest.importorskip('pyarrow')
+
+  path = str(tmp_path / f'event.{output_format.value}')
+
+  write_entity_data(event, path, 1000, output_format, chunk_size=300)
+
+  df = read_entity_data(path, output_format)
+
+  assert df.shape == (1000, 2)
+  assert df['value'].between(0, 10).all()
+  assert df['kind'].isin(['a', 'b']).all()
+
+
+def test_generate_sample_data(customer, event):
+  schema = Schema({customer, event})
+
+  sample_data = generate_sample_data(schema, SampleDataOptions(scale_factor=2))
+
+  assert len(sample_data['customer']) == 100
+  assert len(sample_data['event']) == 2000
+
+
+def test_generate_sample_data_to_directory(tmp_path, customer, event):
+  pytest.importorskip('pyarrow')
+
+  schema = Schema({customer, event})
+
+  sample_data = generate_sample_data(
+    schema, SampleDataOptions(chunk_size=64, output_dir=str(tmp_path))
+  )
+
+  assert (tmp_path / 'customer.parquet').exists()
+  assert (tmp_path / 'event.parquet').exists()
+  assert len(sample_data['customer']) == 50
+  assert len(sample_data['event']) == 1000
+
+
+def test_parallel_generation_matches_serial(customer, event, mocker):
+  mocker.patch('os.cpu_count', return_value=2)
+
+  schema = Schema({customer, event})
+
+  serial = generate_sample_data(schema, SampleDataOptions(seed=3))
+  parallel = generate_sample_data(schema, SampleDataOptions(multi_processing=True, seed=3))
+
+  assert list(serial) == list(parallel)
+
+  for name, df in serial.items():
+    pd.testing.assert_frame_equal(df, parallel[name])
+
+
+def test_generation_order():
+  schema = Schema.from_dict(
+    {
+      'entities': {
+        'a': {'properties': {'x': {'type': 'int'}}},
+        'b': {'properties': {'x': {'type': 'int'}}, 'foreign_keys': {'x': ['x', 'a']}},
+        'c': {'properties': {'x': {'type': 'int'}}, 'foreign_keys': {'x': ['x', 'b']}},
+        'd': {'properties': {'x': {'type': 'int'}}, 'foreign_keys': {'x': ['x', 'e']}},
+        'e': {'properties': {'x': {'type': 'int'}}, 'foreign_keys': {'x': ['x', 'd']}},
+      }
+    }
+  )
+
+  order = [[entity.name for entity in wave] for wave in generation_order(schema)]
+
+  assert order == [['a'], ['b'], ['c'], ['d', 'e']]
+
+
+def test_foreign_keys_are_consistent(customer):
+  order = Entity.from_configuration(
+    'order',
+    {
+      'primary_key': 'order_id',
+      'properties': {
+        'order_id': {'type': 'int', 'min': 1, 'max': 1000},
+        'customer_id': {'type': 'int', 'min': 500, 'max': 900},
+      },
+      'foreign_keys': {'customer_id': ['id', 'customer']},
+    },
+  )
+
+  sample_data = generate_sample_data(Schema({customer, order}), SampleDataOptions(seed=1))
+
+  assert sample_data['order']['customer_id'].isin(sample_data['customer']['id']).all()
+
+
+def test_typed_foreign_keys_are_consistent(customer):
+  order = Entity.from_configuration(
+    'order',
+    {
+      'primary_key': 'order_id',
+      'properties': {
+        'order_id': {'type': 'int', 'min': 1, 'max': 1000},
+        'customer_id': {'type': 'int', 'min': 1, 'max': 100000},
+      },
+      'foreign_keys': {'customer_id': ['id', 'customer']},
+    },
+  )
+
+  sample_data = generate_sample_data(
+    Schema({customer, order}), SampleDataOptions(seed=1, typed=True)
+  )
+
+  assert sample_data['customer']['id'].dtype == 'int8'
+  assert sample_data['order']['customer_id'].dtype == 'int32'
+  assert sample_data['order']['customer_id'].isin(sample_data['customer']['id']).all()
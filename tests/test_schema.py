@@ -0,0 +1,50 @@
+import pytest
+
+from pqg.schema import Reference, Schema
+
+
+@pytest.fixture
+def schema():
+  return Schema.from_dict(
+    {
+      'entities': {
+        'region': {'properties': {'id': {'type': 'int'}}},
+        'nation': {
+          'properties': {'id': {'type': 'int'}, 'region': {'type': 'int'}},
+          'foreign_keys': {'region': ['id', 'region']},
+        },
+        'customer': {
+          'properties': {'id': {'type': 'int'}, 'nation': {'type': 'int'}},
+          'foreign_keys': {'nation': ['id', 'nation']},
+        },
+        'supplier': {
+          'properties': {'id': {'type': 'int'}, 'nation': {'type': 'int'}},
+          'foreign_keys': {'nation': ['id', 'nation']},
+        },
+      }
+    }
+  )
+
+
+class TestJoinGraph:
+  def test_sorted_entities(self, schema):
+    assert [entity.name for entity in schema.sorted_entities] == [
+      'customer',
+      'nation',
+      'region',
+      'supplier',
+    ]
+
+  def test_references(self, schema):
+    assert schema.references('customer') == (Reference('customer', 'nation', 'id', 'nation'),)
+    assert schema.references('region') == ()
+
+  def test_plan_uses_reachable(self, schema):
+    assert [entity.reach for entity in schema.plan.entities] == [2, 1, 0, 2]
+
+  def test_reachable(self, schema):
+    assert schema.reachable('customer', 0) == frozenset()
+    assert schema.reachable('customer', 1) == {'nation'}
+    assert schema.reachable('customer', 2) == {'nation', 'region'}
+    assert schema.reachable('customer', 10) == {'nation', 'region'}
+    assert schema.reachable('region', 3) == frozenset()
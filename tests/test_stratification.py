@@ -0,0 +1,164 @@
+import collections
+import pathlib
+import random
+
+import numpy as np
+import pytest
+
+from pqg.generator import GenerateOptions, Generator
+from pqg.merge import Merge
+from pqg.projection import Projection
+from pqg.query_builder import QueryBuilder
+from pqg.query_structure import QueryStructure
+from pqg.schema import Schema
+from pqg.stratification import QueryShape, Stratification
+
+EXAMPLES_DIR = pathlib.Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def schema() -> Schema:
+  return Schema.from_file(str(EXAMPLES_DIR / 'tpch' / 'schema.json'))
+
+
+@pytest.fixture
+def query_structure() -> QueryStructure:
+  return QueryStructure(
+    groupby_aggregation_probability=0.3,
+    max_groupby_columns=3,
+    max_merges=5,
+    max_projection_columns=5,
+    max_selection_conditions=4,
+    projection_probability=0.7,
+    selection_probability=0.6,
+  )
+
+
+class TestStratification:
+  def test_counts_match_targets(self, schema, query_structure):
+    stratification = Stratification(query_structure, schema.plan, 1003, np.random.default_rng(0))
+
+    assert len(stratification) == sum(stratification.counts) == 1003
+
+    targets = stratification.targets()
+
+    def count(predicate) -> int:
+      return sum(n for shape, n in targets.items() if predicate(shape))
+
+    assert count(lambda shape: shape.selection) == round(0.6 * 1003)
+    assert count(lambda shape: shape.projection) == round(0.7 * 1003)
+    assert count(lambda shape: shape.group_by) == round(0.3 * 1003)
+
+    for merges in range(6):
+      assert abs(count(lambda shape: shape.merges == merges) - 1003 / 6) < 1
+
+    expected = 1003 / 6 * 0.6 * 0.7 * 0.3
+
+    assert abs(targets[QueryShape(True, True, True, 2)] - expected) < 1.5
+
+  def test_operations_without_limit_are_excluded(self, schema, query_structure):
+    query_structure.max_groupby_columns = 0
+    query_structure.max_merges = 100
+
+    stratification = Stratification(query_structure, schema.plan, 100, np.random.default_rng(0))
+
+    assert not any(shape.group_by for shape in stratification.shapes)
+    assert max(shape.merges for shape in stratification.shapes) == max(
+      entity.reach for entity in schema.plan.entities
+    )
+
+  def test_order_is_seeded(self, schema, query_structure):
+    def order(seed: int):
+      stratification = Stratification(
+        query_structure, schema.plan, 100, np.random.default_rng(seed)
+      )
+      return [stratification[i] for i in range(100)]
+
+    assert order(1) == order(1)
+    assert order(1) != order(2)
+    assert collections.Counter(order(1)) == collections.Counter(order(2))
+
+
+def test_builder_follows_shape(schema, query_structure):
+  stratification = Stratification(query_structure, schema.plan, 500, np.random.default_rng(0))
+
+  rng = random.Random(0)
+
+  for i in range(len(stratification)):
+    query = QueryBuilder(schema, query_structure, False, rng=rng, shape=stratification[i]).build()
+
+    assert QueryShape.of(query) == stratification[i]
+
+
+def test_projections_stay_within_limit(schema, query_structure):
+  stratification = Stratification(query_structure, schema.plan, 500, np.random.default_rng(0))
+
+  rng = random.Random(0)
+
+  def projections(query):
+    for operation in query.operations:
+      if isinstance(operation, Projection):
+        yield operation
+      elif isinstance(operation, Merge):
+        yield from projections(operation.right)
+
+  for i in range(len(stratification)):
+    query = QueryBuilder(schema, query_structure, False, rng=rng, shape=stratification[i]).build()
+
+    assert QueryShape.of(query) == stratification[i]
+
+    for projection in projections(query):
+      assert len(projection.columns) <= query_structure.max_projection_columns
+
+
+def test_stratified_generation(schema, query_structure):
+  query_structure.max_merges = 1
+
+  options = GenerateOptions(multi_processing=False, num_queries=200, seed=4, stratified=True)
+
+  generator = Generator(schema, query_structure)
+
+  query_pool = generator.generate(options)
+
+  stratification = Stratification(query_structure, schema.plan, 200, np.random.default_rng(0))
+
+  assert collections.Counter(QueryShape.of(query) for query in query_pool) == collections.Counter(
+    stratification.targets()
+  )
+
+  assert generator.generate_query(options, 7) == list(query_pool)[7]
+
+
+def test_vectorized_generation_is_rejected(schema, query_structure):
+  options = GenerateOptions(stratified=True, vectorized=True)
+
+  with pytest.raises(ValueError):
+    list(Generator(schema, query_structure).iter_queries(options))
+
+
+def test_duplicates_are_replaced_with_their_shape():
+  query_structure = QueryStructure(
+    groupby_aggregation_probability=0,
+    max_groupby_columns=0,
+    max_merges=0,
+    max_projection_columns=1,
+    max_selection_conditions=0,
+    projection_probability=0.5,
+    selection_probability=0,
+  )
+
+  generator = Generator(
+    Schema.from_file(str(EXAMPLES_DIR / 'customer' / 'schema.json')), query_structure
+  )
+
+  options = GenerateOptions(
+    multi_processing=False, num_queries=4, seed=2, stratified=True, unique=True
+  )
+
+  query_pool = generator.generate(options)
+
+  assert query_pool._generation_statistics.duplicates > 0
+  assert collections.Counter(QueryShape.of(query).projection for query in query_pool) == {
+    False: 2,
+    True: 2,
+  }